@@ -1,27 +1,58 @@
 """
 Dependencias inyectables: sesión BD y usuario actual (auth).
 """
+from dataclasses import dataclass
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from backend.app.core.cache import CacheTTL
+from backend.app.core.config import APP_ROLE, AUTH_CACHE_TTL_SECONDS, ML_WORKER_URL
 from backend.app.db.database import get_db
 from backend.app.db.models import UsuarioSistema
 from backend.app.core.security import decode_access_token
+from backend.app.services.cambios_service import TIPO_USUARIO, sincronizador
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+@dataclass(frozen=True)
+class UsuarioActual:
+    """Usuario autenticado (copia inmutable, reutilizable entre requests sin sesión BD)."""
+    id_usuario: int
+    nombre_usuario: str
+    rol: str
+    estado: str
+
+
+# (id_usuario, token) → UsuarioActual activo. El token en la clave ata la entrada a sus claims: otro
+# token del mismo usuario (nuevo login, otros claims) no reutiliza la entrada. Se invalida por usuario
+# al cambiar su estado o rol (HU-09), en todos los workers.
+_usuarios_cache = CacheTTL(AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidar_usuario_cache(id_usuario: int | None) -> None:
+    """Descarta el usuario cacheado (None = todos): el próximo request vuelve a leerlo de la BD."""
+    if id_usuario is None:
+        _usuarios_cache.clear()
+    else:
+        _usuarios_cache.pop_si(lambda clave: clave[0] == id_usuario)
+
+
+sincronizador.manejar(TIPO_USUARIO, lambda db, id_usuario, local: invalidar_usuario_cache(id_usuario))
+
+
 def get_current_user_optional(
     db: Annotated[Session, Depends(get_db)],
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer_scheme)],
-) -> UsuarioSistema | None:
+) -> UsuarioActual | None:
     """Obtiene el usuario actual si envía token válido; si no, retorna None."""
     if not credentials:
         return None
-    payload = decode_access_token(credentials.credentials)
+    token = credentials.credentials
+    payload = decode_access_token(token)
     if not payload or "sub" not in payload:
         return None
     user_id = payload["sub"]
@@ -29,15 +60,25 @@ def get_current_user_optional(
         user_id = int(user_id)
     except ValueError:
         return None
+    cached = _usuarios_cache.get((user_id, token))
+    if cached is not None:
+        return cached
     user = db.query(UsuarioSistema).filter(UsuarioSistema.id_usuario == user_id).first()
     if not user or user.estado != "activo":
         return None
-    return user
+    actual = UsuarioActual(
+        id_usuario=user.id_usuario,
+        nombre_usuario=user.nombre_usuario,
+        rol=user.rol,
+        estado=user.estado,
+    )
+    _usuarios_cache.set((user_id, token), actual)
+    return actual
 
 
 def get_current_user(
-    user: Annotated[UsuarioSistema | None, Depends(get_current_user_optional)],
-) -> UsuarioSistema:
+    user: Annotated[UsuarioActual | None, Depends(get_current_user_optional)],
+) -> UsuarioActual:
     """Exige usuario autenticado; 401 si no hay token o es inválido."""
     if user is None:
         raise HTTPException(
@@ -49,8 +90,8 @@ def get_current_user(
 
 
 def require_admin(
-    user: Annotated[UsuarioSistema, Depends(get_current_user)],
-) -> UsuarioSistema:
+    user: Annotated[UsuarioActual, Depends(get_current_user)],
+) -> UsuarioActual:
     """Exige usuario autenticado con rol admin; 403 si no es admin. HU-09."""
     if user.rol != "admin":
         raise HTTPException(
@@ -58,3 +99,23 @@ def require_admin(
             detail="Se requiere rol administrador",
         )
     return user
+
+
+def requiere_ml(request: Request) -> None:
+    """
+    Rutas de reconocimiento facial. En un worker APP_ROLE=no-ml se atienden en los workers de inferencia:
+    307 a ML_WORKER_URL con la misma ruta (el cliente reenvía el método y el cuerpo), o 503 si no hay destino.
+    """
+    if APP_ROLE != "no-ml":
+        return
+    if ML_WORKER_URL:
+        destino = ML_WORKER_URL + request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        raise HTTPException(
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            detail="El reconocimiento facial se atiende en otro worker",
+            headers={"Location": destino},
+        )
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Este worker no ejecuta reconocimiento facial (APP_ROLE=no-ml)",
+    )
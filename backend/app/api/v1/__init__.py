@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from backend.app.api.v1.routes import personas, access, events, autorizaciones, usuarios, reportes
+from backend.app.api.v1.routes import personas, access, events, autorizaciones, usuarios, reportes, zonas
 
 api_router = APIRouter()
 api_router.include_router(personas.router, prefix="/personas", tags=["personas"])
@@ -9,3 +9,4 @@ api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(autorizaciones.router, prefix="/autorizaciones", tags=["autorizaciones"])
 api_router.include_router(usuarios.router, prefix="/usuarios", tags=["usuarios"])
 api_router.include_router(reportes.router, prefix="/reportes", tags=["reportes"])
+api_router.include_router(zonas.router, prefix="/zonas", tags=["zonas"])
@@ -1,13 +1,31 @@
 """Rutas validación de acceso. HU-05, HU-07."""
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.api.dependencies import UsuarioActual, require_admin, requiere_ml
 from backend.app.db.database import get_db
-from backend.app.services.access_service import validate_access, ValidateAccessResult
+from backend.app.core.config import BURST_MAX_FRAMES
+from backend.app.services.access_service import (
+    validate_access,
+    validate_access_burst,
+    ValidateAccessResult,
+    prefiltro_vivacidad,
+)
 from backend.app.services.event_service import register_salida
+from backend.app.services.inferencia_service import ErrorInferencia
+
+router = APIRouter(route_class=RutaPerfilable)
+
 
-router = APIRouter()
+def _map_acceso_errors(e: ValueError) -> None:
+    """Solo la zona inexistente es un error del cliente; cualquier otro ValueError es un fallo interno (500)."""
+    if str(e) == "zona_no_encontrada":
+        raise HTTPException(status_code=404, detail="Zona no encontrada.")
+    raise e
 
 
 class ValidateAccessResponse(BaseModel):
@@ -17,6 +35,11 @@ class ValidateAccessResponse(BaseModel):
     reason: str
 
 
+class ValidateBurstResponse(ValidateAccessResponse):
+    frames_received: int
+    frames_processed: int
+
+
 class RegisterExitResponse(BaseModel):
     registered: bool
     person_id: int | None = None
@@ -24,15 +47,18 @@ class RegisterExitResponse(BaseModel):
     reason: str
 
 
-@router.post("/validate", response_model=ValidateAccessResponse)
+@router.post("/validate", response_model=ValidateAccessResponse, dependencies=[Depends(requiere_ml)])
 def validar_acceso(
     file: UploadFile = File(..., description="Imagen con un rostro (JPEG/PNG)"),
+    id_zona: int | None = Form(None, description="Zona de la puerta; se busca solo entre sus personas"),
     db: Session = Depends(get_db),
 ):
     """
     Valida acceso por reconocimiento facial.
     Envía una imagen con un único rostro; retorna allowed, person_id (si hay match) y reason.
     Si allowed=true se registra el evento de entrada (HU-06).
+    id_zona (opcional) identifica la zona de la puerta; 404 si la zona no existe o está inactiva.
+    503 si el servicio de inferencia (INFERENCE_SERVICE_URL) no responde e INFERENCE_FALLBACK_LOCAL=false.
     """
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="El archivo debe ser una imagen (JPEG, PNG, etc.)")
@@ -41,7 +67,12 @@ def validar_acceso(
     if len(image_bytes) == 0:
         raise HTTPException(status_code=400, detail="Imagen vacía")
 
-    result: ValidateAccessResult = validate_access(db, image_bytes)
+    try:
+        result: ValidateAccessResult = validate_access(db, image_bytes, id_zona=id_zona)
+    except ValueError as e:
+        _map_acceso_errors(e)
+    except ErrorInferencia:
+        raise HTTPException(status_code=503, detail="Servicio de inferencia no disponible.")
     return ValidateAccessResponse(
         allowed=result.allowed,
         person_id=result.person_id,
@@ -50,9 +81,48 @@ def validar_acceso(
     )
 
 
-@router.post("/register-exit", response_model=RegisterExitResponse)
+@router.post("/validate-burst", response_model=ValidateBurstResponse, dependencies=[Depends(requiere_ml)])
+def validar_acceso_rafaga(
+    files: list[UploadFile] = File(..., description="Varios cuadros de la misma persona (JPEG/PNG), en orden"),
+    fusion: Literal["best", "mean"] = Form("best", description="best: mejor cuadro | mean: promedio de embeddings"),
+    id_zona: int | None = Form(None, description="Zona de la puerta; se busca solo entre sus personas"),
+    db: Session = Depends(get_db),
+):
+    """
+    Valida acceso con una ráfaga de cuadros en una sola petición (HU-05).
+    Se procesan hasta BURST_MAX_FRAMES cuadros y se detiene en el primero que supera el umbral;
+    frames_processed indica cuántos se usaron. Se registra un solo evento por ráfaga (HU-06).
+    """
+    images = []
+    for f in files[:BURST_MAX_FRAMES]:
+        if not f.content_type or not f.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="Todos los archivos deben ser imágenes (JPEG, PNG, etc.)")
+        data = f.file.read()
+        if data:
+            images.append(data)
+    if not images:
+        raise HTTPException(status_code=400, detail="Imagen vacía")
+
+    try:
+        result = validate_access_burst(db, images, fusion=fusion, id_zona=id_zona)
+    except ValueError as e:
+        _map_acceso_errors(e)
+    except ErrorInferencia:
+        raise HTTPException(status_code=503, detail="Servicio de inferencia no disponible.")
+    return ValidateBurstResponse(
+        allowed=result.allowed,
+        person_id=result.person_id,
+        similarity=result.similarity,
+        reason=result.reason,
+        frames_received=len(files),
+        frames_processed=result.frames_processed,
+    )
+
+
+@router.post("/register-exit", response_model=RegisterExitResponse, dependencies=[Depends(requiere_ml)])
 def registrar_salida_endpoint(
     file: UploadFile = File(..., description="Imagen con un rostro para registrar salida (JPEG/PNG)"),
+    id_zona: int | None = Form(None, description="Zona de la puerta; se busca solo entre sus personas"),
     db: Session = Depends(get_db),
 ):
     """
@@ -67,7 +137,12 @@ def registrar_salida_endpoint(
     if len(image_bytes) == 0:
         raise HTTPException(status_code=400, detail="Imagen vacía")
 
-    result = validate_access(db, image_bytes, register_entrada_event=False)
+    try:
+        result = validate_access(db, image_bytes, register_entrada_event=False, id_zona=id_zona)
+    except ValueError as e:
+        _map_acceso_errors(e)
+    except ErrorInferencia:
+        raise HTTPException(status_code=503, detail="Servicio de inferencia no disponible.")
     if not result.allowed:
         return RegisterExitResponse(
             registered=False,
@@ -87,3 +162,9 @@ def registrar_salida_endpoint(
         similarity=result.similarity,
         reason="salida_registrada",
     )
+
+
+@router.get("/vivacidad/estadisticas")
+def estadisticas_vivacidad(_user: UsuarioActual = Depends(require_admin)):
+    """Métricas del prefiltro de vivacidad: cuadros evaluados, rechazos por motivo y duración (s). Solo admin."""
+    return prefiltro_vivacidad.estadisticas()
@@ -2,12 +2,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from backend.app.core.profiling import RutaPerfilable
 from backend.app.db.database import get_db
 from backend.app.db.models import Autorizacion
 from backend.app.schemas.autorizacion import AutorizacionCreate, AutorizacionResponse, AutorizacionRevocar
-from backend.app.services.autorizacion_service import crear_autorizacion as svc_crear_autorizacion
+from backend.app.services.autorizacion_service import (
+    crear_autorizacion as svc_crear_autorizacion,
+    revocar_autorizacion as svc_revocar_autorizacion,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=RutaPerfilable)
 
 
 def _autorizacion_to_response(r) -> AutorizacionResponse:
@@ -71,13 +75,13 @@ def revocar_autorizacion(
     """
     Revoca una autorización vigente. HU-13. Solo se puede revocar si estado actual es vigente.
     """
-    aut = db.query(Autorizacion).filter(Autorizacion.id_autorizacion == autorizacion_id).first()
-    if not aut:
-        raise HTTPException(status_code=404, detail="Autorización no encontrada.")
-    if aut.estado != "vigente":
-        raise HTTPException(status_code=400, detail="Solo se puede revocar una autorización vigente.")
-    aut.estado = "revocada"
-    aut.motivo_revocacion = (body.motivo or "").strip() or None
-    db.commit()
-    db.refresh(aut)
+    try:
+        aut = svc_revocar_autorizacion(db, autorizacion_id, motivo=body.motivo)
+    except ValueError as e:
+        msg = str(e)
+        if msg == "autorizacion_no_encontrada":
+            raise HTTPException(status_code=404, detail="Autorización no encontrada.")
+        if msg == "autorizacion_no_vigente":
+            raise HTTPException(status_code=400, detail="Solo se puede revocar una autorización vigente.")
+        raise HTTPException(status_code=400, detail=msg)
     return _autorizacion_to_response(aut)
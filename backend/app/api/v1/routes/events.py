@@ -1,16 +1,21 @@
 """Rutas eventos entrada/salida. HU-06, HU-07, HU-08, HU-11."""
+import asyncio
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from backend.app.db.database import get_db
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.db.database import get_db_lectura
 from backend.app.db.models import RegistroAcceso, Persona
 from backend.app.schemas.event import EventoListItem, DashboardEstadisticas
+from backend.app.core.config import SSE_HEARTBEAT_SECONDS
+from backend.app.services.archivo_service import consultar_eventos
+from backend.app.services.event_bus import bus
+from backend.app.services.event_service import calcular_estadisticas
 
-router = APIRouter()
+router = APIRouter(route_class=RutaPerfilable)
 
 DEFAULT_LIMIT = 50
 MAX_LIMIT = 100
@@ -28,7 +33,7 @@ def _query_eventos(
     """Construye query de eventos con filtros. HU-08."""
     q = (
         db.query(RegistroAcceso)
-        .join(Persona, RegistroAcceso.id_persona == Persona.id_persona)
+        .outerjoin(Persona, RegistroAcceso.id_persona == Persona.id_persona)
         .order_by(RegistroAcceso.fecha_hora.desc())
     )
     if tipo in ("ingreso", "entrada"):
@@ -67,14 +72,16 @@ def listar_eventos(
     resultado: str | None = Query(None, description="permitido | denegado"),
     limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
 ):
     """
     Lista eventos de acceso (registro_acceso). HU-06, HU-08.
     Filtros: tipo, persona_id, documento, fecha_desde, fecha_hasta, resultado. Paginación limit/offset (máx 100).
+    Si la página no se completa con la tabla caliente, continúa en las particiones archivadas del rango.
     """
-    q = _query_eventos(db, tipo=tipo, persona_id=persona_id, documento=documento, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, resultado=resultado)
-    rows = q.offset(offset).limit(limit).all()
+    filtros = dict(tipo=tipo, persona_id=persona_id, documento=documento, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, resultado=resultado)
+    q = _query_eventos(db, **filtros)
+    rows = consultar_eventos(db, q, limit=limit, offset=offset, **filtros)
     return [
         EventoListItem(
             id_registro=r.id_registro,
@@ -85,6 +92,7 @@ def listar_eventos(
             resultado=r.resultado,
             similarity_score=r.similarity_score,
             metodo_identificacion=r.metodo_identificacion,
+            motivo_denegacion=r.motivo_denegacion,
         )
         for r in rows
     ]
@@ -94,7 +102,7 @@ def listar_eventos(
 def listar_eventos_recientes(
     minutos: int = Query(10, ge=1, le=120, description="Últimos N minutos"),
     limit: int = Query(50, ge=1, le=MAX_LIMIT),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
 ):
     """
     Lista eventos de los últimos N minutos. HU-11 (dashboard).
@@ -102,7 +110,7 @@ def listar_eventos_recientes(
     desde = datetime.utcnow() - timedelta(minutes=minutos)
     rows = (
         db.query(RegistroAcceso)
-        .join(Persona, RegistroAcceso.id_persona == Persona.id_persona)
+        .outerjoin(Persona, RegistroAcceso.id_persona == Persona.id_persona)
         .filter(RegistroAcceso.fecha_hora >= desde)
         .order_by(RegistroAcceso.fecha_hora.desc())
         .limit(limit)
@@ -118,43 +126,50 @@ def listar_eventos_recientes(
             resultado=r.resultado,
             similarity_score=r.similarity_score,
             metodo_identificacion=r.metodo_identificacion,
+            motivo_denegacion=r.motivo_denegacion,
         )
         for r in rows
     ]
 
 
 @router.get("/estadisticas", response_model=DashboardEstadisticas)
-def obtener_estadisticas_dashboard(db: Session = Depends(get_db)):
+def obtener_estadisticas_dashboard(db: Session = Depends(get_db_lectura)):
     """
     Métricas para dashboard: total personas dentro, accesos permitidos hoy, denegaciones hoy. HU-11.
     """
-    hoy_inicio = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    accesos_hoy = (
-        db.query(func.count(RegistroAcceso.id_registro))
-        .filter(RegistroAcceso.fecha_hora >= hoy_inicio, RegistroAcceso.resultado == "permitido")
-        .scalar()
-        or 0
-    )
-    denegaciones_hoy = (
-        db.query(func.count(RegistroAcceso.id_registro))
-        .filter(RegistroAcceso.fecha_hora >= hoy_inicio, RegistroAcceso.resultado == "denegado")
-        .scalar()
-        or 0
-    )
-    # Personas cuyo último evento es ingreso permitido (están "dentro")
-    subq = (
-        db.query(RegistroAcceso.id_persona, func.max(RegistroAcceso.fecha_hora).label("max_fecha"))
-        .group_by(RegistroAcceso.id_persona)
-        .subquery()
-    )
-    total_dentro = (
-        db.query(func.count(RegistroAcceso.id_registro))
-        .join(subq, (RegistroAcceso.id_persona == subq.c.id_persona) & (RegistroAcceso.fecha_hora == subq.c.max_fecha))
-        .filter(RegistroAcceso.tipo_movimiento == "ingreso", RegistroAcceso.resultado == "permitido")
-        .scalar()
-        or 0
+    return calcular_estadisticas(db)
+
+
+@router.get("/stream")
+async def stream_eventos(request: Request):
+    """
+    Canal en vivo del dashboard (Server-Sent Events). HU-11.
+    Mensajes: `evento` (entrada, salida o denegación), `estadisticas` (métricas recalculadas una vez
+    por proceso cuando hay cambios) y `resync` (el cliente se atrasó: recargar estado completo).
+    Envía un comentario de heartbeat cada SSE_HEARTBEAT_SECONDS sin tráfico.
+    """
+    sub = bus.subscribe()
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Demasiados clientes conectados al canal en vivo.")
+
+    async def generar():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    mensaje = await asyncio.wait_for(sub.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield mensaje
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return DashboardEstadisticas(total_dentro=total_dentro, accesos_hoy=accesos_hoy, denegaciones_hoy=denegaciones_hoy)
 
 
 @router.get("/export", response_class=PlainTextResponse)
@@ -166,18 +181,19 @@ def exportar_eventos_csv(
     fecha_hasta: str | None = Query(None),
     resultado: str | None = Query(None),
     limit: int = Query(MAX_LIMIT, ge=1, le=5000),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
 ):
     """
     Exporta eventos a CSV con los mismos filtros que GET /. HU-08. Máximo 5000 filas.
     """
-    q = _query_eventos(db, tipo=tipo, persona_id=persona_id, documento=documento, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, resultado=resultado)
-    rows = q.limit(limit).all()
-    lines = ["id_registro;id_persona;nombre_completo;tipo_movimiento;fecha_hora;resultado;similarity_score;metodo_identificacion"]
+    filtros = dict(tipo=tipo, persona_id=persona_id, documento=documento, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, resultado=resultado)
+    q = _query_eventos(db, **filtros)
+    rows = consultar_eventos(db, q, limit=limit, **filtros)
+    lines = ["id_registro;id_persona;nombre_completo;tipo_movimiento;fecha_hora;resultado;similarity_score;metodo_identificacion;motivo_denegacion"]
     for r in rows:
         nombre = (r.persona.nombre_completo if r.persona else "") or ""
         nombre = nombre.replace(";", ",")
         lines.append(
-            f"{r.id_registro};{r.id_persona};{nombre};{r.tipo_movimiento};{r.fecha_hora.isoformat() if r.fecha_hora else ''};{r.resultado};{r.similarity_score or ''};{r.metodo_identificacion}"
+            f"{r.id_registro};{r.id_persona or ''};{nombre};{r.tipo_movimiento};{r.fecha_hora.isoformat() if r.fecha_hora else ''};{r.resultado};{r.similarity_score or ''};{r.metodo_identificacion};{r.motivo_denegacion or ''}"
         )
     return "\n".join(lines)
@@ -1,17 +1,22 @@
 """Rutas personas (empleados y visitantes). HU-01, HU-02, HU-03, HU-10, HU-14."""
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-
-from backend.app.db.database import get_db
-from backend.app.db.models import Persona, TipoPersona, RegistroAcceso
-from backend.app.services.persona_service import registrar_empleado, registrar_visitante
+from sqlalchemy import func
+
+from backend.app.api.dependencies import requiere_ml
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.db.database import get_db, get_db_lectura
+from backend.app.db.models import Persona, RegistroAcceso
+from backend.app.services.persona_service import registrar_empleado, registrar_visitante, buscar_personas
+from backend.app.services.cambios_service import TIPO_PERSONA, registrar_cambio
 from backend.app.schemas.persona import PersonaRegistroResponse, PersonaListItem, PersonaDetail, PersonaUpdate, PersonaDentro
 
-router = APIRouter()
+router = APIRouter(route_class=RutaPerfilable)
 
 TIPO_EMPLEADO = "empleado_propio"
 TIPO_VISITANTE = "visitante_temporal"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
 
 
 def _map_registro_errors(e: ValueError) -> None:
@@ -23,6 +28,13 @@ def _map_registro_errors(e: ValueError) -> None:
             status_code=400,
             detail="No se detectó un rostro en la imagen. Use una foto con un único rostro visible.",
         )
+    if msg == "rostro_duplicado":
+        raise HTTPException(status_code=409, detail="Ese rostro ya está registrado para otra persona.")
+    if msg == "calidad_insuficiente":
+        raise HTTPException(
+            status_code=400,
+            detail="La foto no tiene calidad suficiente (rostro pequeño, borroso, mal iluminado o girado). Tome otra foto de frente y con buena luz.",
+        )
     if msg == "foto_requerida":
         raise HTTPException(status_code=400, detail="Se requiere una foto.")
     if msg == "tipo_persona_no_configurado":
@@ -35,27 +47,24 @@ def _map_registro_errors(e: ValueError) -> None:
 
 @router.get("/", response_model=list[PersonaListItem])
 def listar_personas(
+    response: Response,
     tipo: str | None = None,
     estado: str | None = Query(None, description="activo | inactivo | todos"),
-    q: str | None = Query(None, description="Búsqueda por nombre o documento"),
+    q: str | None = Query(None, description="Búsqueda por nombre o documento (prefijos, sin acentos)"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
     db: Session = Depends(get_db),
 ):
     """
     Lista personas. tipo=empleado|visitante. estado=activo|inactivo|todos (default activo). q=búsqueda nombre/documento. HU-02, HU-03.
+    Ordenado por nombre; paginado con limit y cursor. Si hay más resultados, la cabecera X-Next-Cursor trae el cursor siguiente.
     """
-    query = db.query(Persona).join(TipoPersona, Persona.id_tipo_persona == TipoPersona.id_tipo_persona)
-    if tipo in ("empleado_propio", "empleado"):
-        query = query.filter(TipoPersona.nombre_tipo == "empleado_propio")
-    elif tipo in ("visitante_temporal", "visitante"):
-        query = query.filter(TipoPersona.nombre_tipo == "visitante_temporal")
-    if estado == "inactivo":
-        query = query.filter(Persona.estado == "inactivo")
-    elif estado != "todos":
-        query = query.filter(Persona.estado == "activo")
-    if q and q.strip():
-        term = "%" + q.strip() + "%"
-        query = query.filter(or_(Persona.nombre_completo.ilike(term), Persona.documento.ilike(term)))
-    personas = query.order_by(Persona.nombre_completo).all()
+    try:
+        personas, siguiente = buscar_personas(db, tipo=tipo, estado=estado, q=q, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
     return [
         PersonaListItem(id_persona=p.id_persona, nombre_completo=p.nombre_completo, documento=p.documento, estado=p.estado)
         for p in personas
@@ -63,13 +72,15 @@ def listar_personas(
 
 
 @router.get("/dentro", response_model=list[PersonaDentro])
-def listar_personas_dentro(db: Session = Depends(get_db)):
+def listar_personas_dentro(db: Session = Depends(get_db_lectura)):
     """
-    Lista personas actualmente dentro: último evento = ingreso permitido. HU-14.
+    Lista personas actualmente dentro: su último evento permitido es un ingreso (los intentos
+    denegados, que también llevan id_persona, no cuentan). HU-14.
     Devuelve id_persona, nombre_completo y fecha_hora del ingreso.
     """
     subq = (
         db.query(RegistroAcceso.id_persona, func.max(RegistroAcceso.fecha_hora).label("max_fecha"))
+        .filter(RegistroAcceso.resultado == "permitido")
         .group_by(RegistroAcceso.id_persona)
         .subquery()
     )
@@ -114,7 +125,7 @@ def obtener_persona(persona_id: int, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/", response_model=PersonaRegistroResponse)
+@router.post("/", response_model=PersonaRegistroResponse, dependencies=[Depends(requiere_ml)])
 def registrar_persona(
     nombre_completo: str = Form(..., min_length=1),
     documento: str = Form(..., min_length=1),
@@ -132,6 +143,7 @@ def registrar_persona(
     Registra persona (empleado o visitante) con foto. Genera embedding Facenet.
     Para visitante: enviar tipo=visitante_temporal, empresa y motivo_visita. Opcional id_empleado_visitado.
     Documento único (409). Requiere un rostro en la foto (400 si no se detecta).
+    Si el rostro coincide con otra persona activa se informa en posible_duplicado_de (409 con DUPLICATE_FACE_MODE=reject).
     """
     if not foto.content_type or not foto.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="El archivo debe ser una imagen (JPEG, PNG, etc.)")
@@ -142,13 +154,14 @@ def registrar_persona(
 
     tipo = (tipo or TIPO_EMPLEADO).strip()
     calidad_resp: float | None = None
+    duplicado: tuple[int, float] | None = None
     if tipo == TIPO_VISITANTE:
         if not (empresa or "").strip():
             raise HTTPException(status_code=400, detail="Para visitante se requiere empresa.")
         if not (motivo_visita or "").strip():
             raise HTTPException(status_code=400, detail="Para visitante se requiere motivo_visita.")
         try:
-            persona, reco, _ = registrar_visitante(
+            persona, reco, calidad_resp, duplicado = registrar_visitante(
                 db,
                 nombre_completo=nombre_completo,
                 documento=documento,
@@ -162,7 +175,7 @@ def registrar_persona(
             _map_registro_errors(e)
     else:
         try:
-            persona, reco, calidad_resp = registrar_empleado(
+            persona, reco, calidad_resp, duplicado = registrar_empleado(
                 db,
                 nombre_completo=nombre_completo,
                 documento=documento,
@@ -180,6 +193,8 @@ def registrar_persona(
         documento=persona.documento,
         estado=persona.estado,
         calidad_embedding=calidad_resp,
+        posible_duplicado_de=duplicado[0] if duplicado else None,
+        similitud_duplicado=duplicado[1] if duplicado else None,
     )
 
 
@@ -208,8 +223,12 @@ def actualizar_persona(
         persona.telefono = body.telefono.strip() if body.telefono else None
     if body.email is not None:
         persona.email = body.email.strip() if body.email else None
+    estado_cambia = body.estado is not None and body.estado != persona.estado
     if body.estado is not None:
         persona.estado = body.estado
+    if estado_cambia:
+        # La galería en memoria (de todos los workers) solo incluye personas activas
+        registrar_cambio(db, TIPO_PERSONA, persona.id_persona)
     db.commit()
     db.refresh(persona)
     return PersonaRegistroResponse(
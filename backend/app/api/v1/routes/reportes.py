@@ -6,10 +6,12 @@ from fastapi import APIRouter, Depends, Query
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
-from backend.app.db.database import get_db
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.db.database import get_db_lectura
 from backend.app.db.models import RegistroAcceso, Persona
+from backend.app.services.archivo_service import consultar_eventos
 
-router = APIRouter()
+router = APIRouter(route_class=RutaPerfilable)
 
 MAX_REPORT_ROWS = 2000
 
@@ -26,7 +28,7 @@ def _query_eventos_reporte(
     """Query de eventos para reporte (misma lógica que events._query_eventos)."""
     q = (
         db.query(RegistroAcceso)
-        .join(Persona, RegistroAcceso.id_persona == Persona.id_persona)
+        .outerjoin(Persona, RegistroAcceso.id_persona == Persona.id_persona)
         .order_by(RegistroAcceso.fecha_hora.desc())
     )
     if tipo in ("ingreso", "entrada"):
@@ -64,15 +66,14 @@ def reporte_accesos(
     persona_id: int | None = Query(None),
     documento: str | None = Query(None),
     resultado: str | None = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
 ):
     """
     Genera reporte de accesos en CSV o PDF. HU-12.
     Requiere al menos fecha_desde o fecha_hasta (recomendado ambos).
-    Máximo 2000 filas en el detalle.
+    Máximo 2000 filas en el detalle. Incluye particiones archivadas cuando el rango de fechas las alcanza.
     """
-    q = _query_eventos_reporte(
-        db,
+    filtros = dict(
         fecha_desde=fecha_desde,
         fecha_hasta=fecha_hasta,
         tipo=tipo,
@@ -80,7 +81,8 @@ def reporte_accesos(
         documento=documento,
         resultado=resultado,
     )
-    rows = q.limit(MAX_REPORT_ROWS).all()
+    q = _query_eventos_reporte(db, **filtros)
+    rows = consultar_eventos(db, q, limit=MAX_REPORT_ROWS, **filtros)
 
     desde_str = (fecha_desde or "")[:10] or "inicio"
     hasta_str = (fecha_hasta or "")[:10] or "fin"
@@ -98,7 +100,7 @@ def reporte_accesos(
         total_all = len(rows)
         permitidos = sum(1 for r in rows if r.resultado == "permitido")
         denegados = sum(1 for r in rows if r.resultado == "denegado")
-        personas_unicas = len({r.id_persona for r in rows})
+        personas_unicas = len({r.id_persona for r in rows if r.id_persona is not None})
 
         pdf = FPDF()
         pdf.add_page()
@@ -139,12 +141,12 @@ def reporte_accesos(
         )
 
     # CSV
-    lines = ["id_registro;id_persona;nombre_completo;tipo_movimiento;fecha_hora;resultado;metodo_identificacion"]
+    lines = ["id_registro;id_persona;nombre_completo;tipo_movimiento;fecha_hora;resultado;metodo_identificacion;motivo_denegacion"]
     for r in rows:
         nombre = (r.persona.nombre_completo if r.persona else "") or ""
         nombre = nombre.replace(";", ",")
         lines.append(
-            f"{r.id_registro};{r.id_persona};{nombre};{r.tipo_movimiento};{r.fecha_hora.isoformat() if r.fecha_hora else ''};{r.resultado};{r.metodo_identificacion}"
+            f"{r.id_registro};{r.id_persona or ''};{nombre};{r.tipo_movimiento};{r.fecha_hora.isoformat() if r.fecha_hora else ''};{r.resultado};{r.metodo_identificacion};{r.motivo_denegacion or ''}"
         )
     return Response(
         content="\n".join(lines),
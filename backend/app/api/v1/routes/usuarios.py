@@ -3,14 +3,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from backend.app.db.database import get_db
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.db.database import SessionLocal, get_db
 from backend.app.db.models import UsuarioSistema
-from backend.app.core.security import verify_password, create_access_token
-from backend.app.api.dependencies import get_current_user, require_admin
+from backend.app.core.security import create_access_token, pool_hash_login, PoolHashSaturadoError
+from backend.app.api.dependencies import UsuarioActual, get_current_user, require_admin
 from backend.app.schemas.usuario import UsuarioCreate, UsuarioResponse, UsuarioUpdateEstado
-from backend.app.services.usuario_service import crear_usuario as svc_crear_usuario
+from backend.app.services.usuario_service import crear_usuario as svc_crear_usuario, autenticar
+from backend.app.services.cambios_service import TIPO_USUARIO, registrar_cambio
 
-router = APIRouter()
+router = APIRouter(route_class=RutaPerfilable)
 
 
 class LoginRequest(BaseModel):
@@ -23,22 +25,48 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
 
 
+def _autenticar_nueva_sesion(nombre_usuario: str, password: str) -> int | None:
+    """Trabajo del pool de hashing: sesión propia (puede hacer commit del rehash) y devuelve el id del usuario."""
+    db = SessionLocal()
+    try:
+        user = autenticar(db, nombre_usuario, password)
+        return user.id_usuario if user is not None else None
+    finally:
+        db.close()
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(body: LoginRequest, db: Session = Depends(get_db)):
-    """Login: usuario y contraseña → JWT."""
-    user = db.query(UsuarioSistema).filter(UsuarioSistema.nombre_usuario == body.username).first()
-    if not user or user.estado != "activo":
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario o contraseña incorrectos")
-    if not verify_password(body.password, user.hash_password):
+async def login(body: LoginRequest):
+    """
+    Login: usuario y contraseña → JWT.
+    bcrypt corre en un pool dedicado y acotado (no compite con la validación de acceso);
+    si está saturado responde 503 con Retry-After. El trabajo abre y cierra su propia sesión:
+    si la petición se cancela sigue en el pool sin compartir una sesión que la ruta ya cerró.
+    """
+    try:
+        id_usuario = await pool_hash_login.ejecutar(_autenticar_nueva_sesion, body.username, body.password)
+    except PoolHashSaturadoError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiados inicios de sesión simultáneos; reintente en unos segundos.",
+            headers={"Retry-After": "1"},
+        )
+    if id_usuario is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario o contraseña incorrectos")
-    token = create_access_token(subject=user.id_usuario)
+    token = create_access_token(subject=id_usuario)
     return TokenResponse(access_token=token)
 
 
+@router.get("/login/estadisticas")
+def estadisticas_login(_user: UsuarioActual = Depends(require_admin)):
+    """Métricas del pool de hashing del login: ejecutados, rechazados, pendientes y tiempo en cola (s). Solo admin."""
+    return pool_hash_login.estadisticas()
+
+
 @router.get("/", response_model=list[UsuarioResponse])
 def listar_usuarios(
     db: Session = Depends(get_db),
-    _user: UsuarioSistema = Depends(get_current_user),
+    _user: UsuarioActual = Depends(get_current_user),
 ):
     """Listar usuarios del sistema (requiere autenticación)."""
     users = db.query(UsuarioSistema).order_by(UsuarioSistema.nombre_usuario).all()
@@ -49,7 +77,7 @@ def listar_usuarios(
 def crear_usuario(
     body: UsuarioCreate,
     db: Session = Depends(get_db),
-    _user: UsuarioSistema = Depends(require_admin),
+    _user: UsuarioActual = Depends(require_admin),
 ):
     """Crear usuario (solo admin). nombre_usuario único; rol: admin, rrhh, recepcion, seguridad."""
     try:
@@ -76,15 +104,17 @@ def actualizar_estado_usuario(
     usuario_id: int,
     body: UsuarioUpdateEstado,
     db: Session = Depends(get_db),
-    _user: UsuarioSistema = Depends(require_admin),
+    _user: UsuarioActual = Depends(require_admin),
 ):
-    """Activar o desactivar usuario (solo admin). estado: activo | inactivo."""
+    """Activar o desactivar usuario (solo admin). estado: activo | inactivo. La desactivación aplica de inmediato."""
     if body.estado not in ("activo", "inactivo"):
         raise HTTPException(status_code=400, detail="estado debe ser 'activo' o 'inactivo'.")
     user = db.query(UsuarioSistema).filter(UsuarioSistema.id_usuario == usuario_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado.")
     user.estado = body.estado
+    # Caché de usuarios de todos los workers
+    registrar_cambio(db, TIPO_USUARIO, user.id_usuario)
     db.commit()
     db.refresh(user)
     return UsuarioResponse.model_validate(user)
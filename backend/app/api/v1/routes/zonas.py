@@ -0,0 +1,95 @@
+"""Rutas zonas de acceso: alta, listado y asignación de personas (galería por zona en HU-05)."""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.app.core.profiling import RutaPerfilable
+from backend.app.db.database import get_db
+from backend.app.schemas.persona import PersonaListItem
+from backend.app.schemas.zona import ZonaCreate, ZonaResponse, ZonaUpdate
+from backend.app.services import zona_service
+
+router = APIRouter(route_class=RutaPerfilable)
+
+
+def _map_zona_errors(e: ValueError) -> None:
+    msg = str(e)
+    if msg == "zona_no_encontrada":
+        raise HTTPException(status_code=404, detail="Zona no encontrada.")
+    if msg == "persona_no_encontrada":
+        raise HTTPException(status_code=404, detail="Persona no encontrada.")
+    if msg == "persona_no_asignada":
+        raise HTTPException(status_code=404, detail="La persona no está asignada a la zona.")
+    if msg == "zona_duplicada":
+        raise HTTPException(status_code=409, detail="Ya existe una zona con ese nombre.")
+    if msg == "nombre_requerido":
+        raise HTTPException(status_code=400, detail="Se requiere el nombre de la zona.")
+    raise HTTPException(status_code=400, detail=msg)
+
+
+def _zona_to_response(zona, total_personas: int) -> ZonaResponse:
+    return ZonaResponse(
+        id_zona=zona.id_zona,
+        nombre=zona.nombre,
+        descripcion=zona.descripcion,
+        estado=zona.estado,
+        total_personas=total_personas,
+    )
+
+
+@router.get("/", response_model=list[ZonaResponse])
+def listar_zonas(db: Session = Depends(get_db)):
+    """Lista zonas con su número de personas asignadas."""
+    return [_zona_to_response(z, total) for z, total in zona_service.listar_zonas(db)]
+
+
+@router.post("/", response_model=ZonaResponse)
+def crear_zona(body: ZonaCreate, db: Session = Depends(get_db)):
+    """Crea una zona activa. Nombre único (409)."""
+    try:
+        zona = zona_service.crear_zona(db, body.nombre, body.descripcion)
+    except ValueError as e:
+        _map_zona_errors(e)
+    return _zona_to_response(zona, 0)
+
+
+@router.patch("/{zona_id:int}", response_model=ZonaResponse)
+def actualizar_zona(zona_id: int, body: ZonaUpdate, db: Session = Depends(get_db)):
+    """Actualiza nombre, descripción o estado. Una zona inactiva rechaza las validaciones de sus puertas (404)."""
+    try:
+        zona = zona_service.actualizar_zona(
+            db, zona_id, nombre=body.nombre, descripcion=body.descripcion, estado=body.estado
+        )
+    except ValueError as e:
+        _map_zona_errors(e)
+    return _zona_to_response(zona, len(zona.personas))
+
+
+@router.get("/{zona_id:int}/personas", response_model=list[PersonaListItem])
+def listar_personas_zona(zona_id: int, db: Session = Depends(get_db)):
+    """Personas asignadas a la zona, ordenadas por nombre."""
+    try:
+        personas = zona_service.personas_de_zona(db, zona_id)
+    except ValueError as e:
+        _map_zona_errors(e)
+    return [
+        PersonaListItem(id_persona=p.id_persona, nombre_completo=p.nombre_completo, documento=p.documento, estado=p.estado)
+        for p in personas
+    ]
+
+
+@router.post("/{zona_id:int}/personas/{persona_id:int}", status_code=204)
+def asignar_persona(zona_id: int, persona_id: int, db: Session = Depends(get_db)):
+    """Asigna la persona a la zona (idempotente)."""
+    try:
+        zona_service.asignar_persona(db, zona_id, persona_id)
+    except ValueError as e:
+        _map_zona_errors(e)
+
+
+@router.delete("/{zona_id:int}/personas/{persona_id:int}", status_code=204)
+def quitar_persona(zona_id: int, persona_id: int, db: Session = Depends(get_db)):
+    """Quita la persona de la zona."""
+    try:
+        zona_service.quitar_persona(db, zona_id, persona_id)
+    except ValueError as e:
+        _map_zona_errors(e)
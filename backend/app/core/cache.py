@@ -0,0 +1,52 @@
+"""
+Caché en memoria con expiración (TTL) y tamaño máximo, segura entre hilos.
+Usada para tokens verificados y usuarios autenticados (api/dependencies.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CacheTTL:
+    def __init__(self, ttl_seconds: float, maxsize: int = 10_000):
+        self.ttl = ttl_seconds
+        self.maxsize = maxsize
+        self._datos: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Valor vigente o None si no existe o expiró."""
+        entrada = self._datos.get(key)
+        if entrada is None:
+            return None
+        expira, valor = entrada
+        if expira < time.monotonic():
+            self.pop(key)
+            return None
+        return valor
+
+    def set(self, key: Hashable, valor: Any, ttl_seconds: float | None = None) -> None:
+        """Guarda valor; ttl_seconds (opcional) acota el TTL por defecto. Descarta lo más antiguo si está lleno."""
+        ttl = self.ttl if ttl_seconds is None else min(self.ttl, ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._datos[key] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._datos.pop(key, None)
+
+    def pop_si(self, predicado: Callable[[Hashable], bool]) -> None:
+        """Descarta las claves que cumplen predicado (recorre toda la caché: para invalidaciones ocasionales)."""
+        with self._lock:
+            for key in [k for k in self._datos if predicado(k)]:
+                del self._datos[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
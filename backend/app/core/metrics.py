@@ -0,0 +1,190 @@
+"""
+Métricas de rendimiento en formato de texto de Prometheus (GET /metrics).
+- Etapas del reconocimiento (validación de acceso y enrolamiento): `with etapa("matching"):`.
+- Sentencias SQL: cantidad y duración por engine (escritura/lectura) y operación (eventos de SQLAlchemy).
+- Latencia de las rutas HTTP por método, plantilla de ruta y código (middleware ASGI).
+- Medidores leídos al exponer (pool de login, prefiltro de vivacidad, escritor de eventos).
+Con METRICS_ENABLED=false `etapa` devuelve un contexto vacío, no se instalan eventos ni middleware
+y /metrics responde 404: el costo en la ruta crítica es una llamada a función.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable
+
+from backend.app.core.config import METRICS_ENABLED
+
+# Límites superiores (segundos) de los histogramas: de 0,5 ms a 10 s
+BUCKETS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NULO = nullcontext()
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: tuple[str, ...], valores: tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas (una serie por combinación de valores)."""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = (), buckets: tuple[float, ...] = BUCKETS_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *etiquetas: str) -> None:
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        for valores, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite == float("inf") else f'le="{limite:g}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma:.6f}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}")
+        return lineas
+
+
+class Registro:
+    """Histogramas y medidores (funciones que retornan {clave: valor} al exponer)."""
+
+    def __init__(self):
+        self.histogramas: list[Histograma] = []
+        self.medidores: list[tuple[str, str, Callable[[], dict[str, float]]]] = []
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> Histograma:
+        h = Histograma(nombre, ayuda, etiquetas)
+        self.histogramas.append(h)
+        return h
+
+    def registrar_medidor(self, nombre: str, ayuda: str, leer: Callable[[], dict[str, float]]) -> None:
+        self.medidores.append((nombre, ayuda, leer))
+
+    def exponer(self) -> str:
+        lineas = []
+        for h in self.histogramas:
+            lineas.extend(h.exponer())
+        for nombre, ayuda, leer in self.medidores:
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+            for clave, valor in leer().items():
+                lineas.append(f"{nombre}{_etiquetas(('clave',), (clave,))} {float(valor):g}")
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+etapas = registro.histograma("sca_etapa_segundos", "Duración de cada etapa del reconocimiento facial.", ("etapa",))
+sql = registro.histograma("sca_sql_segundos", "Duración de las sentencias SQL por engine y operación.", ("engine", "operacion"))
+http = registro.histograma("sca_http_segundos", "Latencia de las peticiones HTTP por ruta.", ("metodo", "ruta", "estado"))
+
+
+class _Cronometro:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        etapas.observar(time.perf_counter() - self.inicio, self.nombre)
+        return False
+
+
+def etapa(nombre: str):
+    """Context manager que mide una etapa (reloj monótono). Sin efecto si METRICS_ENABLED=false."""
+    return _Cronometro(nombre) if METRICS_ENABLED else _NULO
+
+
+def instrumentar_sql(engine, nombre: str = "escritura") -> None:
+    """
+    Cuenta y mide las sentencias SQL del engine (SELECT, INSERT, UPDATE, DELETE, otra). `nombre` es la
+    etiqueta engine de la serie: escritura o lectura (réplica o pool de solo lectura).
+    """
+    if not METRICS_ENABLED:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sca_inicio_sql", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["sca_inicio_sql"].pop()
+        operacion = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if operacion not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+            operacion = "OTRA"
+        sql.observar(time.perf_counter() - inicio, nombre, operacion)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        pila = contexto.connection.info.get("sca_inicio_sql") if contexto.connection is not None else None
+        if pila:
+            pila.pop()
+
+
+def plantilla_ruta(scope) -> str:
+    """
+    Plantilla de la ruta atendida (p. ej. /api/v1/zonas/{zona_id:int}/personas), sin valores de parámetros
+    para acotar las series. Según la versión de FastAPI la ruta de un router incluido guarda la plantilla
+    completa o solo la relativa al prefijo; en ese caso el prefijo se toma de la ruta pedida.
+    """
+    ruta = scope.get("route")
+    plantilla = getattr(ruta, "path", None)
+    if not plantilla:
+        return "sin_ruta"
+    regex = getattr(ruta, "path_regex", None)
+    path = scope.get("path", "")
+    if regex is None or regex.match(path):
+        return plantilla
+    for i, caracter in enumerate(path):
+        if caracter == "/" and regex.match(path[i:]):
+            return path[:i] + plantilla
+    return plantilla
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latencia por método, plantilla de ruta (p. ej. /api/v1/zonas/{id_zona}) y código."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            http.observar(time.perf_counter() - inicio, scope["method"], plantilla_ruta(scope), str(estado[0]))
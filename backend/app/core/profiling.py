@@ -0,0 +1,241 @@
+"""
+Perfilado por muestreo de peticiones lentas (opt-in con PROFILING_ENABLED).
+Un hilo muestreador toma cada PROFILING_INTERVAL_MS la pila de los hilos que atienden peticiones
+que ya superaron PROFILING_BUDGET_MS, o desde el inicio las que traen la cabecera X-Debug-Profile con
+PROFILING_TOKEN. Las peticiones rápidas no se muestrean: el costo es registrar inicio y fin.
+Al terminar una petición muestreada se escribe un perfil .json.gz en PROFILING_DIR (pilas colapsadas
+"marco;marco;... -> muestras", compatibles con flamegraph/speedscope, más ruta, método, código y
+tiempos); se conservan los últimos PROFILING_MAX_FILES. Ver scripts/ver_perfil.py.
+
+Las rutas síncronas corren en el threadpool: RutaPerfilable anota en la petición el hilo que ejecuta
+el endpoint (la petición viaja en un ContextVar, que se copia al hilo del threadpool).
+"""
+import contextvars
+import functools
+import gzip
+import inspect
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+
+from backend.app.core.config import (
+    PROFILING_BUDGET_MS,
+    PROFILING_DIR,
+    PROFILING_ENABLED,
+    PROFILING_INTERVAL_MS,
+    PROFILING_MAX_FILES,
+    PROFILING_TOKEN,
+)
+from backend.app.core.metrics import plantilla_ruta
+
+logger = logging.getLogger(__name__)
+
+CABECERA = b"x-debug-profile"
+# Profundidad máxima de pila por muestra
+MAX_MARCOS = 128
+
+
+class PeticionPerfilada:
+    """Estado de una petición en curso: hilos que la atienden y pilas muestreadas."""
+
+    __slots__ = ("metodo", "path", "fecha", "inicio", "forzada", "hilo_bucle", "hilos", "lock", "pilas", "muestras")
+
+    def __init__(self, metodo: str, path: str, forzada: bool):
+        self.metodo = metodo
+        self.path = path
+        self.fecha = time.time()
+        self.inicio = time.perf_counter()
+        self.forzada = forzada
+        self.hilo_bucle = threading.get_ident()
+        # hilos cambia en los hilos de la petición mientras el muestreador lo lee: siempre bajo lock
+        self.hilos: set[int] = set()
+        self.lock = threading.Lock()
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+
+
+_peticion: contextvars.ContextVar[PeticionPerfilada | None] = contextvars.ContextVar("peticion_perfilada", default=None)
+
+
+def _marco(frame) -> str:
+    codigo = frame.f_code
+    archivo = "/".join(Path(codigo.co_filename).parts[-2:])
+    return f"{codigo.co_qualname} ({archivo}:{codigo.co_firstlineno})"
+
+
+def pila_colapsada(frame) -> str:
+    """Pila de raíz a hoja separada por ';' (formato colapsado de flamegraph)."""
+    marcos = []
+    while frame is not None and len(marcos) < MAX_MARCOS:
+        marcos.append(_marco(frame))
+        frame = frame.f_back
+    return ";".join(reversed(marcos))
+
+
+class Perfilador:
+    """Registro de peticiones en curso, hilo muestreador y escritura rotativa de perfiles."""
+
+    def __init__(
+        self,
+        directorio: str | Path = PROFILING_DIR,
+        presupuesto_ms: float = PROFILING_BUDGET_MS,
+        intervalo_ms: float = PROFILING_INTERVAL_MS,
+        max_archivos: int = PROFILING_MAX_FILES,
+    ):
+        self.directorio = Path(directorio)
+        self.presupuesto = presupuesto_ms / 1000.0
+        self.intervalo = max(intervalo_ms, 1.0) / 1000.0
+        self.max_archivos = max_archivos
+        self._activas: set[PeticionPerfilada] = set()
+        self._terminadas: list[tuple[PeticionPerfilada, dict]] = []
+        self._lock = threading.Lock()
+        self._hilo: threading.Thread | None = None
+        self.perfiles_escritos = 0
+
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._run, name="perfilador", daemon=True)
+            self._hilo.start()
+
+    def iniciar(self, metodo: str, path: str, forzada: bool) -> PeticionPerfilada:
+        peticion = PeticionPerfilada(metodo, path, forzada)
+        with self._lock:
+            self._activas.add(peticion)
+            self._asegurar_hilo()
+        return peticion
+
+    def terminar(self, peticion: PeticionPerfilada, ruta: str, estado: int) -> None:
+        duracion = time.perf_counter() - peticion.inicio
+        with self._lock:
+            self._activas.discard(peticion)
+            if peticion.muestras:
+                self._terminadas.append((peticion, {"ruta": ruta, "estado": estado, "duracion_ms": round(duracion * 1000, 2)}))
+
+    def muestrear(self) -> None:
+        """Toma una muestra de cada petición vencida (o forzada) en curso."""
+        ahora = time.perf_counter()
+        with self._lock:
+            vencidas = [p for p in self._activas if p.forzada or ahora - p.inicio >= self.presupuesto]
+        if not vencidas:
+            return
+        marcos = sys._current_frames()
+        for peticion in vencidas:
+            # Endpoint síncrono: su hilo del threadpool; endpoint async: el hilo del bucle de eventos
+            with peticion.lock:
+                hilos = list(peticion.hilos) or [peticion.hilo_bucle]
+            for hilo in hilos:
+                frame = marcos.get(hilo)
+                if frame is not None:
+                    peticion.pilas[pila_colapsada(frame)] += 1
+            peticion.muestras += 1
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.intervalo)
+            # Un error no debe detener el hilo: el perfilado quedaría apagado sin aviso
+            try:
+                self.muestrear()
+                with self._lock:
+                    terminadas, self._terminadas = self._terminadas, []
+                for peticion, datos in terminadas:
+                    try:
+                        self.escribir(peticion, datos)
+                    except OSError as e:
+                        logger.warning("No se pudo escribir el perfil de %s %s: %s", peticion.metodo, peticion.path, e)
+            except Exception:
+                logger.exception("Error en el hilo perfilador")
+
+    def escribir(self, peticion: PeticionPerfilada, datos: dict) -> Path:
+        """Guarda el perfil comprimido y borra los más antiguos por encima de max_archivos."""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        inicio = datetime.fromtimestamp(peticion.fecha)
+        nombre_ruta = re.sub(r"[^A-Za-z0-9]+", "_", datos["ruta"]).strip("_") or "raiz"
+        path = self.directorio / f"perfil-{inicio:%Y%m%d-%H%M%S-%f}-{peticion.metodo}-{nombre_ruta}-{int(datos['duracion_ms'])}ms.json.gz"
+        perfil = {
+            "metodo": peticion.metodo,
+            "path": peticion.path,
+            **datos,
+            "fecha": inicio.isoformat(timespec="milliseconds"),
+            "forzado": peticion.forzada,
+            "presupuesto_ms": self.presupuesto * 1000,
+            "intervalo_ms": self.intervalo * 1000,
+            "muestras": peticion.muestras,
+            "pilas": dict(peticion.pilas.most_common()),
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(perfil, f)
+        self.perfiles_escritos += 1
+        perfiles = sorted(self.directorio.glob("perfil-*.json.gz"))
+        for viejo in perfiles[: max(len(perfiles) - self.max_archivos, 0)]:
+            viejo.unlink(missing_ok=True)
+        return path
+
+
+perfilador = Perfilador()
+
+
+class MiddlewarePerfilado:
+    """Middleware ASGI: registra cada petición HTTP en el perfilador y escribe su perfil si fue muestreada."""
+
+    def __init__(self, app, perfilador: Perfilador = perfilador, token: str = PROFILING_TOKEN):
+        self.app = app
+        self.perfilador = perfilador
+        self.token = token.encode()
+
+    async def __call__(self, scope, receive, send):
+        # Los flujos SSE del dashboard duran lo que dure la conexión: no son peticiones lentas
+        if scope["type"] != "http" or any(k == b"accept" and b"text/event-stream" in v for k, v in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        forzada = bool(self.token) and any(k == CABECERA and v == self.token for k, v in scope["headers"])
+        peticion = self.perfilador.iniciar(scope["method"], scope["path"], forzada)
+        marca = _peticion.set(peticion)
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _peticion.reset(marca)
+            self.perfilador.terminar(peticion, plantilla_ruta(scope), estado[0])
+
+
+def _anotar_hilo(endpoint):
+    """Envuelve un endpoint síncrono para que la petición en curso conozca el hilo que lo ejecuta."""
+
+    @functools.wraps(endpoint)
+    def envoltura(*args, **kwargs):
+        peticion = _peticion.get()
+        if peticion is None:
+            return endpoint(*args, **kwargs)
+        hilo = threading.get_ident()
+        with peticion.lock:
+            peticion.hilos.add(hilo)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            with peticion.lock:
+                peticion.hilos.discard(hilo)
+
+    return envoltura
+
+
+class RutaPerfilable(APIRoute):
+    """APIRoute que, con PROFILING_ENABLED, anota el hilo del threadpool de los endpoints síncronos."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if PROFILING_ENABLED and not inspect.iscoroutinefunction(endpoint):
+            endpoint = _anotar_hilo(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -1,23 +1,122 @@
 """
 Seguridad: hash de contraseñas (bcrypt) y JWT.
+El hashing del login corre en un pool propio y acotado para no ocupar el threadpool de las rutas.
 """
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 import bcrypt
 from jose import JWTError, jwt
 
-from backend.app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.app.core.cache import CacheTTL
+from backend.app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    AUTH_CACHE_TTL_SECONDS,
+    BCRYPT_ROUNDS,
+    LOGIN_HASH_WORKERS,
+    LOGIN_HASH_MAX_PENDING,
+)
+
+T = TypeVar("T")
+
+# Tokens ya verificados (firma + exp) → payload. El TTL nunca supera la expiración del token.
+_token_cache = CacheTTL(AUTH_CACHE_TTL_SECONDS)
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True si el hash bcrypt ($2b$<costo>$...) no usa el costo configurado en BCRYPT_ROUNDS."""
+    partes = hashed_password.split("$")
+    try:
+        return int(partes[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PoolHashSaturadoError(Exception):
+    """El pool de hashing del login tiene LOGIN_HASH_MAX_PENDING trabajos pendientes."""
+
+
+class PoolHash:
+    """
+    Ejecutor dedicado para trabajo bcrypt del login: `workers` hilos y como máximo `max_pendientes`
+    trabajos en curso o en cola (el resto se rechaza al instante). Registra el tiempo en cola.
+    El cupo se libera al terminar el trabajo (o al cancelarlo antes de empezar), no cuando deja de
+    esperarlo la corrutina: una petición cancelada no libera un cupo cuyo bcrypt sigue en marcha.
+    """
+
+    def __init__(self, workers: int, max_pendientes: int, muestras: int = 1000):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login-hash")
+        self._cupos = threading.BoundedSemaphore(max_pendientes)
+        # Los contadores se tocan desde el loop y desde los hilos del pool (al terminar cada trabajo)
+        self._lock = threading.Lock()
+        self._esperas: deque[float] = deque(maxlen=muestras)
+        self.ejecutados = 0
+        self.rechazados = 0
+        self.pendientes = 0
+
+    async def ejecutar(self, fn: Callable[..., T], *args) -> T:
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self.rechazados += 1
+            raise PoolHashSaturadoError()
+        with self._lock:
+            self.pendientes += 1
+        encolado = time.monotonic()
+
+        def trabajo():
+            self._esperas.append(time.monotonic() - encolado)
+            return fn(*args)
+
+        def liberar(futuro: Future | None = None) -> None:
+            with self._lock:
+                self.pendientes -= 1
+                if futuro is not None and not futuro.cancelled():
+                    self.ejecutados += 1
+            self._cupos.release()
+
+        try:
+            futuro = self._executor.submit(trabajo)
+        except BaseException:
+            liberar()
+            raise
+        futuro.add_done_callback(liberar)
+        return await asyncio.wrap_future(futuro)
+
+    def estadisticas(self) -> dict[str, float]:
+        """Contadores y percentiles del tiempo en cola (segundos) de las últimas muestras."""
+        esperas = sorted(self._esperas)
+
+        def percentil(p: float) -> float:
+            return esperas[min(len(esperas) - 1, int(p * len(esperas)))] if esperas else 0.0
+
+        return {
+            "ejecutados": self.ejecutados,
+            "rechazados": self.rechazados,
+            "pendientes": self.pendientes,
+            "espera_p50": percentil(0.50),
+            "espera_p95": percentil(0.95),
+            "espera_max": esperas[-1] if esperas else 0.0,
+        }
+
+
+pool_hash_login = PoolHash(LOGIN_HASH_WORKERS, LOGIN_HASH_MAX_PENDING)
+
+
 def create_access_token(subject: str | int, extra: dict[str, Any] | None = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": str(subject), "exp": expire}
@@ -27,7 +126,14 @@ def create_access_token(subject: str | int, extra: dict[str, Any] | None = None)
 
 
 def decode_access_token(token: str) -> dict | None:
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _token_cache.set(token, payload, ttl_seconds=exp - time.time())
+    return payload
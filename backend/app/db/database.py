@@ -1,21 +1,108 @@
 """
-Conexión y sesión SQLite. Referencia: docs/05-modelo-datos.md.
+Conexión y sesión: SQLite (un solo host) o PostgreSQL (varios nodos de API sobre la misma BD).
+Dos engines: el de escritura (get_db) y el de lectura (get_db_lectura) para reportes, exportación y
+dashboard, con su propio pool, para que esas consultas no compitan con el registro de eventos.
+Referencia: docs/05-modelo-datos.md.
 """
-from sqlalchemy import create_engine, text
+import logging
+from pathlib import Path
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from backend.app.core.config import DATABASE_URL
+from backend.app.core.config import (
+    DATABASE_URL,
+    DB_AUTO_MIGRATE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+    READ_DATABASE_URL,
+    SQLITE_WAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _archivo_sqlite(url: str) -> str | None:
+    """Ruta del archivo de una URL SQLite; None si la BD es en memoria."""
+    archivo = make_url(url).database
+    return None if not archivo or archivo == ":memory:" or archivo.startswith("file:") else archivo
+
+
+def crear_engine(
+    url: str = DATABASE_URL,
+    statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+    solo_lectura: bool = False,
+    connect_args: dict | None = None,
+) -> Engine:
+    """
+    SQLite: check_same_thread=False para uso con FastAPI (múltiples requests); con SQLITE_WAL el archivo
+    pasa a modo WAL (las lecturas no bloquean al escritor). solo_lectura abre el archivo con mode=ro.
+    PostgreSQL: pool de DB_POOL_SIZE (+ DB_MAX_OVERFLOW) conexiones verificadas antes de usarse
+    (pre-ping: tras un reinicio o failover del servidor), recicladas cada DB_POOL_RECYCLE_SECONDS y
+    con statement_timeout (0 = sin límite, p. ej. migraciones); solo_lectura fija
+    default_transaction_read_only. postgresql:// usa psycopg 3 (extra "postgres").
+    connect_args: argumentos adicionales del driver (p. ej. la fábrica de conexiones de la prueba de carga).
+    """
+    connect_args = dict(connect_args or {})
+    if url.startswith("sqlite"):
+        archivo = _archivo_sqlite(url)
+        if solo_lectura and archivo:
+            url = f"sqlite:///file:{quote(str(Path(archivo).resolve()))}?mode=ro&uri=true"
+        engine = create_engine(url, connect_args={"check_same_thread": False, **connect_args})
+        if SQLITE_WAL and archivo and not solo_lectura:
+            event.listen(engine, "connect", _activar_wal)
+        return engine
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg://" + url[len("postgresql://"):]
+    if url.startswith("postgresql"):
+        opciones = f"-c statement_timeout={statement_timeout_ms}"
+        if solo_lectura:
+            opciones += " -c default_transaction_read_only=on"
+        connect_args["options"] = opciones
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+    )
+
+
+def _activar_wal(dbapi_conn, _registro) -> None:
+    # Persistente en el archivo: la primera conexión lo cambia, las demás lo confirman
+    dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+
+def _crear_engine_lectura() -> Engine:
+    """
+    READ_DATABASE_URL (réplica) si está definida. Si no: SQLite abre el mismo archivo en solo lectura
+    (en memoria no hay archivo que compartir: se usa el engine de escritura) y PostgreSQL la misma BD
+    con un pool aparte.
+    """
+    if READ_DATABASE_URL:
+        return crear_engine(READ_DATABASE_URL, solo_lectura=True)
+    if DATABASE_URL.startswith("sqlite") and not _archivo_sqlite(DATABASE_URL):
+        return engine
+    return crear_engine(DATABASE_URL, solo_lectura=True)
+
 
-# SQLite: check_same_thread=False para uso con FastAPI (múltiples requests)
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+engine = crear_engine(DATABASE_URL)
+engine_lectura = _crear_engine_lectura()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
 Base = declarative_base()
 
 
 def get_db():
-    """Dependencia FastAPI: sesión por request; cierra al terminar."""
+    """Dependencia FastAPI: sesión de escritura por request; cierra al terminar."""
     db = SessionLocal()
     try:
         yield db
@@ -23,68 +110,38 @@ def get_db():
         db.close()
 
 
+def get_db_lectura():
+    """
+    Dependencia FastAPI para rutas que solo consultan (reportes, exportación, dashboard): sesión del
+    engine de lectura. Con una réplica puede ir unos instantes por detrás de get_db.
+    """
+    db = SessionLectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
-    """Crea todas las tablas en la BD (para script init_db)."""
-    from backend.app.db import models  # noqa: F401 - registra modelos
-    Base.metadata.create_all(bind=engine)
+    """Crea o actualiza el esquema aplicando las migraciones pendientes (para script init_db)."""
+    from backend.app.db.migrations import migrar
+    migrar(engine, progreso=print)
 
 
-def ensure_registro_acceso_schema():
-    """
-    En SQLite, si la tabla registro_acceso tiene id_registro como BIGINT
-    no se autoincrementa y falla NOT NULL. Recrea la tabla con INTEGER.
-    Se llama al arranque de la app para auto-corregir BDs antiguas.
-    """
-    if not DATABASE_URL.startswith("sqlite"):
-        return
-    from backend.app.db import models  # noqa: F401
-    from backend.app.db.models import RegistroAcceso
-    needs_fix = False
-    with engine.connect() as conn:
-        try:
-            r = conn.execute(
-                text("SELECT type FROM pragma_table_info('registro_acceso') WHERE name='id_registro'")
-            )
-            row = r.fetchone()
-            if row:
-                col_type = (row[0] or "").upper()
-                needs_fix = "BIGINT" in col_type
-        except Exception:
-            pass  # Tabla no existe, create_all se encargará
-    if needs_fix:
-        RegistroAcceso.__table__.drop(engine, checkfirst=True)
-        RegistroAcceso.__table__.create(engine)
-
-
-def ensure_persona_visitante_columns():
+def ensure_schema_version():
     """
-    Añade columnas HU-03 (motivo_visita, id_empleado_visitado) a persona si no existen.
+    Arranque de la API: compara la versión del esquema con la última migración (una consulta; las
+    migraciones se aplican al desplegar con scripts/migrar.py). Con DB_AUTO_MIGRATE las aplica aquí
+    (un solo proceso, desarrollo); si no, solo avisa de las pendientes.
     """
-    if not DATABASE_URL.startswith("sqlite"):
+    from backend.app.db.migrations import migrar, pendientes
+    faltan = pendientes(engine)
+    if not faltan:
         return
-    with engine.connect() as conn:
-        r = conn.execute(text("SELECT name FROM pragma_table_info('persona')"))
-        names = {row[0] for row in r.fetchall()}
-        if "motivo_visita" not in names:
-            conn.execute(text("ALTER TABLE persona ADD COLUMN motivo_visita VARCHAR(500)"))
-        if "id_empleado_visitado" not in names:
-            conn.execute(text("ALTER TABLE persona ADD COLUMN id_empleado_visitado INTEGER"))
-        conn.commit()
-
-
-def ensure_autorizacion_table():
-    """Crea la tabla autorizacion (HU-04) si no existe; añade motivo_revocacion (HU-13) si falta."""
-    if not DATABASE_URL.startswith("sqlite"):
+    if DB_AUTO_MIGRATE:
+        migrar(engine)
         return
-    from backend.app.db import models  # noqa: F401
-    from backend.app.db.models import Autorizacion
-    with engine.connect() as conn:
-        r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='autorizacion'"))
-        if r.fetchone() is None:
-            Autorizacion.__table__.create(engine)
-        else:
-            r2 = conn.execute(text("SELECT name FROM pragma_table_info('autorizacion')"))
-            names = {row[0] for row in r2.fetchall()}
-            if "motivo_revocacion" not in names:
-                conn.execute(text("ALTER TABLE autorizacion ADD COLUMN motivo_revocacion VARCHAR(500)"))
-        conn.commit()
+    logger.warning(
+        "Esquema de BD desactualizado: migraciones pendientes %s. Ejecute: uv run python scripts/migrar.py",
+        ", ".join(f"{m.VERSION:04d}" for m in faltan),
+    )
@@ -1 +1,91 @@
-# Migraciones
+"""
+Migraciones versionadas del esquema. Cada módulo vNNNN_descripcion.py define VERSION, DESCRIPCION y
+aplicar(engine, progreso). La tabla schema_version guarda las versiones aplicadas.
+
+Se ejecutan una vez por despliegue (scripts/migrar.py; init_db.py las usa para crear la BD); el arranque
+de la API solo compara la versión (ver database.ensure_schema_version). Las migraciones deben ser
+idempotentes: las primeras recogen lo que antes hacían los ensure_* al arrancar, y una BD antigua
+puede tener parte de esos cambios aplicados. Cada migración define las tablas que toca en vez de importar
+backend.app.db.models, para que su efecto no cambie cuando evolucionen los modelos.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_PATRON = re.compile(r"^v(\d{4})_\w+$")
+# Clave del advisory lock de PostgreSQL que serializa migrar() entre nodos
+CLAVE_BLOQUEO = 0x5CA0_E5C1
+
+
+def migraciones() -> list[ModuleType]:
+    """Módulos de migración ordenados por versión."""
+    modulos = []
+    for info in pkgutil.iter_modules(__path__):
+        m = _PATRON.match(info.name)
+        if m:
+            modulo = importlib.import_module(f"{__name__}.{info.name}")
+            if modulo.VERSION != int(m.group(1)):
+                raise RuntimeError(f"Migración {info.name}: VERSION={modulo.VERSION} no coincide con el nombre")
+            modulos.append(modulo)
+    return sorted(modulos, key=lambda m: m.VERSION)
+
+
+def version_objetivo() -> int:
+    return max((m.VERSION for m in migraciones()), default=0)
+
+
+def version_actual(engine: Engine) -> int:
+    """Última versión aplicada (0 si la BD no tiene schema_version)."""
+    from backend.app.db.models import VersionEsquema
+
+    with engine.connect() as conn:
+        if not engine.dialect.has_table(conn, VersionEsquema.__tablename__):
+            return 0
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def pendientes(engine: Engine) -> list[ModuleType]:
+    actual = version_actual(engine)
+    return [m for m in migraciones() if m.VERSION > actual]
+
+
+def migrar(engine: Engine, progreso: Callable[[str], None] | None = None) -> list[int]:
+    """Aplica en orden las migraciones pendientes y registra cada una en schema_version. Retorna las versiones aplicadas."""
+    from backend.app.db.models import VersionEsquema
+
+    avisar = progreso or logger.info
+    aplicadas = []
+    with _bloqueo(engine):
+        VersionEsquema.__table__.create(engine, checkfirst=True)
+        for modulo in pendientes(engine):
+            avisar(f"Migración {modulo.VERSION:04d}: {modulo.DESCRIPCION}")
+            modulo.aplicar(engine, avisar)
+            with engine.begin() as conn:
+                conn.execute(VersionEsquema.__table__.insert().values(version=modulo.VERSION, descripcion=modulo.DESCRIPCION))
+            aplicadas.append(modulo.VERSION)
+    return aplicadas
+
+
+@contextmanager
+def _bloqueo(engine: Engine):
+    """PostgreSQL: advisory lock de sesión para que dos nodos no migren a la vez (el segundo espera y no encuentra pendientes)."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        # Autocommit: la conexión del lock no deja una transacción abierta mientras migran las demás
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": CLAVE_BLOQUEO})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": CLAVE_BLOQUEO})
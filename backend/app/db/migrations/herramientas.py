@@ -0,0 +1,102 @@
+"""
+Utilidades para escribir migraciones: introspección del esquema y reconstrucción de tablas por lotes.
+"""
+import logging
+from typing import Callable
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Filas por transacción al copiar una tabla en reconstruir_tabla
+LOTE_RECONSTRUCCION = 5000
+
+
+def tablas(conn: Connection) -> set[str]:
+    return set(inspect(conn).get_table_names())
+
+
+def columnas(conn: Connection, tabla: str) -> dict[str, dict]:
+    """nombre → columna según inspect().get_columns (type, nullable, ...). Vacío si la tabla no existe."""
+    if tabla not in tablas(conn):
+        return {}
+    return {c["name"]: c for c in inspect(conn).get_columns(tabla)}
+
+
+def agregar_columna(conn: Connection, tabla: str, columna: str, tipo_sql: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN si la tabla existe y no tiene la columna. True si la agregó."""
+    existentes = columnas(conn, tabla)
+    if not existentes or columna in existentes:
+        return False
+    conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo_sql}"))
+    return True
+
+
+def reconstruir_tabla(
+    engine: Engine,
+    tabla: Table,
+    lote: int = LOTE_RECONSTRUCCION,
+    progreso: Callable[[str], None] | None = None,
+) -> int:
+    """
+    Reconstruye una tabla con el DDL del modelo sin perder datos ni bloquear la BD durante la copia:
+    1. crea <tabla>__nueva (sin índices) con el esquema del modelo;
+    2. copia las columnas comunes por rangos de la clave primaria, una transacción por lote, informando el avance;
+    3. en una última transacción copia las filas insertadas entretanto, comprueba el conteo, reemplaza la
+       tabla original y crea los índices del modelo.
+    Si se interrumpe, la tabla original queda intacta y la copia parcial se descarta al reintentar.
+    Pensado para tablas de solo inserción (registro_acceso): no conviene archivar ni borrar durante la copia.
+    Retorna las filas copiadas.
+    """
+    avisar = progreso or logger.info
+    nombre = tabla.name
+    temporal = f"{nombre}__nueva"
+    (pk,) = [c.name for c in tabla.primary_key.columns]
+    # En la misma MetaData para resolver las claves foráneas; se quita al crearla
+    nueva = tabla.to_metadata(tabla.metadata, name=temporal)
+    nueva.indexes.clear()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {temporal}"))
+        try:
+            nueva.create(conn)
+        finally:
+            tabla.metadata.remove(nueva)
+        existentes = columnas(conn, nombre)
+        total = conn.execute(text(f"SELECT COUNT(*) FROM {nombre}")).scalar()
+    lista = ", ".join(c.name for c in tabla.columns if c.name in existentes)
+
+    copiadas = 0
+    ultimo = None
+    while True:
+        desde = "" if ultimo is None else f"WHERE {pk} > :ultimo"
+        with engine.begin() as conn:
+            hasta = conn.execute(
+                text(f"SELECT MAX({pk}) FROM (SELECT {pk} FROM {nombre} {desde} ORDER BY {pk} LIMIT :lote) AS t"),
+                {"ultimo": ultimo, "lote": lote},
+            ).scalar()
+            if hasta is None:
+                break
+            rango = f"{pk} <= :hasta" if ultimo is None else f"{pk} > :ultimo AND {pk} <= :hasta"
+            copiadas += conn.execute(
+                text(f"INSERT INTO {temporal} ({lista}) SELECT {lista} FROM {nombre} WHERE {rango}"),
+                {"ultimo": ultimo, "hasta": hasta},
+            ).rowcount
+        ultimo = hasta
+        avisar(f"{nombre}: {copiadas}/{total} filas copiadas ({copiadas / max(total, 1):.0%})")
+
+    with engine.begin() as conn:
+        resto = "" if ultimo is None else f"WHERE {pk} > :ultimo"
+        copiadas += conn.execute(
+            text(f"INSERT INTO {temporal} ({lista}) SELECT {lista} FROM {nombre} {resto}"), {"ultimo": ultimo}
+        ).rowcount
+        originales = conn.execute(text(f"SELECT COUNT(*) FROM {nombre}")).scalar()
+        if originales != copiadas:
+            # Se deshace la transacción; la tabla original sigue en uso
+            raise RuntimeError(f"Reconstrucción de {nombre}: {copiadas} filas copiadas de {originales}; reintentar")
+        conn.execute(text(f"DROP TABLE {nombre}"))
+        conn.execute(text(f"ALTER TABLE {temporal} RENAME TO {nombre}"))
+        for indice in tabla.indexes:
+            indice.create(conn)
+    avisar(f"{nombre}: reconstruida ({copiadas} filas)")
+    return copiadas
@@ -0,0 +1,142 @@
+"""
+Esquema base (versión 1): las tablas del modelo tal como estaban al introducir las migraciones.
+Definiciones congeladas, sin importar backend.app.db.models: la versión 1 describe siempre el
+mismo esquema y cada cambio posterior va en su propia migración con sus propias definiciones.
+En una BD existente solo crea las tablas que falten; las migraciones 2 a 7 ponen al día las
+columnas e índices de BDs anteriores y en una BD nueva no hacen nada.
+"""
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+)
+
+VERSION = 1
+DESCRIPCION = "Tablas base del modelo"
+
+
+def _esquema() -> MetaData:
+    metadata = MetaData()
+    Table(
+        "tipo_persona",
+        metadata,
+        Column("id_tipo_persona", Integer, primary_key=True, autoincrement=True),
+        Column("nombre_tipo", String(50), unique=True, nullable=False),
+        Column("descripcion", String(200), nullable=True),
+        Column("estado", String(20), nullable=False),
+    )
+    Table(
+        "persona_zona",
+        metadata,
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), primary_key=True),
+        Column("id_zona", Integer, ForeignKey("zona.id_zona"), primary_key=True),
+    )
+    Table(
+        "zona",
+        metadata,
+        Column("id_zona", Integer, primary_key=True, autoincrement=True),
+        Column("nombre", String(100), unique=True, nullable=False),
+        Column("descripcion", String(200), nullable=True),
+        Column("estado", String(20), nullable=False),
+    )
+    Table(
+        "persona",
+        metadata,
+        Column("id_persona", Integer, primary_key=True, autoincrement=True),
+        Column("id_tipo_persona", Integer, ForeignKey("tipo_persona.id_tipo_persona"), nullable=False),
+        Column("nombre_completo", String(200), nullable=False),
+        Column("documento", String(50), unique=True, nullable=False),
+        Column("tipo_documento", String(10), nullable=False),
+        Column("telefono", String(20), nullable=True),
+        Column("email", String(200), nullable=True),
+        Column("empresa", String(200), nullable=True),
+        Column("motivo_visita", String(500), nullable=True),
+        Column("id_empleado_visitado", Integer, ForeignKey("persona.id_persona"), nullable=True),
+        Column("cargo", String(100), nullable=True),
+        Column("area", String(100), nullable=True),
+        Column("estado", String(20), nullable=False),
+        Column("fecha_registro", DateTime, nullable=False),
+        Column("fecha_actualizacion", DateTime, nullable=True),
+        Column("creado_por", Integer, nullable=True),
+        Index("ix_persona_nombre_id", "nombre_completo", "id_persona"),
+    )
+    Table(
+        "reconocimiento_facial",
+        metadata,
+        Column("id_reconocimiento", Integer, primary_key=True, autoincrement=True),
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), nullable=False),
+        Column("embedding", LargeBinary, nullable=False),
+        Column("foto_referencia", String(500), nullable=True),
+        Column("calidad_embedding", Float, nullable=True),
+        Column("modelo_version", String(50), nullable=False),
+        Column("estado", String(20), nullable=False),
+        Column("fecha_creacion", DateTime, nullable=False),
+        Column("fecha_actualizacion", DateTime, nullable=True),
+    )
+    Table(
+        "registro_acceso",
+        metadata,
+        Column("id_registro", Integer, primary_key=True, autoincrement=True),
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), nullable=True),
+        Column("tipo_movimiento", String(20), nullable=False),
+        Column("metodo_identificacion", String(30), nullable=False),
+        Column("fecha_hora", DateTime, nullable=False),
+        Column("resultado", String(20), nullable=False),
+        Column("motivo_denegacion", String(500), nullable=True),
+        Column("similarity_score", Float, nullable=True),
+        Column("observaciones", Text, nullable=True),
+        Index("ix_registro_acceso_fecha", "fecha_hora"),
+        Index("ix_registro_acceso_persona_fecha", "id_persona", "fecha_hora"),
+    )
+    Table(
+        "registro_acceso_archivo",
+        metadata,
+        Column("periodo", String(7), primary_key=True),
+        Column("fecha_min", DateTime, nullable=False),
+        Column("fecha_max", DateTime, nullable=False),
+        Column("total_eventos", Integer, nullable=False),
+        Column("datos", LargeBinary, nullable=False),
+        Column("fecha_archivado", DateTime, nullable=False),
+    )
+    Table(
+        "diario_eventos_checkpoint",
+        metadata,
+        Column("diario", String(100), primary_key=True),
+        Column("ultimo_seq", Integer, nullable=False),
+    )
+    Table(
+        "autorizacion",
+        metadata,
+        Column("id_autorizacion", Integer, primary_key=True, autoincrement=True),
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), nullable=False),
+        Column("fecha_inicio", DateTime, nullable=False),
+        Column("fecha_fin", DateTime, nullable=False),
+        Column("estado", String(20), nullable=False),
+        Column("motivo_revocacion", String(500), nullable=True),
+        Column("fecha_creacion", DateTime, nullable=False),
+    )
+    Table(
+        "usuario_sistema",
+        metadata,
+        Column("id_usuario", Integer, primary_key=True, autoincrement=True),
+        Column("nombre_usuario", String(50), unique=True, nullable=False),
+        Column("hash_password", String(255), nullable=False),
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), nullable=True),
+        Column("rol", String(20), nullable=False),
+        Column("estado", String(20), nullable=False),
+        Column("fecha_creacion", DateTime, nullable=False),
+        Column("ultimo_acceso", DateTime, nullable=True),
+    )
+    return metadata
+
+
+def aplicar(engine, progreso):
+    _esquema().create_all(bind=engine, checkfirst=True)
@@ -0,0 +1,11 @@
+"""Columnas de visitante en persona (HU-03): motivo_visita, id_empleado_visitado."""
+from backend.app.db.migrations.herramientas import agregar_columna
+
+VERSION = 2
+DESCRIPCION = "Columnas de visitante en persona"
+
+
+def aplicar(engine, progreso):
+    with engine.begin() as conn:
+        agregar_columna(conn, "persona", "motivo_visita", "VARCHAR(500)")
+        agregar_columna(conn, "persona", "id_empleado_visitado", "INTEGER")
@@ -0,0 +1,10 @@
+"""Motivo de revocación en autorizacion (HU-13)."""
+from backend.app.db.migrations.herramientas import agregar_columna
+
+VERSION = 3
+DESCRIPCION = "Motivo de revocación de autorizaciones"
+
+
+def aplicar(engine, progreso):
+    with engine.begin() as conn:
+        agregar_columna(conn, "autorizacion", "motivo_revocacion", "VARCHAR(500)")
@@ -0,0 +1,45 @@
+"""
+registro_acceso de BDs SQLite antiguas: id_registro BIGINT (no es alias de rowid, no se autoincrementa)
+o id_persona NOT NULL (impide registrar intentos denegados sin persona). Se reconstruye la tabla por lotes.
+La tabla destino se define aquí (congelada, no desde los modelos).
+"""
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text
+
+from backend.app.db.migrations.herramientas import columnas, reconstruir_tabla
+
+VERSION = 4
+DESCRIPCION = "Clave autoincremental e id_persona opcional en registro_acceso"
+
+
+def _registro_acceso() -> Table:
+    metadata = MetaData()
+    # Solo para resolver la clave foránea; no se crea
+    Table("persona", metadata, Column("id_persona", Integer, primary_key=True))
+    return Table(
+        "registro_acceso",
+        metadata,
+        Column("id_registro", Integer, primary_key=True, autoincrement=True),
+        Column("id_persona", Integer, ForeignKey("persona.id_persona"), nullable=True),
+        Column("tipo_movimiento", String(20), nullable=False),
+        Column("metodo_identificacion", String(30), nullable=False),
+        Column("fecha_hora", DateTime, nullable=False),
+        Column("resultado", String(20), nullable=False),
+        Column("motivo_denegacion", String(500), nullable=True),
+        Column("similarity_score", Float, nullable=True),
+        Column("observaciones", Text, nullable=True),
+        Index("ix_registro_acceso_fecha", "fecha_hora"),
+        Index("ix_registro_acceso_persona_fecha", "id_persona", "fecha_hora"),
+    )
+
+
+def aplicar(engine, progreso):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        cols = columnas(conn, "registro_acceso")
+    if not cols:
+        return
+    clave_bigint = "BIGINT" in str(cols["id_registro"]["type"]).upper()
+    persona_obligatoria = not cols["id_persona"]["nullable"]
+    if clave_bigint or persona_obligatoria:
+        reconstruir_tabla(engine, _registro_acceso(), progreso=progreso)
@@ -0,0 +1,48 @@
+"""
+Búsqueda de personas (HU-02): índice (nombre_completo, id_persona) para el listado paginado y, en SQLite,
+tabla FTS5 persona_fts (sin acentos, prefijos de 2-3 letras) sincronizada con persona mediante triggers.
+Sin FTS5 la búsqueda usa LIKE (ver persona_service).
+"""
+from sqlalchemy import text
+
+from backend.app.db.migrations.herramientas import tablas
+
+VERSION = 5
+DESCRIPCION = "Índice y FTS5 para la búsqueda de personas"
+
+
+def aplicar(engine, progreso):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_persona_nombre_id ON persona (nombre_completo, id_persona)"))
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if "persona_fts" in tablas(conn):
+            return
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE persona_fts USING fts5("
+                "nombre_completo, documento, content='persona', content_rowid='id_persona', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+        except Exception:
+            progreso("SQLite sin FTS5: la búsqueda de personas usará LIKE")
+            return
+        conn.execute(text(
+            "CREATE TRIGGER persona_fts_ai AFTER INSERT ON persona BEGIN "
+            "INSERT INTO persona_fts(rowid, nombre_completo, documento) "
+            "VALUES (new.id_persona, new.nombre_completo, new.documento); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER persona_fts_ad AFTER DELETE ON persona BEGIN "
+            "INSERT INTO persona_fts(persona_fts, rowid, nombre_completo, documento) "
+            "VALUES ('delete', old.id_persona, old.nombre_completo, old.documento); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER persona_fts_au AFTER UPDATE OF nombre_completo, documento ON persona BEGIN "
+            "INSERT INTO persona_fts(persona_fts, rowid, nombre_completo, documento) "
+            "VALUES ('delete', old.id_persona, old.nombre_completo, old.documento); "
+            "INSERT INTO persona_fts(rowid, nombre_completo, documento) "
+            "VALUES (new.id_persona, new.nombre_completo, new.documento); END"
+        ))
+        conn.execute(text("INSERT INTO persona_fts(persona_fts) VALUES ('rebuild')"))
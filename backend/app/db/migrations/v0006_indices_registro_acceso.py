@@ -0,0 +1,13 @@
+"""Índices de registro_acceso por fecha (historial, reportes, métricas del día) y por persona y fecha (HU-14)."""
+from sqlalchemy import text
+
+VERSION = 6
+DESCRIPCION = "Índices de registro_acceso por fecha y por persona"
+
+
+def aplicar(engine, progreso):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_registro_acceso_fecha ON registro_acceso (fecha_hora)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_registro_acceso_persona_fecha ON registro_acceso (id_persona, fecha_hora)"
+        ))
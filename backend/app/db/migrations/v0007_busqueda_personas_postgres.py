@@ -0,0 +1,26 @@
+"""
+PostgreSQL: índices trigram (pg_trgm) sobre nombre_completo y documento para la búsqueda de personas
+con ILIKE '%término%' (equivalente a persona_fts de SQLite). Si no se puede crear la extensión
+(permisos o paquete contrib no instalado), la búsqueda funciona igual pero recorre la tabla.
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+VERSION = 7
+DESCRIPCION = "Índices trigram para la búsqueda de personas (PostgreSQL)"
+
+
+def aplicar(engine, progreso):
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as e:
+            progreso(f"No se pudo crear la extensión pg_trgm ({e.orig}): la búsqueda de personas no tendrá índice")
+            return
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_persona_nombre_trgm ON persona USING gin (nombre_completo gin_trgm_ops)"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_persona_documento_trgm ON persona USING gin (documento gin_trgm_ops)"))
@@ -0,0 +1,19 @@
+"""Tabla cambio_cache: avisos de cambio que sincronizan las cachés en memoria entre workers y nodos."""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+VERSION = 8
+DESCRIPCION = "Tabla cambio_cache para sincronizar cachés entre workers"
+
+
+def aplicar(engine, progreso):
+    cambio_cache = Table(
+        "cambio_cache",
+        MetaData(),
+        Column("id_cambio", Integer, primary_key=True, autoincrement=True),
+        Column("tipo", String(20), nullable=False),
+        Column("clave", Integer, nullable=True),
+        Column("fecha", DateTime, nullable=False),
+        # AUTOINCREMENT en SQLite: los id nunca se reutilizan aunque se purguen las filas antiguas
+        sqlite_autoincrement=True,
+    )
+    cambio_cache.create(engine, checkfirst=True)
@@ -1,10 +1,10 @@
 """
-Modelos ORM para SQLite. Referencia: docs/05-modelo-datos.md.
+Modelos ORM (SQLite o PostgreSQL). Referencia: docs/05-modelo-datos.md.
 """
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Text, Float, DateTime, ForeignKey,
-    Enum as SQLEnum, LargeBinary,
+    Enum as SQLEnum, LargeBinary, Index, Table,
 )
 from sqlalchemy.orm import relationship
 
@@ -58,6 +58,27 @@ class TipoPersona(Base):
 
 # --- Entidades principales ---
 
+# Asociación persona ↔ zona de acceso (sede, edificio, área). Define la galería de cada zona.
+persona_zona = Table(
+    "persona_zona",
+    Base.metadata,
+    Column("id_persona", Integer, ForeignKey("persona.id_persona"), primary_key=True),
+    Column("id_zona", Integer, ForeignKey("zona.id_zona"), primary_key=True),
+)
+
+
+class Zona(Base):
+    """Zona de acceso o sede. Las puertas se identifican con id_zona al validar acceso."""
+    __tablename__ = "zona"
+
+    id_zona = Column(Integer, primary_key=True, autoincrement=True)
+    nombre = Column(String(100), unique=True, nullable=False)
+    descripcion = Column(String(200), nullable=True)
+    estado = Column(String(20), nullable=False, default="activo")
+
+    personas = relationship("Persona", secondary=persona_zona, back_populates="zonas")
+
+
 class Persona(Base):
     __tablename__ = "persona"
 
@@ -78,10 +99,13 @@ class Persona(Base):
     fecha_actualizacion = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
     creado_por = Column(Integer, nullable=True)  # FK a usuario_sistema.id_usuario (evita ciclo en create_all)
 
+    __table_args__ = (Index("ix_persona_nombre_id", "nombre_completo", "id_persona"),)  # listado paginado HU-02
+
     tipo_persona = relationship("TipoPersona", backref="personas")
     empleado_visitado = relationship("Persona", remote_side=[id_persona], foreign_keys=[id_empleado_visitado])
     reconocimiento_facial = relationship("ReconocimientoFacial", back_populates="persona", uselist=False)
     registros_acceso = relationship("RegistroAcceso", back_populates="persona")
+    zonas = relationship("Zona", secondary=persona_zona, back_populates="personas")
 
 
 class ReconocimientoFacial(Base):
@@ -104,7 +128,7 @@ class RegistroAcceso(Base):
     __tablename__ = "registro_acceso"
 
     id_registro = Column(Integer, primary_key=True, autoincrement=True)
-    id_persona = Column(Integer, ForeignKey("persona.id_persona"), nullable=False)
+    id_persona = Column(Integer, ForeignKey("persona.id_persona"), nullable=True)  # NULL: intento denegado sin identificar
     tipo_movimiento = Column(String(20), nullable=False)  # ingreso | salida
     metodo_identificacion = Column(String(30), nullable=False, default="reconocimiento_facial")
     fecha_hora = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -113,9 +137,62 @@ class RegistroAcceso(Base):
     similarity_score = Column(Float, nullable=True)
     observaciones = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index("ix_registro_acceso_fecha", "fecha_hora"),  # historial, reportes y métricas del día (HU-08, HU-11, HU-12)
+        Index("ix_registro_acceso_persona_fecha", "id_persona", "fecha_hora"),  # último evento por persona (HU-14)
+    )
+
     persona = relationship("Persona", back_populates="registros_acceso")
 
 
+class RegistroAccesoArchivo(Base):
+    """
+    Partición mensual archivada de registro_acceso. Las filas del mes se guardan
+    comprimidas (zlib + JSON) en `datos`; fecha_min/fecha_max permiten decidir
+    sin descomprimir si un filtro de fechas necesita leer la partición.
+    """
+    __tablename__ = "registro_acceso_archivo"
+
+    periodo = Column(String(7), primary_key=True)  # YYYY-MM
+    fecha_min = Column(DateTime, nullable=False)
+    fecha_max = Column(DateTime, nullable=False)
+    total_eventos = Column(Integer, nullable=False, default=0)
+    datos = Column(LargeBinary, nullable=False)
+    fecha_archivado = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CheckpointDiarioEventos(Base):
+    """Último número de secuencia confirmado en BD por diario de escritura diferida (services/event_writer.py)."""
+    __tablename__ = "diario_eventos_checkpoint"
+
+    diario = Column(String(100), primary_key=True)
+    ultimo_seq = Column(Integer, nullable=False, default=0)
+
+
+class CambioCache(Base):
+    """
+    Aviso de cambio para las cachés en memoria de los demás workers y nodos (services/cambios_service.py).
+    Se inserta en la misma transacción que el cambio; cada worker lee los de id mayor al último aplicado.
+    """
+    __tablename__ = "cambio_cache"
+    # AUTOINCREMENT en SQLite: los id nunca se reutilizan aunque se purguen las filas antiguas
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id_cambio = Column(Integer, primary_key=True, autoincrement=True)
+    tipo = Column(String(20), nullable=False)  # persona | zona | autorizacion | usuario
+    clave = Column(Integer, nullable=True)  # id_persona o id_usuario según el tipo; NULL = todo el tipo
+    fecha = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class VersionEsquema(Base):
+    """Migraciones aplicadas (backend/app/db/migrations): una fila por versión."""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    descripcion = Column(String(200), nullable=False)
+    fecha_aplicacion = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
 class Autorizacion(Base):
     """Autorización de visita para un visitante. HU-04, HU-13."""
     __tablename__ = "autorizacion"
@@ -1,17 +1,29 @@
 """
 Punto de entrada de la API del Sistema de Control de Acceso (SCA-EMPX).
 """
+import asyncio
+import logging
+import threading
 from pathlib import Path
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
 
 from backend.app.api.v1 import api_router
-from backend.app.db.database import (
-    ensure_registro_acceso_schema,
-    ensure_persona_visitante_columns,
-    ensure_autorizacion_table,
-)
+from backend.app.core.config import APP_ROLE, CACHE_SYNC_INTERVAL_MS, METRICS_ENABLED, ML_PRELOAD, PROFILING_ENABLED
+from backend.app.core.metrics import MiddlewareMetricas, instrumentar_sql, registro
+from backend.app.core.profiling import MiddlewarePerfilado, perfilador
+from backend.app.core.security import pool_hash_login
+from backend.app.db.database import SessionLocal, engine, engine_lectura, ensure_schema_version
+from backend.app.ml.inference import precargar_modelo
+from backend.app.services.access_service import prefiltro_vivacidad
+from backend.app.services.autorizacion_service import barrer_autorizaciones, indice_autorizaciones
+from backend.app.services.cambios_service import sincronizador, sincronizar_cambios
+from backend.app.services.event_service import difundir_estadisticas, limitador_denegaciones
+from backend.app.services.event_writer import get_event_writer, start_event_writer, stop_event_writer
+from backend.app.services.inferencia_service import ErrorInferencia, cliente_inferencia
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="SCA-EMPX API",
@@ -19,13 +31,79 @@ app = FastAPI(
     version="0.1.0",
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MiddlewareMetricas)
+    instrumentar_sql(engine)
+    if engine_lectura is not engine:
+        instrumentar_sql(engine_lectura, "lectura")
+    registro.registrar_medidor("sca_login_pool", "Pool de hashing del login (cola en segundos).", pool_hash_login.estadisticas)
+    registro.registrar_medidor("sca_cambios_cache", "Sincronización de cachés entre workers (cambio_cache).", sincronizador.estado)
+    registro.registrar_medidor("sca_vivacidad", "Prefiltro de vivacidad (duraciones en segundos).", prefiltro_vivacidad.estadisticas)
+    registro.registrar_medidor(
+        "sca_eventos",
+        "Escritor de eventos en segundo plano y denegaciones descartadas por límite de tasa.",
+        lambda: {
+            "lotes_confirmados": getattr(get_event_writer(), "lotes_confirmados", 0),
+            "eventos_confirmados": getattr(get_event_writer(), "eventos_confirmados", 0),
+            "eventos_rechazados": getattr(get_event_writer(), "eventos_rechazados", 0),
+            "cola_llena": getattr(get_event_writer(), "cola_llena", 0),
+            "denegaciones_descartadas": limitador_denegaciones.descartados,
+        },
+    )
+    if cliente_inferencia is not None:
+        registro.registrar_medidor("sca_inferencia", "Cliente del servicio de inferencia (INFERENCE_SERVICE_URL).", cliente_inferencia.estadisticas)
+
+if PROFILING_ENABLED:
+    # Muestreo de pila de las peticiones que superan PROFILING_BUDGET_MS (o con X-Debug-Profile)
+    app.add_middleware(MiddlewarePerfilado)
+    registro.registrar_medidor(
+        "sca_perfilador", "Perfiles de peticiones lentas escritos.", lambda: {"perfiles_escritos": perfilador.perfiles_escritos}
+    )
+
 
 @app.on_event("startup")
 def startup():
-    """Corrige esquema de registro_acceso en SQLite si la BD es antigua; añade columnas HU-03 a persona si faltan."""
-    ensure_registro_acceso_schema()
-    ensure_persona_visitante_columns()
-    ensure_autorizacion_table()
+    """Comprueba la versión del esquema (las migraciones se aplican al desplegar) e inicia los servicios en segundo plano."""
+    ensure_schema_version()
+    # Escritor de eventos en segundo plano (denegaciones siempre; entradas/salidas con EVENT_WRITE_BEHIND).
+    # Al iniciar reinserta los diarios de procesos caídos.
+    start_event_writer(SessionLocal)
+    db = SessionLocal()
+    try:
+        # Primero la posición en cambio_cache: los avisos posteriores a la carga no se pierden
+        sincronizador.iniciar(db)
+        indice_autorizaciones.cargar(db)
+    finally:
+        db.close()
+    # DeepFace/TensorFlow se importa al primer uso; los workers de reconocimiento lo cargan ya, sin bloquear el arranque.
+    # Con servicio de inferencia el modelo vive en el servicio (en la API solo se carga si hay que usar el respaldo).
+    if APP_ROLE != "no-ml" and ML_PRELOAD and cliente_inferencia is None:
+        threading.Thread(target=_precargar_modelo, name="precarga-modelo", daemon=True).start()
+
+
+def _precargar_modelo():
+    try:
+        precargar_modelo()
+    except Exception:
+        logger.exception("No se pudo precargar el modelo facial; se cargará en la primera validación")
+
+
+@app.on_event("startup")
+async def iniciar_tareas_fondo():
+    """
+    Difusor de métricas del dashboard en vivo (HU-11, SSE), barrido de autorizaciones vencidas y
+    consulta de avisos de cambio de caché de los demás workers.
+    """
+    app.state.tarea_estadisticas = asyncio.create_task(difundir_estadisticas())
+    app.state.tarea_autorizaciones = asyncio.create_task(barrer_autorizaciones())
+    if CACHE_SYNC_INTERVAL_MS > 0:
+        app.state.tarea_cambios = asyncio.create_task(sincronizar_cambios())
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """Confirma en BD los eventos pendientes del escritor en segundo plano."""
+    stop_event_writer()
 
 
 app.include_router(api_router, prefix="/api/v1")
@@ -37,6 +115,14 @@ def root():
     return {"app": "SCA-EMPX", "status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus (METRICS_ENABLED=true; si no, 404)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas (METRICS_ENABLED=false)")
+    return PlainTextResponse(registro.exponer(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/inicio")
 def inicio_page():
     """Página de inicio con menú de navegación a todas las funcionalidades."""
@@ -46,8 +132,27 @@ def inicio_page():
 
 @app.get("/health")
 def health():
-    """Salud para despliegue."""
-    return {"status": "healthy"}
+    """
+    Salud para despliegue. role: full (con reconocimiento facial) o no-ml.
+    inferencia: proceso, o servicio / servicio_no_disponible con INFERENCE_SERVICE_URL.
+    generacion: último aviso de cambio de caché aplicado (igual en todos los workers al día).
+    """
+    return {
+        "status": "healthy",
+        "role": APP_ROLE,
+        "inferencia": _estado_inferencia(),
+        "generacion": sincronizador.generacion,
+    }
+
+
+def _estado_inferencia() -> str:
+    if cliente_inferencia is None:
+        return "proceso"
+    try:
+        cliente_inferencia.salud(timeout=0.5)
+    except ErrorInferencia:
+        return "servicio_no_disponible"
+    return "servicio"
 
 
 @app.get("/validate-access")
@@ -115,7 +220,7 @@ def editar_persona_page():
 
 @app.get("/dashboard")
 def dashboard_page():
-    """Dashboard de accesos: métricas y eventos recientes (HU-11). Actualización cada 30 s."""
+    """Dashboard de accesos: métricas y eventos recientes (HU-11). Actualización en vivo vía /api/v1/events/stream."""
     path = Path(__file__).parent / "static" / "dashboard.html"
     return FileResponse(path)
 
@@ -0,0 +1,137 @@
+"""
+Calibración de umbrales de reconocimiento (HU-05).
+Con embeddings etiquetados (id de persona por embedding) calcula las distancias de todos los pares
+genuinos (misma persona) e impostores (personas distintas) por bloques vectorizados y las acumula
+en histogramas, sin guardar la matriz completa. De ahí salen FAR/FRR por umbral, la curva ROC,
+el EER y el umbral recomendado para un FAR objetivo. Solo depende de NumPy.
+
+FAR(t): fracción de pares impostores con distancia <= t (aceptados por error).
+FRR(t): fracción de pares genuinos con distancia > t (rechazados por error).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+BINS_DEFAULT = 2000
+
+
+def distancia_a_similitud(distancia):
+    """Misma transformación que inference.face_distance_to_similarity (1 / (1 + d)), vectorizada."""
+    return 1.0 / (1.0 + np.asarray(distancia, dtype=np.float64))
+
+
+def similitud_a_distancia(similitud: float) -> float:
+    """Inversa de distancia_a_similitud: SIMILARITY_THRESHOLD equivale a esta distancia máxima."""
+    return 1.0 / similitud - 1.0
+
+
+def distancias_por_bloque(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Matriz (len(a), len(b)) de distancias euclidianas: ||a||² - 2·a·b + ||b||²."""
+    d2 = (
+        np.einsum("ij,ij->i", a, a)[:, None]
+        - 2.0 * (a @ b.T)
+        + np.einsum("ij,ij->i", b, b)[None, :]
+    )
+    return np.sqrt(np.maximum(d2, 0.0))
+
+
+def histogramas_pares(
+    embeddings: np.ndarray,
+    etiquetas: np.ndarray,
+    bordes: np.ndarray,
+    bloque: int = 1024,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Histogramas (genuinos, impostores) de las distancias de todos los pares i < j.
+    Distancias mayores que el último borde se cuentan en el último intervalo.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    etiquetas = np.asarray(etiquetas)
+    n = len(embeddings)
+    hist_gen = np.zeros(len(bordes) - 1, dtype=np.int64)
+    hist_imp = np.zeros(len(bordes) - 1, dtype=np.int64)
+    tope = bordes[-1]
+    for i0 in range(0, n, bloque):
+        i1 = min(i0 + bloque, n)
+        d = np.minimum(distancias_por_bloque(embeddings[i0:i1], embeddings[i0:]), tope)
+        # Solo pares j > i (triángulo superior)
+        superior = np.arange(i0, n)[None, :] > np.arange(i0, i1)[:, None]
+        mismo = etiquetas[i0:i1, None] == etiquetas[None, i0:]
+        hist_gen += np.histogram(d[superior & mismo], bins=bordes)[0]
+        hist_imp += np.histogram(d[superior & ~mismo], bins=bordes)[0]
+    return hist_gen, hist_imp
+
+
+@dataclass
+class Curvas:
+    """FAR y FRR evaluados en cada umbral de distancia (bordes superiores de los histogramas)."""
+    umbrales: np.ndarray
+    far: np.ndarray
+    frr: np.ndarray
+    total_genuinos: int
+    total_impostores: int
+
+    @classmethod
+    def desde_histogramas(cls, bordes: np.ndarray, hist_gen: np.ndarray, hist_imp: np.ndarray) -> "Curvas":
+        total_gen = int(hist_gen.sum())
+        total_imp = int(hist_imp.sum())
+        aceptados_gen = np.cumsum(hist_gen)
+        aceptados_imp = np.cumsum(hist_imp)
+        far = aceptados_imp / total_imp if total_imp else np.zeros(len(hist_imp))
+        frr = 1.0 - aceptados_gen / total_gen if total_gen else np.zeros(len(hist_gen))
+        return cls(np.asarray(bordes[1:]), far, frr, total_gen, total_imp)
+
+    def punto(self, umbral: float) -> tuple[float, float]:
+        """(FAR, FRR) al umbral de distancia dado (el borde más cercano por debajo)."""
+        i = max(int(np.searchsorted(self.umbrales, umbral, side="right")) - 1, 0)
+        return float(self.far[i]), float(self.frr[i])
+
+    def eer(self) -> tuple[float, float]:
+        """(umbral, tasa) donde FAR y FRR se cruzan (Equal Error Rate)."""
+        diferencia = np.abs(self.far - self.frr)
+        # Si el cruce es un tramo (p. ej. ambos en 0 con clases separadas), se toma su punto medio
+        tramo = np.flatnonzero(diferencia == diferencia.min())
+        i = int(tramo[len(tramo) // 2])
+        return float(self.umbrales[i]), float((self.far[i] + self.frr[i]) / 2.0)
+
+    def umbral_para_far(self, far_objetivo: float) -> tuple[float, float, float] | None:
+        """Mayor umbral con FAR <= far_objetivo (menor FRR posible): (umbral, far, frr), o None."""
+        validos = np.flatnonzero(self.far <= far_objetivo)
+        if not len(validos):
+            return None
+        i = int(validos[-1])
+        return float(self.umbrales[i]), float(self.far[i]), float(self.frr[i])
+
+    def roc(self) -> np.ndarray:
+        """Puntos (FAR, TAR = 1 - FRR) por umbral, forma (bins, 2)."""
+        return np.column_stack([self.far, 1.0 - self.frr])
+
+
+def bordes_para(embeddings: np.ndarray, bins: int = BINS_DEFAULT, muestra: int = 1024) -> np.ndarray:
+    """Bordes de histograma entre 0 y la mayor distancia observada en una muestra (con margen)."""
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    m = embeddings[:muestra]
+    tope = float(distancias_por_bloque(m, m).max()) * 1.5 if len(m) > 1 else 1.0
+    return np.linspace(0.0, max(tope, 1e-6), bins + 1)
+
+
+def calibrar(
+    embeddings: np.ndarray,
+    etiquetas: np.ndarray,
+    distancias_genuinas_extra: np.ndarray | None = None,
+    bins: int = BINS_DEFAULT,
+    bloque: int = 1024,
+) -> Curvas:
+    """
+    Curvas FAR/FRR de un conjunto etiquetado. distancias_genuinas_extra: distancias genuinas
+    adicionales ya conocidas (p. ej. de accesos permitidos en registro_acceso).
+    """
+    bordes = bordes_para(embeddings, bins)
+    if distancias_genuinas_extra is not None and len(distancias_genuinas_extra):
+        bordes = np.linspace(0.0, max(bordes[-1], float(np.max(distancias_genuinas_extra))), bins + 1)
+    hist_gen, hist_imp = histogramas_pares(embeddings, etiquetas, bordes, bloque)
+    if distancias_genuinas_extra is not None and len(distancias_genuinas_extra):
+        hist_gen += np.histogram(np.minimum(distancias_genuinas_extra, bordes[-1]), bins=bordes)[0]
+    return Curvas.desde_histogramas(bordes, hist_gen, hist_imp)
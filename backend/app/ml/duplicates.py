@@ -0,0 +1,38 @@
+"""
+Búsqueda de rostros duplicados en toda la galería (misma cara registrada en varias personas).
+Recorre la matriz de distancias por bloques (bloque x bloque) con multiplicación de matrices,
+de modo que la memoria queda acotada por el tamaño de bloque y no por N². Solo depende de NumPy.
+"""
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from backend.app.ml.calibration import distancias_por_bloque
+
+
+def pares_duplicados(
+    ids: np.ndarray,
+    matriz: np.ndarray,
+    distancia_max: float,
+    bloque: int = 2048,
+) -> Iterator[tuple[int, int, float]]:
+    """
+    Genera (id_a, id_b, distancia) para cada par de embeddings de personas distintas con
+    distancia <= distancia_max. Cada par se reporta una vez (bloques del triángulo superior).
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    matriz = np.asarray(matriz, dtype=np.float64)
+    n = len(ids)
+    for i0 in range(0, n, bloque):
+        i1 = min(i0 + bloque, n)
+        for j0 in range(i0, n, bloque):
+            j1 = min(j0 + bloque, n)
+            d = distancias_por_bloque(matriz[i0:i1], matriz[j0:j1])
+            cerca = d <= distancia_max
+            if j0 == i0:
+                cerca &= np.triu(np.ones_like(cerca), k=1)
+            cerca &= ids[i0:i1, None] != ids[None, j0:j1]
+            for a, b in zip(*np.nonzero(cerca)):
+                yield int(ids[i0 + a]), int(ids[j0 + b]), float(d[a, b])
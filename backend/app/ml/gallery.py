@@ -0,0 +1,100 @@
+"""
+Galería en memoria de embeddings para identificación 1:N (HU-05).
+Cada fragmento guarda los embeddings como una matriz (N, 128) y compara la consulta contra
+todos en una sola operación vectorizada. Hay un fragmento global y uno por zona de acceso.
+Solo depende de NumPy (no carga el modelo).
+"""
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+
+import numpy as np
+
+EMBEDDING_DTYPE = np.float64
+
+
+class FragmentoGaleria:
+    """Embeddings de un conjunto de personas: ids (N,) y matriz (N, d). Inmutable."""
+
+    def __init__(self, ids: np.ndarray, matriz: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matriz = np.ascontiguousarray(matriz, dtype=EMBEDDING_DTYPE)
+        # ||x||² precalculado: d² = ||x||² - 2·x·q + ||q||²
+        self._normas = np.einsum("ij,ij->i", self.matriz, self.matriz)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mejor_coincidencia(
+        self, consulta: np.ndarray, distance_threshold: float
+    ) -> Tuple[int, float] | None:
+        """
+        Igual que inference.find_best_match sobre este fragmento: (id_persona, similarity) del embedding
+        más cercano, o None si el fragmento está vacío o la distancia supera distance_threshold.
+        """
+        if not len(self):
+            return None
+        consulta = np.asarray(consulta, dtype=EMBEDDING_DTYPE)
+        d2 = self._normas - 2.0 * (self.matriz @ consulta) + float(consulta @ consulta)
+        i = int(np.argmin(d2))
+        # Distancia exacta del ganador (evita el error de cancelación de la expresión expandida)
+        distancia = float(np.linalg.norm(self.matriz[i] - consulta))
+        if distancia > distance_threshold:
+            return None
+        return int(self.ids[i]), 1.0 / (1.0 + distancia)
+
+    def con_persona(self, id_persona: int, embedding: np.ndarray | None) -> "FragmentoGaleria":
+        """Copia con la fila de la persona reemplazada por embedding, o quitada si es None."""
+        resto = self.ids != id_persona
+        if embedding is None:
+            return self if resto.all() else FragmentoGaleria(self.ids[resto], self.matriz[resto])
+        fila = np.asarray(embedding, dtype=EMBEDDING_DTYPE).reshape(1, -1)
+        matriz = self.matriz[resto] if len(self) else np.empty((0, fila.shape[1]), dtype=EMBEDDING_DTYPE)
+        return FragmentoGaleria(np.append(self.ids[resto], id_persona), np.vstack([matriz, fila]))
+
+
+class Galeria:
+    """Fragmento global (todas las personas activas) + un fragmento por zona activa."""
+
+    def __init__(self, global_: FragmentoGaleria, zonas: dict[int, FragmentoGaleria]):
+        self.global_ = global_
+        self.zonas = zonas
+
+    @classmethod
+    def construir(
+        cls,
+        ids: np.ndarray,
+        matriz: np.ndarray,
+        miembros: dict[int, Iterable[int]],
+    ) -> "Galeria":
+        """miembros: id_zona → ids de persona asignados (una zona sin miembros queda con fragmento vacío)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        matriz = np.asarray(matriz, dtype=EMBEDDING_DTYPE)
+        # Sin personas (BD recién creada) -1 no se puede inferir: matriz (0, 0)
+        matriz = matriz.reshape(len(ids), -1) if len(ids) else matriz.reshape(0, 0)
+        zonas = {}
+        for id_zona, personas in miembros.items():
+            mascara = np.isin(ids, np.fromiter(personas, dtype=np.int64))
+            zonas[id_zona] = FragmentoGaleria(ids[mascara], matriz[mascara])
+        return cls(FragmentoGaleria(ids, matriz), zonas)
+
+    def con_persona(self, id_persona: int, embedding: np.ndarray | None, zonas: Iterable[int]) -> "Galeria":
+        """
+        Copia con la persona actualizada sin releer toda la galería: embedding None = persona inactiva o sin
+        plantilla (se quita de todos los fragmentos); zonas = zonas asignadas (en las demás se quita).
+        Cuesta una copia de los fragmentos que la contienen o la reciben, no una lectura de la BD.
+        """
+        zonas = set(zonas)
+        return Galeria(
+            self.global_.con_persona(id_persona, embedding),
+            {
+                id_zona: fragmento.con_persona(id_persona, embedding if id_zona in zonas else None)
+                for id_zona, fragmento in self.zonas.items()
+            },
+        )
+
+    def fragmento(self, id_zona: int | None) -> FragmentoGaleria | None:
+        """Fragmento de la zona (None si la zona no existe o está inactiva); sin zona, el global."""
+        if id_zona is None:
+            return self.global_
+        return self.zonas.get(id_zona)
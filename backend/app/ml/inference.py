@@ -2,15 +2,19 @@
 Detección de rostro, generación de embedding y comparación.
 HU-05: validar acceso por reconocimiento facial.
 Usa DeepFace (Facenet, 128-d) para compatibilidad con Windows sin CMake/dlib.
+DeepFace (y con él TensorFlow) se importa al primer uso: importar este módulo no carga el modelo,
+así los workers sin reconocimiento (APP_ROLE=no-ml) arrancan rápido y con poca memoria.
 """
 from __future__ import annotations
 
 import io
+from dataclasses import dataclass
 from typing import Tuple
 
 import numpy as np
 from PIL import Image
-from deepface import DeepFace
+
+from backend.app.core.metrics import etapa
 
 # Facenet retorna 128 dimensiones
 EMBEDDING_DTYPE = np.float64
@@ -20,6 +24,17 @@ EMBEDDING_SHAPE = (128,)
 MODEL_NAME = "Facenet"
 
 
+def _deepface():
+    """Módulo DeepFace, importado en la primera llamada (luego queda en sys.modules)."""
+    from deepface import DeepFace
+    return DeepFace
+
+
+def precargar_modelo() -> None:
+    """Importa DeepFace y construye el modelo de embeddings para que la primera validación no lo pague."""
+    _deepface().build_model(MODEL_NAME)
+
+
 def image_bytes_to_array(image_bytes: bytes) -> np.ndarray:
     """Convierte bytes a array RGB (BGR para OpenCV/DeepFace)."""
     img = Image.open(io.BytesIO(image_bytes))
@@ -27,20 +42,63 @@ def image_bytes_to_array(image_bytes: bytes) -> np.ndarray:
     return np.array(img)[:, :, ::-1]  # RGB -> BGR
 
 
-def get_embedding_from_image(image_bytes: bytes) -> np.ndarray | None:
+@dataclass
+class RostroDetectado:
+    """Rostro único detectado: embedding, imagen BGR, facial_area y face_confidence del detector."""
+    embedding: np.ndarray
+    imagen: np.ndarray
+    area: dict | None = None
+    confianza: float | None = None
+
+
+def detectar_rostro(image_bytes: bytes) -> RostroDetectado | None:
     """
-    Detecta un rostro en la imagen y retorna su embedding (128-d con Facenet).
-    Retorna None si no se detecta exactamente un rostro.
+    Detecta un rostro en la imagen y retorna su embedding (128-d con Facenet) junto con los datos
+    del detector (usados para evaluar la calidad al enrolar). None si no se detecta exactamente un rostro.
     """
-    arr = image_bytes_to_array(image_bytes)
+    with etapa("decodificacion"):
+        arr = image_bytes_to_array(image_bytes)
     try:
-        result = DeepFace.represent(arr, model_name=MODEL_NAME, enforce_detection=True)
+        # represent detecta, alinea y calcula el embedding en una sola llamada
+        with etapa("deteccion_embedding"):
+            result = _deepface().represent(arr, model_name=MODEL_NAME, enforce_detection=True)
     except Exception:
         return None
     if not result or len(result) != 1:
         return None
     embedding = np.array(result[0]["embedding"], dtype=EMBEDDING_DTYPE)
-    return embedding
+    return RostroDetectado(
+        embedding=embedding,
+        imagen=arr,
+        area=result[0].get("facial_area"),
+        confianza=result[0].get("face_confidence"),
+    )
+
+
+def detectar_rostros(imagen_bgr: np.ndarray, detector: str = "opencv") -> list[dict]:
+    """
+    Detecta todos los rostros de un cuadro sin calcular embeddings (ingesta de video).
+    Retorna por rostro su facial_area (x, y, w, h) más "confianza" del detector.
+    """
+    try:
+        caras = _deepface().extract_faces(imagen_bgr, detector_backend=detector, enforce_detection=False)
+    except Exception:
+        return []
+    # Sin rostros, DeepFace devuelve el cuadro completo con confianza 0
+    return [
+        {**c["facial_area"], "confianza": c.get("confidence")}
+        for c in caras
+        if c.get("confidence") and c.get("facial_area")
+    ]
+
+
+def get_embedding_from_image(image_bytes: bytes) -> np.ndarray | None:
+    """
+    Detecta un rostro en la imagen y retorna su embedding (128-d con Facenet).
+    Retorna None si no se detecta exactamente un rostro.
+    """
+    rostro = detectar_rostro(image_bytes)
+    return rostro.embedding if rostro is not None else None
 
 
 def embedding_to_bytes(embedding: np.ndarray) -> bytes:
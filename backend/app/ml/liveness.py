@@ -0,0 +1,170 @@
+"""
+Prefiltro de vivacidad antes del reconocimiento (HU-05).
+Descarta, sin ejecutar detección ni Facenet, los cuadros vacíos (tapados, negros, saturados) y
+los que presentan textura de recaptura (foto de una foto o de una pantalla) en el dominio de
+la frecuencia. Con varios cuadros de una misma ráfaga también exige movimiento entre ellos.
+Trabaja sobre una versión reducida en grises (JPEG se decodifica ya reducido con Image.draft).
+Solo depende de Pillow y NumPy.
+"""
+from __future__ import annotations
+
+import io
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+# Lado de la imagen reducida que se analiza
+LADO_ANALISIS = 128
+# Frecuencia radial (ciclos/píxel) que separa la banda baja de la alta en el espectro
+FRECUENCIA_CORTE = 0.25
+# Se ignora la componente continua y las frecuencias muy bajas (iluminación)
+FRECUENCIA_MINIMA = 0.02
+
+
+@dataclass
+class ResultadoVivacidad:
+    aceptado: bool
+    motivo: str = ""  # frame_vacio | posible_suplantacion | sin_movimiento
+
+
+def imagen_reducida(image_bytes: bytes, lado: int = LADO_ANALISIS) -> np.ndarray:
+    """Imagen en grises (float64, 0-255) de lado x lado. En JPEG la reducción ocurre al decodificar."""
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft("L", (lado, lado))
+    img = img.convert("L").resize((lado, lado), Image.BILINEAR)
+    return np.asarray(img, dtype=np.float64)
+
+
+def _ventana(lado: int) -> np.ndarray:
+    h = np.hanning(lado)
+    return np.outer(h, h)
+
+
+def _radios(lado: int) -> np.ndarray:
+    f = np.fft.fftfreq(lado)
+    return np.sqrt(f[:, None] ** 2 + f[None, :] ** 2)
+
+
+_VENTANA = _ventana(LADO_ANALISIS)
+_RADIOS = _radios(LADO_ANALISIS)
+
+
+def textura(gris: np.ndarray) -> tuple[float, float]:
+    """
+    (proporción de energía en alta frecuencia, pico periódico) del espectro de potencia.
+    Una recaptura suele perder alta frecuencia (desenfoque de la reimpresión) o mostrar moiré:
+    un patrón periódico que concentra la banda alta en pocas frecuencias. El pico es la fracción
+    de la energía de la banda alta en su frecuencia más fuerte (imagen natural: ~0.01).
+    """
+    lado = gris.shape[0]
+    ventana = _VENTANA if lado == LADO_ANALISIS else _ventana(lado)
+    radios = _RADIOS if lado == LADO_ANALISIS else _radios(lado)
+    potencia = np.abs(np.fft.fft2((gris - gris.mean()) * ventana)) ** 2
+    util = radios > FRECUENCIA_MINIMA
+    alta = radios > FRECUENCIA_CORTE
+    total = potencia[util].sum()
+    if total <= 0:
+        return 0.0, 0.0
+    banda_alta = potencia[alta]
+    energia_alta = float(banda_alta.sum())
+    pico = float(banda_alta.max() / energia_alta) if energia_alta > 0 else 0.0
+    return energia_alta / float(total), pico
+
+
+def movimiento(cuadros: list[np.ndarray]) -> float:
+    """Diferencia absoluta media entre cuadros consecutivos (0-255). ~0 si se muestra una foto fija."""
+    if len(cuadros) < 2:
+        return float("inf")
+    pila = np.stack(cuadros)
+    return float(np.abs(np.diff(pila, axis=0)).mean())
+
+
+class PrefiltroVivacidad:
+    """
+    Evalúa cuadros con umbrales configurables y lleva contadores de evaluados, rechazos por motivo
+    y duración de cada evaluación (últimas `muestras`).
+    """
+
+    def __init__(
+        self,
+        min_desviacion: float,
+        min_proporcion_alta: float,
+        max_pico: float,
+        min_movimiento: float,
+        muestras: int = 1000,
+    ):
+        self.min_desviacion = min_desviacion
+        self.min_proporcion_alta = min_proporcion_alta
+        self.max_pico = max_pico
+        self.min_movimiento = min_movimiento
+        self._duraciones: deque[float] = deque(maxlen=muestras)
+        self._lock = threading.Lock()
+        self.evaluados = 0
+        self.rechazos: dict[str, int] = {}
+
+    def _evaluar_gris(self, gris: np.ndarray) -> ResultadoVivacidad:
+        media = gris.mean()
+        if gris.std() < self.min_desviacion or media < 10 or media > 245:
+            return ResultadoVivacidad(False, "frame_vacio")
+        proporcion_alta, pico = textura(gris)
+        if proporcion_alta < self.min_proporcion_alta or (self.max_pico and pico > self.max_pico):
+            return ResultadoVivacidad(False, "posible_suplantacion")
+        return ResultadoVivacidad(True)
+
+    def _registrar(self, resultado: ResultadoVivacidad, duracion: float) -> ResultadoVivacidad:
+        with self._lock:
+            self.evaluados += 1
+            self._duraciones.append(duracion)
+            if not resultado.aceptado:
+                self.rechazos[resultado.motivo] = self.rechazos.get(resultado.motivo, 0) + 1
+        return resultado
+
+    def evaluar(self, image_bytes: bytes) -> ResultadoVivacidad:
+        """Evalúa un cuadro. Un archivo que no es imagen se trata como frame_vacio."""
+        resultado, _, duracion = self._evaluar_bytes(image_bytes)
+        return self._registrar(resultado, duracion)
+
+    def _evaluar_bytes(self, image_bytes: bytes) -> tuple[ResultadoVivacidad, np.ndarray | None, float]:
+        inicio = time.perf_counter()
+        try:
+            gris = imagen_reducida(image_bytes)
+        except Exception:
+            return ResultadoVivacidad(False, "frame_vacio"), None, time.perf_counter() - inicio
+        return self._evaluar_gris(gris), gris, time.perf_counter() - inicio
+
+    def evaluar_rafaga(self, imagenes: list[bytes]) -> list[ResultadoVivacidad]:
+        """
+        Evalúa cada cuadro de una ráfaga; si todos los válidos están quietos (movimiento menor que
+        min_movimiento), se rechazan como sin_movimiento (foto sostenida frente a la cámara).
+        """
+        evaluaciones = [self._evaluar_bytes(image_bytes) for image_bytes in imagenes]
+        resultados = [r for r, _, _ in evaluaciones]
+        grises = [g for r, g, _ in evaluaciones if r.aceptado]
+        if self.min_movimiento and len(grises) >= 2 and movimiento(grises) < self.min_movimiento:
+            resultados = [r if not r.aceptado else ResultadoVivacidad(False, "sin_movimiento") for r in resultados]
+        for resultado, (_, _, duracion) in zip(resultados, evaluaciones):
+            self._registrar(resultado, duracion)
+        return resultados
+
+    def estadisticas(self) -> dict[str, float]:
+        """Contadores y percentiles de duración (segundos) de las últimas evaluaciones."""
+        with self._lock:
+            duraciones = sorted(self._duraciones)
+            rechazos = dict(self.rechazos)
+            evaluados = self.evaluados
+
+        def percentil(p: float) -> float:
+            return duraciones[min(len(duraciones) - 1, int(p * len(duraciones)))] if duraciones else 0.0
+
+        return {
+            "evaluados": evaluados,
+            "rechazados": sum(rechazos.values()),
+            **{f"rechazos_{motivo}": total for motivo, total in rechazos.items()},
+            "duracion_p50": percentil(0.50),
+            "duracion_p95": percentil(0.95),
+            "duracion_max": duraciones[-1] if duraciones else 0.0,
+        }
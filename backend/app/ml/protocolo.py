@@ -0,0 +1,119 @@
+"""
+Protocolo binario del servicio local de inferencia (ver services/inferencia_service.py).
+Cada trama es una cabecera fija de 9 bytes (big-endian) seguida del cuerpo:
+  id de petición (u32) · código (u8: operación en peticiones, estado en respuestas) · longitud del cuerpo (u32)
+Las respuestas llevan el id de su petición, así un cliente puede enviar varias peticiones por la misma
+conexión sin esperar (pipelining) y el servidor responderlas en el orden en que terminan.
+
+Cuerpos:
+- EMBEDDING: petición = bytes de la imagen; respuesta OK = embedding (128 float64 little-endian).
+- IDENTIFICAR: petición = id_zona (i32, -1 = sin zona) + bytes de la imagen;
+  respuesta OK = embedding + id_persona (i64, -1 = sin coincidencia) + similitud (f64).
+- SALUD: petición vacía; respuesta OK = JSON (modelo, generación de galería, peticiones atendidas).
+- INVALIDAR: petición vacía; el servidor descarta su galería en memoria. Respuesta OK vacía.
+Estados de error: SIN_ROSTRO y ZONA_NO_ENCONTRADA (cuerpo vacío), ERROR (mensaje UTF-8).
+Solo depende de NumPy (no carga el modelo).
+"""
+from __future__ import annotations
+
+import asyncio
+import struct
+from typing import Tuple
+
+import numpy as np
+
+CABECERA = struct.Struct(">IBI")
+# Cuerpo máximo aceptado (imágenes de cámara o de enrolamiento)
+MAX_CUERPO = 32 * 1024 * 1024
+
+OP_SALUD = 0
+OP_EMBEDDING = 1
+OP_IDENTIFICAR = 2
+OP_INVALIDAR = 3
+
+OK = 0
+SIN_ROSTRO = 1
+ZONA_NO_ENCONTRADA = 2
+ERROR = 255
+
+# Embeddings en el cable: float64 little-endian (mismo formato que reconocimiento_facial.embedding)
+EMBEDDING_CABLE = np.dtype("<f8")
+_ZONA = struct.Struct(">i")
+_COINCIDENCIA = struct.Struct(">qd")
+SIN_ZONA = -1
+SIN_PERSONA = -1
+
+
+class TramaInvalida(Exception):
+    """Cabecera con longitud fuera de rango o conexión cerrada a mitad de una trama."""
+
+
+def empaquetar(id_peticion: int, codigo: int, cuerpo: bytes = b"") -> bytes:
+    return CABECERA.pack(id_peticion, codigo, len(cuerpo)) + cuerpo
+
+
+def _leer_exacto(sock, n: int) -> bytes:
+    partes = []
+    while n:
+        parte = sock.recv(min(n, 1 << 20))
+        if not parte:
+            raise TramaInvalida("conexión cerrada")
+        partes.append(parte)
+        n -= len(parte)
+    return b"".join(partes)
+
+
+def leer_trama(sock) -> Tuple[int, int, bytes]:
+    """Lee una trama de un socket bloqueante: (id_peticion, código, cuerpo)."""
+    id_peticion, codigo, longitud = CABECERA.unpack(_leer_exacto(sock, CABECERA.size))
+    if longitud > MAX_CUERPO:
+        raise TramaInvalida(f"cuerpo de {longitud} bytes")
+    return id_peticion, codigo, _leer_exacto(sock, longitud) if longitud else b""
+
+
+async def leer_trama_async(reader: asyncio.StreamReader) -> Tuple[int, int, bytes] | None:
+    """Igual que leer_trama sobre un StreamReader; None si el cliente cerró entre tramas."""
+    try:
+        cabecera = await reader.readexactly(CABECERA.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise TramaInvalida("conexión cerrada") from e
+        return None
+    id_peticion, codigo, longitud = CABECERA.unpack(cabecera)
+    if longitud > MAX_CUERPO:
+        raise TramaInvalida(f"cuerpo de {longitud} bytes")
+    try:
+        cuerpo = await reader.readexactly(longitud) if longitud else b""
+    except asyncio.IncompleteReadError as e:
+        raise TramaInvalida("conexión cerrada") from e
+    return id_peticion, codigo, cuerpo
+
+
+def embedding_a_cable(embedding: np.ndarray) -> bytes:
+    return np.asarray(embedding, dtype=EMBEDDING_CABLE).tobytes()
+
+
+def cable_a_embedding(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=EMBEDDING_CABLE).astype(np.float64)
+
+
+def cuerpo_identificar(id_zona: int | None, image_bytes: bytes) -> bytes:
+    return _ZONA.pack(SIN_ZONA if id_zona is None else id_zona) + image_bytes
+
+
+def leer_identificar(cuerpo: bytes) -> Tuple[int | None, bytes]:
+    (id_zona,) = _ZONA.unpack_from(cuerpo)
+    return (None if id_zona == SIN_ZONA else id_zona), cuerpo[_ZONA.size:]
+
+
+def respuesta_identificar(embedding: np.ndarray, match: Tuple[int, float] | None) -> bytes:
+    id_persona, similitud = match if match is not None else (SIN_PERSONA, 0.0)
+    return embedding_a_cable(embedding) + _COINCIDENCIA.pack(id_persona, similitud)
+
+
+def leer_respuesta_identificar(cuerpo: bytes) -> Tuple[np.ndarray, Tuple[int, float] | None]:
+    """(embedding, (id_persona, similitud) o None)."""
+    corte = len(cuerpo) - _COINCIDENCIA.size
+    id_persona, similitud = _COINCIDENCIA.unpack_from(cuerpo, corte)
+    match = None if id_persona == SIN_PERSONA else (id_persona, similitud)
+    return cable_a_embedding(cuerpo[:corte]), match
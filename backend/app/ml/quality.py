@@ -0,0 +1,114 @@
+"""
+Calidad de la foto de enrolamiento (HU-01, HU-03).
+Métricas baratas sobre el recorte del rostro, en NumPy: tamaño, nitidez (varianza del laplaciano),
+iluminación, pose (simetría izquierda/derecha y nivel de los ojos) y confianza del detector.
+Cada métrica va de 0 a 1; la calidad es su media geométrica ponderada (una sola métrica muy baja
+la hunde: un rostro nítido pero a oscuras no compensa) y se guarda en calidad_embedding.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Lado del rostro (px) a partir del cual el tamaño se considera pleno (entrada de Facenet: 160x160)
+LADO_ROSTRO_PLENO = 160
+# Varianza del laplaciano a partir de la cual la imagen se considera nítida
+NITIDEZ_PLENA = 100.0
+
+PESOS = {
+    "tamano": 1.0,
+    "nitidez": 1.0,
+    "iluminacion": 1.0,
+    "pose": 1.0,
+    "confianza": 1.0,
+}
+# Piso de cada métrica en la media geométrica (evita log(0))
+PISO_METRICA = 0.01
+
+
+@dataclass
+class CalidadRostro:
+    tamano: float
+    nitidez: float
+    iluminacion: float
+    pose: float
+    confianza: float | None
+    total: float
+
+
+def _gris(imagen_bgr: np.ndarray) -> np.ndarray:
+    bgr = imagen_bgr.astype(np.float64)
+    return 0.114 * bgr[..., 0] + 0.587 * bgr[..., 1] + 0.299 * bgr[..., 2]
+
+
+def _recorte(imagen: np.ndarray, area: dict | None) -> np.ndarray:
+    if not area:
+        return imagen
+    alto, ancho = imagen.shape[:2]
+    x, y = max(int(area.get("x", 0)), 0), max(int(area.get("y", 0)), 0)
+    w, h = int(area.get("w", ancho)), int(area.get("h", alto))
+    recorte = imagen[y:min(y + h, alto), x:min(x + w, ancho)]
+    return recorte if recorte.size else imagen
+
+
+def _nitidez(gris: np.ndarray) -> float:
+    """Varianza del laplaciano de 4 vecinos, normalizada a [0, 1]."""
+    if min(gris.shape) < 3:
+        return 0.0
+    lap = (
+        gris[:-2, 1:-1] + gris[2:, 1:-1] + gris[1:-1, :-2] + gris[1:-1, 2:]
+        - 4.0 * gris[1:-1, 1:-1]
+    )
+    return float(min(lap.var() / NITIDEZ_PLENA, 1.0))
+
+
+def _iluminacion(gris: np.ndarray) -> float:
+    """1 con brillo medio (128), 0 en negro o blanco saturado."""
+    return float(max(0.0, 1.0 - abs(gris.mean() / 255.0 - 0.5) * 2.0))
+
+
+def _pose(gris: np.ndarray, area: dict | None) -> float:
+    """
+    Proxy de rostro frontal: correlación entre la mitad izquierda y la derecha reflejada.
+    Si el detector entrega los ojos, se combina con su nivelación (cabeza no inclinada).
+    """
+    mitad = gris.shape[1] // 2
+    if mitad < 2:
+        return 0.0
+    izquierda = gris[:, :mitad].ravel()
+    derecha = gris[:, -mitad:][:, ::-1].ravel()
+    izquierda = izquierda - izquierda.mean()
+    derecha = derecha - derecha.mean()
+    denominador = np.sqrt((izquierda @ izquierda) * (derecha @ derecha))
+    simetria = float(max(izquierda @ derecha / denominador, 0.0)) if denominador > 0 else 0.0
+    ojo_izq, ojo_der = (area or {}).get("left_eye"), (area or {}).get("right_eye")
+    if ojo_izq and ojo_der:
+        dx = abs(ojo_der[0] - ojo_izq[0]) or 1
+        nivelacion = max(0.0, 1.0 - abs(ojo_der[1] - ojo_izq[1]) / dx)
+        return (simetria + nivelacion) / 2.0
+    return simetria
+
+
+def evaluar_calidad(
+    imagen_bgr: np.ndarray,
+    area: dict | None = None,
+    confianza: float | None = None,
+) -> CalidadRostro:
+    """
+    Evalúa la calidad del rostro en imagen_bgr. area: facial_area del detector (x, y, w, h y,
+    si existen, left_eye/right_eye); confianza: face_confidence del detector (se omite si es None).
+    """
+    recorte = _recorte(imagen_bgr, area)
+    gris = _gris(recorte)
+    metricas = {
+        "tamano": float(min(min(recorte.shape[:2]) / LADO_ROSTRO_PLENO, 1.0)),
+        "nitidez": _nitidez(gris),
+        "iluminacion": _iluminacion(gris),
+        "pose": _pose(gris, area),
+        "confianza": None if confianza is None else float(np.clip(confianza, 0.0, 1.0)),
+    }
+    presentes = {k: v for k, v in metricas.items() if v is not None}
+    log_total = sum(PESOS[k] * np.log(max(v, PISO_METRICA)) for k, v in presentes.items())
+    total = float(np.exp(log_total / sum(PESOS[k] for k in presentes)))
+    return CalidadRostro(total=round(total, 4), **metricas)
@@ -12,13 +12,14 @@ class DashboardEstadisticas(BaseModel):
 
 class EventoListItem(BaseModel):
     id_registro: int
-    id_persona: int
+    id_persona: int | None = None  # None: intento denegado sin persona identificada
     nombre_completo: str | None = None
     tipo_movimiento: str
     fecha_hora: datetime
     resultado: str
     similarity_score: float | None = None
     metodo_identificacion: str
+    motivo_denegacion: str | None = None
 
     class Config:
         from_attributes = True
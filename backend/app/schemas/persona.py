@@ -4,7 +4,7 @@ from pydantic import BaseModel
 
 
 class PersonaDentro(BaseModel):
-    """Persona actualmente dentro (último evento = ingreso permitido). HU-14."""
+    """Persona actualmente dentro (último evento permitido = ingreso). HU-14."""
     id_persona: int
     nombre_completo: str
     fecha_hora_entrada: datetime
@@ -53,6 +53,8 @@ class PersonaRegistroResponse(BaseModel):
     documento: str
     estado: str
     calidad_embedding: float | None = None
+    posible_duplicado_de: int | None = None  # persona activa con el mismo rostro (registro)
+    similitud_duplicado: float | None = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,26 @@
+"""Schemas para zonas de acceso (galerías por sede o área)."""
+from typing import Literal
+from pydantic import BaseModel
+
+
+class ZonaCreate(BaseModel):
+    nombre: str
+    descripcion: str | None = None
+
+
+class ZonaUpdate(BaseModel):
+    """Campos opcionales; solo se actualizan los enviados."""
+    nombre: str | None = None
+    descripcion: str | None = None
+    estado: Literal["activo", "inactivo"] | None = None
+
+
+class ZonaResponse(BaseModel):
+    id_zona: int
+    nombre: str
+    descripcion: str | None = None
+    estado: str
+    total_personas: int = 0
+
+    class Config:
+        from_attributes = True
@@ -4,16 +4,34 @@ Servicio de validación de acceso por reconocimiento facial (HU-05) y registro d
 from dataclasses import dataclass
 from typing import Literal
 
+import numpy as np
 from sqlalchemy.orm import Session
 
-from backend.app.db.models import Persona, ReconocimientoFacial
-from backend.app.services.event_service import register_entrada
-from backend.app.ml.inference import (
-    get_embedding_from_image,
-    bytes_to_embedding,
-    find_best_match,
+from backend.app.core.metrics import etapa
+from backend.app.services.event_service import register_entrada, register_denegacion
+from backend.app.services.autorizacion_service import indice_autorizaciones
+from backend.app.services.galeria_service import buscar_coincidencia, cache_galeria
+from backend.app.services.inferencia_service import ErrorInferencia, cliente_inferencia
+from backend.app.ml.inference import get_embedding_from_image
+from backend.app.ml.liveness import PrefiltroVivacidad
+from backend.app.core.config import (
+    SIMILARITY_THRESHOLD,
+    INFERENCE_FALLBACK_LOCAL,
+    LIVENESS_ENABLED,
+    LIVENESS_MIN_STD,
+    LIVENESS_MIN_HF_RATIO,
+    LIVENESS_MAX_PEAK_SHARE,
+    LIVENESS_MIN_MOTION,
+    BURST_MAX_FRAMES,
+)
+
+# Prefiltro previo al modelo: descarta cuadros vacíos y recapturas sin detectar rostro ni calcular embedding
+prefiltro_vivacidad = PrefiltroVivacidad(
+    min_desviacion=LIVENESS_MIN_STD,
+    min_proporcion_alta=LIVENESS_MIN_HF_RATIO,
+    max_pico=LIVENESS_MAX_PEAK_SHARE,
+    min_movimiento=LIVENESS_MIN_MOTION,
 )
-from backend.app.core.config import SIMILARITY_THRESHOLD, FACE_DISTANCE_THRESHOLD
 
 
 @dataclass
@@ -22,47 +40,198 @@ class ValidateAccessResult:
     person_id: int | None = None
     similarity: float | None = None
     reason: str = ""
+    frames_processed: int = 1
 
 
 def validate_access(
-    db: Session, image_bytes: bytes, register_entrada_event: bool = True
+    db: Session, image_bytes: bytes, register_entrada_event: bool = True, id_zona: int | None = None
 ) -> ValidateAccessResult:
     """
     Valida acceso por imagen facial.
     Si hay coincidencia y persona activa: allowed=True y, si register_entrada_event,
     se registra evento de entrada (HU-06). Si register_entrada_event=False solo identifica (para HU-07 salida).
+    Para ingresar, un visitante debe tener una autorización vigente en este momento (HU-04, HU-13);
+    la salida no se condiciona a la autorización.
+    Los intentos fallidos se registran como denegados (ingreso o salida) en segundo plano.
+    id_zona: zona de la puerta; se busca solo entre las personas asignadas a ella (ver _identify_person).
+    Lanza ValueError("zona_no_encontrada") si la zona no existe o está inactiva.
+    """
+    result = _identify_person(db, image_bytes, id_zona=id_zona)
+    return _registrar_resultado(db, result, register_entrada_event)
+
+
+def validate_access_burst(
+    db: Session,
+    images: list[bytes],
+    fusion: Literal["best", "mean"] = "best",
+    register_entrada_event: bool = True,
+    id_zona: int | None = None,
+) -> ValidateAccessResult:
     """
-    result = _identify_person(db, image_bytes)
+    Valida acceso con una ráfaga de cuadros (hasta BURST_MAX_FRAMES) en una sola petición.
+    Los cuadros pasan juntos por el prefiltro de vivacidad (incluye movimiento entre cuadros) y luego
+    se procesan en orden hasta que la identificación supera el umbral (parada temprana):
+    - best: cada cuadro se compara por separado; gana el de mayor similitud.
+    - mean: se compara el promedio de los embeddings de los cuadros procesados hasta ese momento.
+    Se registra un único evento (entrada o denegación) por ráfaga, como en validate_access.
+    Con INFERENCE_SERVICE_URL los embeddings se piden al servicio de inferencia; el matching es local.
+    """
+    galeria, fragmento = _fragmento_zona(db, id_zona)
+    images = images[:BURST_MAX_FRAMES]
+    if LIVENESS_ENABLED:
+        with etapa("vivacidad"):
+            vivacidad = prefiltro_vivacidad.evaluar_rafaga(images)
+        rechazo = next((v.motivo for v in vivacidad if not v.aceptado), "")
+        images = [img for img, v in zip(images, vivacidad) if v.aceptado]
+        if not images:
+            return _registrar_resultado(
+                db, ValidateAccessResult(allowed=False, reason=rechazo, frames_processed=0), register_entrada_event
+            )
+
+    result = ValidateAccessResult(allowed=False, reason="rostro_no_detectado", frames_processed=0)
+    embeddings = []
+    for procesados, image_bytes in enumerate(images, start=1):
+        embedding = _embedding(image_bytes)
+        if embedding is None:
+            result.frames_processed = procesados
+            continue
+        embeddings.append(embedding)
+        consulta = np.mean(embeddings, axis=0) if fusion == "mean" else embedding
+        with etapa("matching"):
+            candidato = _resultado_match(buscar_coincidencia(galeria, fragmento, consulta, id_zona))
+        candidato.frames_processed = procesados
+        if candidato.allowed:
+            result = candidato
+            break
+        # Se conserva el intento más cercano (similitud insuficiente antes que persona no identificada)
+        if result.similarity is None or (candidato.similarity or 0) > result.similarity:
+            result = candidato
+        result.frames_processed = procesados
+    return _registrar_resultado(db, result, register_entrada_event)
+
+
+def _registrar_resultado(
+    db: Session, result: ValidateAccessResult, register_entrada_event: bool
+) -> ValidateAccessResult:
+    """Aplica la autorización de visitantes y registra el evento de entrada o el intento denegado."""
+    if result.allowed and register_entrada_event:
+        with etapa("autorizacion"):
+            result = _check_autorizacion(db, result)
     if not result.allowed:
+        with etapa("registro_evento"):
+            register_denegacion(
+                db,
+                tipo_movimiento="ingreso" if register_entrada_event else "salida",
+                motivo_denegacion=result.reason,
+                similarity_score=result.similarity,
+                id_persona=result.person_id,
+            )
         return result
     if register_entrada_event:
-        register_entrada(db, id_persona=result.person_id, similarity_score=result.similarity)
+        with etapa("registro_evento"):
+            register_entrada(db, id_persona=result.person_id, similarity_score=result.similarity)
+    return result
+
+
+def _check_autorizacion(db: Session, result: ValidateAccessResult) -> ValidateAccessResult:
+    """Visitantes: exige una ventana de autorización vigente (índice en memoria, sin consulta)."""
+    if not indice_autorizaciones.cargado:
+        indice_autorizaciones.cargar(db)
+    if indice_autorizaciones.requiere_autorizacion(result.person_id) and not indice_autorizaciones.autorizado(result.person_id):
+        return ValidateAccessResult(
+            allowed=False,
+            person_id=result.person_id,
+            similarity=result.similarity,
+            reason="autorizacion_no_vigente",
+            frames_processed=result.frames_processed,
+        )
     return result
 
 
-def _identify_person(db: Session, image_bytes: bytes) -> ValidateAccessResult:
-    """Identifica persona por imagen (sin registrar evento). Usado por validate_access y register-exit."""
+def _identify_person(db: Session, image_bytes: bytes, id_zona: int | None = None) -> ValidateAccessResult:
+    """
+    Identifica persona por imagen (sin registrar evento). Usado por validate_access y register-exit.
+    Antes del modelo aplica el prefiltro de vivacidad (LIVENESS_ENABLED): frame_vacio / posible_suplantacion.
+    Con id_zona busca en el fragmento de galería de esa zona; si no hay coincidencia y
+    ZONE_FALLBACK_GLOBAL está activo, busca en la galería global. Sin id_zona, en la global.
+    Con INFERENCE_SERVICE_URL el embedding y el matching se hacen en el servicio de inferencia
+    (una llamada); si falla, en el proceso (INFERENCE_FALLBACK_LOCAL) o ErrorInferencia.
+    """
+    cliente = _servicio_inferencia()
+    if cliente is None:
+        galeria, fragmento = _fragmento_zona(db, id_zona)
+
+    if LIVENESS_ENABLED:
+        with etapa("vivacidad"):
+            vivacidad = prefiltro_vivacidad.evaluar(image_bytes)
+        if not vivacidad.aceptado:
+            return ValidateAccessResult(allowed=False, reason=vivacidad.motivo)
+
+    if cliente is not None:
+        try:
+            with etapa("inferencia_servicio"):
+                embedding, match = cliente.identificar(image_bytes, id_zona)
+        except ErrorInferencia:
+            if not INFERENCE_FALLBACK_LOCAL:
+                raise
+            galeria, fragmento = _fragmento_zona(db, id_zona)
+        else:
+            if embedding is None:
+                return ValidateAccessResult(allowed=False, reason="rostro_no_detectado")
+            return _resultado_match(match)
+
     embedding = get_embedding_from_image(image_bytes)
     if embedding is None:
         return ValidateAccessResult(allowed=False, reason="rostro_no_detectado")
 
-    rows = (
-        db.query(ReconocimientoFacial, Persona)
-        .join(Persona, ReconocimientoFacial.id_persona == Persona.id_persona)
-        .filter(ReconocimientoFacial.estado == "activo", Persona.estado == "activo")
-        .all()
-    )
-    candidates = [(p.id_persona, bytes_to_embedding(r.embedding)) for r, p in rows]
-    match = find_best_match(
-        embedding, candidates, distance_threshold=FACE_DISTANCE_THRESHOLD
-    )
+    with etapa("matching"):
+        return _resultado_match(buscar_coincidencia(galeria, fragmento, embedding, id_zona))
+
+
+def _servicio_inferencia():
+    """
+    Cliente del servicio de inferencia si está configurado y no se marcó caído; None = inferencia en el proceso.
+    Caído y sin INFERENCE_FALLBACK_LOCAL: ErrorInferencia.
+    """
+    if cliente_inferencia is None:
+        return None
+    if cliente_inferencia.disponible:
+        return cliente_inferencia
+    if INFERENCE_FALLBACK_LOCAL:
+        return None
+    raise ErrorInferencia("servicio_no_disponible")
+
+
+def _embedding(image_bytes: bytes) -> np.ndarray | None:
+    """Embedding del servicio de inferencia o, sin servicio (o si falla con INFERENCE_FALLBACK_LOCAL), en el proceso."""
+    cliente = _servicio_inferencia()
+    if cliente is not None:
+        try:
+            with etapa("inferencia_servicio"):
+                return cliente.embedding(image_bytes)
+        except ErrorInferencia:
+            if not INFERENCE_FALLBACK_LOCAL:
+                raise
+    return get_embedding_from_image(image_bytes)
+
 
+def _fragmento_zona(db: Session, id_zona: int | None):
+    """(galería, fragmento de la zona). Lanza ValueError("zona_no_encontrada")."""
+    with etapa("galeria"):
+        galeria = cache_galeria.obtener(db)
+    fragmento = galeria.fragmento(id_zona)
+    if fragmento is None:
+        raise ValueError("zona_no_encontrada")
+    return galeria, fragmento
+
+
+def _resultado_match(match) -> ValidateAccessResult:
     if match is None:
         return ValidateAccessResult(allowed=False, reason="persona_no_identificada")
 
     person_id, similarity = match
     if similarity < SIMILARITY_THRESHOLD:
-        return ValidateAccessResult(allowed=False, reason="similitud_insuficiente")
+        return ValidateAccessResult(allowed=False, similarity=round(similarity, 4), reason="similitud_insuficiente")
 
     return ValidateAccessResult(
         allowed=True,
@@ -70,5 +239,3 @@ def _identify_person(db: Session, image_bytes: bytes) -> ValidateAccessResult:
         similarity=round(similarity, 4),
         reason="acceso_permitido",
     )
-
-
@@ -0,0 +1,294 @@
+"""
+Archivo histórico de registro_acceso por particiones mensuales comprimidas.
+
+Los eventos más antiguos que ARCHIVE_HORIZON_DAYS se mueven a registro_acceso_archivo
+(una fila por mes, filas serializadas en JSON y comprimidas con zlib). La tabla
+caliente queda pequeña y las consultas de historial/reportes solo leen particiones
+archivadas cuando el filtro de fechas (y la paginación) lo requiere.
+"""
+import heapq
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import ARCHIVE_HORIZON_DAYS
+from backend.app.db.models import Persona, RegistroAcceso, RegistroAccesoArchivo
+
+# Orden de columnas dentro de cada fila serializada
+COLUMNAS_ARCHIVO = (
+    "id_registro",
+    "id_persona",
+    "tipo_movimiento",
+    "metodo_identificacion",
+    "fecha_hora",
+    "resultado",
+    "motivo_denegacion",
+    "similarity_score",
+    "observaciones",
+)
+
+# Filas borradas por sentencia DELETE al mover un mes (límite de variables de SQLite)
+DELETE_CHUNK = 500
+
+
+@dataclass
+class EventoArchivado:
+    """Evento leído de una partición archivada. Mismos atributos que RegistroAcceso (solo lectura)."""
+    id_registro: int
+    id_persona: int | None
+    tipo_movimiento: str
+    metodo_identificacion: str
+    fecha_hora: datetime
+    resultado: str
+    motivo_denegacion: str | None = None
+    similarity_score: float | None = None
+    observaciones: str | None = None
+    persona: Persona | None = None
+
+
+def _inicio_mes(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _siguiente_mes(dt: datetime) -> datetime:
+    return (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _comprimir(filas: list[list]) -> bytes:
+    return zlib.compress(json.dumps(filas, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def _descomprimir(datos: bytes) -> list[list]:
+    return json.loads(zlib.decompress(datos).decode("utf-8"))
+
+
+def _fila_desde_registro(r: RegistroAcceso) -> list:
+    return [
+        r.id_registro,
+        r.id_persona,
+        r.tipo_movimiento,
+        r.metodo_identificacion,
+        r.fecha_hora.isoformat() if r.fecha_hora else None,
+        r.resultado,
+        r.motivo_denegacion,
+        r.similarity_score,
+        r.observaciones,
+    ]
+
+
+def _evento_desde_fila(fila: list) -> EventoArchivado:
+    valores = dict(zip(COLUMNAS_ARCHIVO, fila))
+    valores["fecha_hora"] = datetime.fromisoformat(valores["fecha_hora"])
+    return EventoArchivado(**valores)
+
+
+def _ids_ultimo_evento_por_persona(db: Session) -> set[int]:
+    """
+    id_registro del último evento permitido de cada persona. No se archivan para que
+    "personas dentro" (HU-14) y total_dentro (HU-11) sigan calculándose sobre la tabla caliente.
+    """
+    subq = (
+        db.query(RegistroAcceso.id_persona, func.max(RegistroAcceso.fecha_hora).label("max_fecha"))
+        .filter(RegistroAcceso.resultado == "permitido")
+        .group_by(RegistroAcceso.id_persona)
+        .subquery()
+    )
+    rows = (
+        db.query(RegistroAcceso.id_registro)
+        .join(subq, (RegistroAcceso.id_persona == subq.c.id_persona) & (RegistroAcceso.fecha_hora == subq.c.max_fecha))
+        .all()
+    )
+    return {r[0] for r in rows}
+
+
+def archivar_eventos(
+    db: Session,
+    horizonte_dias: int | None = None,
+    ahora: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Mueve a particiones mensuales los eventos anteriores al mes que contiene (ahora - horizonte_dias).
+    Cada mes se procesa en su propia transacción: si la partición ya existe se fusiona.
+    Retorna {periodo YYYY-MM: eventos archivados}.
+    """
+    horizonte = ARCHIVE_HORIZON_DAYS if horizonte_dias is None else horizonte_dias
+    corte = _inicio_mes((ahora or datetime.utcnow()) - timedelta(days=horizonte))
+
+    minimo = db.query(func.min(RegistroAcceso.fecha_hora)).filter(RegistroAcceso.fecha_hora < corte).scalar()
+    if minimo is None:
+        return {}
+
+    conservar = _ids_ultimo_evento_por_persona(db)
+    resultado: dict[str, int] = {}
+    mes = _inicio_mes(minimo)
+    while mes < corte:
+        fin = _siguiente_mes(mes)
+        registros = [
+            r
+            for r in (
+                db.query(RegistroAcceso)
+                .filter(RegistroAcceso.fecha_hora >= mes, RegistroAcceso.fecha_hora < fin)
+                .order_by(RegistroAcceso.fecha_hora.desc(), RegistroAcceso.id_registro.desc())
+                .all()
+            )
+            if r.id_registro not in conservar
+        ]
+        if registros:
+            periodo = mes.strftime("%Y-%m")
+            _guardar_particion(db, periodo, registros)
+            ids = [r.id_registro for r in registros]
+            for i in range(0, len(ids), DELETE_CHUNK):
+                db.query(RegistroAcceso).filter(
+                    RegistroAcceso.id_registro.in_(ids[i:i + DELETE_CHUNK])
+                ).delete(synchronize_session=False)
+            db.commit()
+            db.expunge_all()
+            resultado[periodo] = len(registros)
+        mes = fin
+    return resultado
+
+
+def _guardar_particion(db: Session, periodo: str, registros: list[RegistroAcceso]) -> None:
+    """Crea o fusiona la partición del periodo. Las filas quedan ordenadas por fecha_hora desc."""
+    filas = [_fila_desde_registro(r) for r in registros]
+    particion = db.query(RegistroAccesoArchivo).filter(RegistroAccesoArchivo.periodo == periodo).first()
+    if particion is not None:
+        filas.extend(_descomprimir(particion.datos))
+        filas.sort(key=lambda f: (f[4], f[0]), reverse=True)
+    else:
+        particion = RegistroAccesoArchivo(periodo=periodo)
+        db.add(particion)
+    particion.fecha_max = datetime.fromisoformat(filas[0][4])
+    particion.fecha_min = datetime.fromisoformat(filas[-1][4])
+    particion.total_eventos = len(filas)
+    particion.datos = _comprimir(filas)
+    particion.fecha_archivado = datetime.utcnow()
+
+
+def _parse_fecha_desde(fecha_desde: str | None) -> datetime | None:
+    if not fecha_desde or not fecha_desde.strip():
+        return None
+    try:
+        return datetime.strptime(fecha_desde.strip()[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _parse_fecha_hasta(fecha_hasta: str | None) -> datetime | None:
+    if not fecha_hasta or not fecha_hasta.strip():
+        return None
+    try:
+        dt = datetime.strptime(fecha_hasta.strip()[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+
+def _particiones_en_rango(db: Session, desde: datetime | None, hasta: datetime | None) -> list[RegistroAccesoArchivo]:
+    q = db.query(RegistroAccesoArchivo)
+    if desde is not None:
+        q = q.filter(RegistroAccesoArchivo.fecha_max >= desde)
+    if hasta is not None:
+        q = q.filter(RegistroAccesoArchivo.fecha_min <= hasta)
+    return q.order_by(RegistroAccesoArchivo.periodo.desc()).all()
+
+
+def _frontera_archivo(db: Session, desde: datetime | None, hasta: datetime | None) -> datetime | None:
+    """Fecha del evento archivado más reciente entre las particiones del rango (None si no hay ninguna)."""
+    q = db.query(func.max(RegistroAccesoArchivo.fecha_max))
+    if desde is not None:
+        q = q.filter(RegistroAccesoArchivo.fecha_max >= desde)
+    if hasta is not None:
+        q = q.filter(RegistroAccesoArchivo.fecha_min <= hasta)
+    return q.scalar()
+
+
+def _eventos_archivados(
+    db: Session,
+    particiones: list[RegistroAccesoArchivo],
+    desde: datetime | None,
+    hasta: datetime | None,
+    tipo: str | None,
+    persona_id: int | None,
+    documento: str | None,
+    resultado: str | None,
+) -> Iterator[EventoArchivado]:
+    """Eventos archivados que cumplen los filtros, por fecha_hora desc; descomprime cada partición al llegar a ella."""
+    tipo_filtro = "ingreso" if tipo in ("ingreso", "entrada") else ("salida" if tipo == "salida" else None)
+    resultado_filtro = resultado.strip() if resultado and resultado.strip() in ("permitido", "denegado") else None
+    documento_filtro = documento.strip().lower() if documento and documento.strip() else None
+
+    for particion in particiones:
+        candidatos = []
+        for fila in _descomprimir(particion.datos):
+            ev = _evento_desde_fila(fila)
+            if desde is not None and ev.fecha_hora < desde:
+                continue
+            if hasta is not None and ev.fecha_hora > hasta:
+                continue
+            if tipo_filtro and ev.tipo_movimiento != tipo_filtro:
+                continue
+            if persona_id is not None and ev.id_persona != persona_id:
+                continue
+            if resultado_filtro and ev.resultado != resultado_filtro:
+                continue
+            candidatos.append(ev)
+        ids = {ev.id_persona for ev in candidatos if ev.id_persona is not None}
+        personas = (
+            {p.id_persona: p for p in db.query(Persona).filter(Persona.id_persona.in_(ids)).all()}
+            if ids else {}
+        )
+        for ev in candidatos:
+            ev.persona = personas.get(ev.id_persona)
+            if documento_filtro and (ev.persona is None or documento_filtro not in ev.persona.documento.lower()):
+                continue
+            yield ev
+
+
+def consultar_eventos(
+    db: Session,
+    q,
+    limit: int,
+    offset: int = 0,
+    tipo: str | None = None,
+    persona_id: int | None = None,
+    documento: str | None = None,
+    fecha_desde: str | None = None,
+    fecha_hasta: str | None = None,
+    resultado: str | None = None,
+) -> list:
+    """
+    Ejecuta la query caliente `q` (ya filtrada y ordenada por fecha_hora desc) con offset/limit y,
+    si el rango de fechas alcanza particiones archivadas, completa la página con ellas.
+    Lo caliente posterior al evento archivado más reciente va primero. El resto de lo caliente
+    (el último evento permitido de cada persona, que archivar_eventos conserva aunque sea antiguo) se
+    intercala con lo archivado por fecha_hora, así el orden y el offset son los de una sola tabla.
+    Retorna RegistroAcceso y EventoArchivado mezclados (mismos atributos).
+    """
+    desde = _parse_fecha_desde(fecha_desde)
+    hasta = _parse_fecha_hasta(fecha_hasta)
+    frontera = _frontera_archivo(db, desde, hasta)
+    if frontera is None:
+        return q.offset(offset).limit(limit).all()
+
+    recientes = q.filter(RegistroAcceso.fecha_hora > frontera)
+    filas = recientes.offset(offset).limit(limit).all()
+    if len(filas) >= limit:
+        return filas
+
+    total_recientes = offset + len(filas) if filas else recientes.order_by(None).count()
+    saltar = max(0, offset - total_recientes)
+    faltan = limit - len(filas)
+
+    rezagados = q.filter(RegistroAcceso.fecha_hora <= frontera).all()
+    archivados = _eventos_archivados(
+        db, _particiones_en_rango(db, desde, hasta), desde, hasta, tipo, persona_id, documento, resultado
+    )
+    mezcla = heapq.merge(rezagados, archivados, key=lambda ev: ev.fecha_hora, reverse=True)
+    return filas + list(islice(mezcla, saltar, saltar + faltan))
@@ -1,10 +1,102 @@
 """
-Servicio de autorizaciones de visita. HU-04.
+Servicio de autorizaciones de visita. HU-04, HU-13.
+Incluye el índice en memoria de ventanas vigentes consultado por validate_access (HU-05), que cada
+worker actualiza por persona con los avisos de cambio (services/cambios_service.py), y el barrido
+periódico que marca como vencidas las autorizaciones expiradas.
 """
+import asyncio
+import logging
+import threading
 from datetime import datetime
+
 from sqlalchemy.orm import Session
 
+from backend.app.core.config import AUTHORIZATION_SWEEP_SECONDS
+from backend.app.db.database import SessionLocal
 from backend.app.db.models import Autorizacion, Persona, TipoPersona
+from backend.app.services.cambios_service import TIPO_AUTORIZACION, TIPO_PERSONA, registrar_cambio, sincronizador
+
+logger = logging.getLogger(__name__)
+
+
+class IndiceAutorizaciones:
+    """
+    Índice persona → ventanas (fecha_inicio, fecha_fin, id_autorizacion) de autorizaciones vigentes,
+    más el conjunto de visitantes (solo a ellos se les exige autorización).
+    Las listas se reemplazan en cada cambio (copy-on-write): las lecturas no toman el lock.
+    """
+
+    def __init__(self):
+        self._ventanas: dict[int, list[tuple[datetime, datetime, int]]] = {}
+        self._visitantes: set[int] = set()
+        self._lock = threading.Lock()
+        self.cargado = False
+
+    def cargar(self, db: Session) -> None:
+        """Carga visitantes y autorizaciones vigentes no expiradas desde la BD."""
+        visitantes = {row[0] for row in _consulta_visitantes(db).all()}
+        ventanas: dict[int, list[tuple[datetime, datetime, int]]] = {}
+        for aut in _consulta_vigentes(db):
+            ventanas.setdefault(aut.id_persona, []).append((aut.fecha_inicio, aut.fecha_fin, aut.id_autorizacion))
+        with self._lock:
+            self._visitantes = visitantes
+            self._ventanas = ventanas
+            self.cargado = True
+
+    def recargar_persona(self, db: Session, id_persona: int) -> None:
+        """Relee si la persona es visitante y sus autorizaciones vigentes (aviso de cambio de persona o autorización)."""
+        visitante = _consulta_visitantes(db).filter(Persona.id_persona == id_persona).first() is not None
+        ventanas = [
+            (aut.fecha_inicio, aut.fecha_fin, aut.id_autorizacion)
+            for aut in _consulta_vigentes(db).filter(Autorizacion.id_persona == id_persona)
+        ]
+        with self._lock:
+            self._visitantes = self._visitantes | {id_persona} if visitante else self._visitantes - {id_persona}
+            if ventanas:
+                self._ventanas[id_persona] = ventanas
+            else:
+                self._ventanas.pop(id_persona, None)
+
+    def purgar_vencidas(self, ahora: datetime) -> None:
+        with self._lock:
+            self._ventanas = {
+                pid: vigentes
+                for pid, ventanas in self._ventanas.items()
+                if (vigentes := [v for v in ventanas if v[1] >= ahora])
+            }
+
+    def requiere_autorizacion(self, id_persona: int) -> bool:
+        return id_persona in self._visitantes
+
+    def autorizado(self, id_persona: int, ahora: datetime | None = None) -> bool:
+        ahora = ahora or datetime.utcnow()
+        return any(inicio <= ahora <= fin for inicio, fin, _ in self._ventanas.get(id_persona, ()))
+
+
+def _consulta_visitantes(db: Session):
+    return (
+        db.query(Persona.id_persona)
+        .join(TipoPersona, Persona.id_tipo_persona == TipoPersona.id_tipo_persona)
+        .filter(TipoPersona.nombre_tipo == "visitante_temporal")
+    )
+
+
+def _consulta_vigentes(db: Session):
+    return db.query(Autorizacion).filter(Autorizacion.estado == "vigente", Autorizacion.fecha_fin >= datetime.utcnow())
+
+
+indice_autorizaciones = IndiceAutorizaciones()
+
+
+def _aplicar_cambio(db: Session, id_persona: int | None, local: bool) -> None:
+    if id_persona is None:
+        indice_autorizaciones.cargar(db)
+    else:
+        indice_autorizaciones.recargar_persona(db, id_persona)
+
+
+sincronizador.manejar(TIPO_PERSONA, _aplicar_cambio)
+sincronizador.manejar(TIPO_AUTORIZACION, _aplicar_cambio)
 
 
 def crear_autorizacion(
@@ -38,6 +130,58 @@ def crear_autorizacion(
         estado="vigente",
     )
     db.add(aut)
+    registrar_cambio(db, TIPO_AUTORIZACION, id_persona)
     db.commit()
     db.refresh(aut)
     return aut
+
+
+def revocar_autorizacion(db: Session, id_autorizacion: int, motivo: str | None = None) -> Autorizacion:
+    """
+    Revoca una autorización vigente. HU-13. El acceso se bloquea de inmediato en este worker y, en los
+    demás, con su siguiente consulta de avisos de cambio (CACHE_SYNC_INTERVAL_MS).
+    Lanza ValueError si no existe o si no está vigente.
+    """
+    aut = db.query(Autorizacion).filter(Autorizacion.id_autorizacion == id_autorizacion).first()
+    if not aut:
+        raise ValueError("autorizacion_no_encontrada")
+    if aut.estado != "vigente":
+        raise ValueError("autorizacion_no_vigente")
+    aut.estado = "revocada"
+    aut.motivo_revocacion = (motivo or "").strip() or None
+    registrar_cambio(db, TIPO_AUTORIZACION, aut.id_persona)
+    db.commit()
+    db.refresh(aut)
+    return aut
+
+
+def vencer_autorizaciones(db: Session, ahora: datetime | None = None) -> int:
+    """Marca como vencidas, en un solo UPDATE, las autorizaciones vigentes con fecha_fin pasada."""
+    ahora = ahora or datetime.utcnow()
+    total = (
+        db.query(Autorizacion)
+        .filter(Autorizacion.estado == "vigente", Autorizacion.fecha_fin < ahora)
+        .update({Autorizacion.estado: "vencida"}, synchronize_session=False)
+    )
+    db.commit()
+    indice_autorizaciones.purgar_vencidas(ahora)
+    return total
+
+
+def _barrido_nueva_sesion() -> int:
+    db = SessionLocal()
+    try:
+        return vencer_autorizaciones(db)
+    finally:
+        db.close()
+
+
+async def barrer_autorizaciones(intervalo: float = AUTHORIZATION_SWEEP_SECONDS) -> None:
+    """Tarea de fondo: cada intervalo marca como vencidas las autorizaciones expiradas."""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, _barrido_nueva_sesion)
+        except Exception:
+            logger.exception("Falló el barrido de autorizaciones vencidas; se reintenta en %.0f s", intervalo)
+        await asyncio.sleep(intervalo)
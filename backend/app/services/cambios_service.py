@@ -0,0 +1,204 @@
+"""
+Sincronización de las cachés en memoria entre workers y nodos: galería de embeddings (HU-05), índice de
+autorizaciones (HU-04, HU-13) y usuarios autenticados (HU-09).
+
+Quien modifica datos cacheados llama a registrar_cambio(db, tipo, clave) antes del commit: el aviso
+(tabla cambio_cache) se confirma en la misma transacción que el cambio. Tras el commit, el worker que lo
+hizo lo aplica de inmediato; los demás lo leen en su siguiente consulta (cada CACHE_SYNC_INTERVAL_MS,
+una lectura por clave primaria) y actualizan solo lo afectado: la fila de la persona en la galería, sus
+ventanas de autorización, el usuario cacheado. Las cachés se registran con sincronizador.manejar(tipo, f).
+
+generacion = id del último aviso aplicado: todos los workers al día muestran el mismo número (/health).
+Si un worker no pudo consultar durante CACHE_SYNC_MAX_STALENESS_SECONDS (BD caída, proceso detenido),
+recarga todas sus cachés en lugar de confiar en los avisos acumulados.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import CACHE_SYNC_INTERVAL_MS, CACHE_SYNC_MAX_STALENESS_SECONDS
+from backend.app.db.database import SessionLocal
+from backend.app.db.models import CambioCache
+
+logger = logging.getLogger(__name__)
+
+# Tipos de aviso y significado de la clave
+TIPO_PERSONA = "persona"  # id_persona: alta, activación/baja, plantilla o zonas asignadas
+TIPO_ZONA = "zona"  # sin clave: zona creada o modificada (se recarga la galería completa)
+TIPO_AUTORIZACION = "autorizacion"  # id_persona: autorización creada o revocada
+TIPO_USUARIO = "usuario"  # id_usuario: estado o rol cambiado
+
+# Un id saltado (PostgreSQL asigna ids al insertar, no al confirmar) se sigue buscando este tiempo;
+# pasado, era una transacción deshecha
+ESPERA_HUECO_SECONDS = 60
+# Avisos más antiguos que esto se borran (ningún worker al día los necesita)
+RETENCION_CAMBIOS = timedelta(days=1)
+PURGA_CADA_SECONDS = 600
+
+_CLAVE_SESION = "cambios_cache"
+
+
+def registrar_cambio(db: Session, tipo: str, clave: int | None = None) -> None:
+    """Agrega el aviso a la transacción en curso de db; se publica (y se aplica en este worker) con el commit."""
+    db.add(CambioCache(tipo=tipo, clave=clave))
+
+
+class SincronizadorCambios:
+    """Posición en cambio_cache de este proceso y funciones que aplican cada tipo de aviso."""
+
+    def __init__(self):
+        # tipo → funciones (db, clave, local); clave None = recargar todo lo del tipo, local = aviso de este worker
+        self._manejadores: dict[str, list[Callable[[Session, int | None, bool], None]]] = {}
+        self.generacion = 0
+        self.iniciado = False
+        self._huecos: dict[int, float] = {}
+        # Avisos de este worker ya aplicados al confirmar, que la consulta no debe repetir
+        self._propios: set[int] = set()
+        self._ultima_consulta = 0.0
+        self._proxima_purga = 0.0
+        self.aplicados = 0
+        self.resincronizaciones = 0
+        self._lock = threading.Lock()
+
+    def manejar(self, tipo: str, funcion: Callable[[Session, int | None, bool], None]) -> None:
+        self._manejadores.setdefault(tipo, []).append(funcion)
+
+    def iniciar(self, db: Session) -> None:
+        """Parte del último aviso existente. Llamar antes de cargar las cachés (lo anterior ya está en la BD)."""
+        with self._lock:
+            self.generacion = db.query(func.coalesce(func.max(CambioCache.id_cambio), 0)).scalar()
+            self._huecos.clear()
+            self._ultima_consulta = time.monotonic()
+            self.iniciado = True
+
+    def aplicar(self, db: Session, tipo: str, clave: int | None, local: bool = False) -> None:
+        for funcion in self._manejadores.get(tipo, ()):
+            funcion(db, clave, local)
+
+    def resincronizar(self, db: Session) -> None:
+        """Recarga todas las cachés registradas."""
+        for tipo in self._manejadores:
+            self.aplicar(db, tipo, None)
+        self.resincronizaciones += 1
+
+    def consultar(self, db: Session) -> int:
+        """Aplica los avisos nuevos de otros workers. Retorna cuántos aplicó."""
+        if not self.iniciado:
+            self.iniciar(db)
+            return 0
+        with self._lock:
+            ahora = time.monotonic()
+            condicion = CambioCache.id_cambio > self.generacion
+            if self._huecos:
+                condicion = or_(condicion, CambioCache.id_cambio.in_(list(self._huecos)))
+            filas = (
+                db.query(CambioCache.id_cambio, CambioCache.tipo, CambioCache.clave)
+                .filter(condicion)
+                .order_by(CambioCache.id_cambio)
+                .all()
+            )
+            atrasado = ahora - self._ultima_consulta > CACHE_SYNC_MAX_STALENESS_SECONDS
+            aplicados = 0
+            for id_cambio, tipo, clave in filas:
+                if self._huecos.pop(id_cambio, None) is None:
+                    for hueco in range(self.generacion + 1, id_cambio):
+                        self._huecos[hueco] = ahora
+                    self.generacion = id_cambio
+                if atrasado:
+                    continue
+                if id_cambio in self._propios:
+                    self._propios.discard(id_cambio)
+                    continue
+                self.aplicar(db, tipo, clave)
+                aplicados += 1
+            if atrasado:
+                logger.warning(
+                    "Cachés sin sincronizar durante %.1f s: se recargan completas", ahora - self._ultima_consulta
+                )
+                self._propios.clear()
+                self.resincronizar(db)
+            self._huecos = {h: desde for h, desde in self._huecos.items() if ahora - desde < ESPERA_HUECO_SECONDS}
+            self._propios = {p for p in self._propios if p > self.generacion or p in self._huecos}
+            self._ultima_consulta = ahora
+            self.aplicados += aplicados
+        if ahora >= self._proxima_purga:
+            self._proxima_purga = ahora + PURGA_CADA_SECONDS
+            db.query(CambioCache).filter(CambioCache.fecha < datetime.utcnow() - RETENCION_CAMBIOS).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        return aplicados
+
+    def confirmados(self, db: Session, cambios: list[tuple[int, str, int | None]]) -> None:
+        """
+        Aplica en este worker los avisos recién confirmados por una de sus sesiones. Si uno falla, el
+        commit ya está hecho: se registra y lo aplicará la siguiente consulta.
+        """
+        for id_cambio, tipo, clave in cambios:
+            try:
+                self.aplicar(db, tipo, clave, local=True)
+            except Exception:
+                logger.exception("No se pudo aplicar el cambio de caché %s (%s %s)", id_cambio, tipo, clave)
+                continue
+            with self._lock:
+                if id_cambio > self.generacion or id_cambio in self._huecos:
+                    self._propios.add(id_cambio)
+
+    def estado(self) -> dict:
+        return {
+            "generacion": self.generacion,
+            "segundos_desde_consulta": round(time.monotonic() - self._ultima_consulta, 3) if self.iniciado else None,
+            "avisos_aplicados": self.aplicados,
+            "resincronizaciones": self.resincronizaciones,
+        }
+
+
+sincronizador = SincronizadorCambios()
+
+
+@event.listens_for(Session, "after_flush")
+def _recordar_cambios(db: Session, _contexto) -> None:
+    for obj in db.new:
+        if isinstance(obj, CambioCache):
+            db.info.setdefault(_CLAVE_SESION, []).append((obj.id_cambio, obj.tipo, obj.clave))
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_confirmados(db: Session) -> None:
+    cambios = db.info.pop(_CLAVE_SESION, None)
+    if not cambios:
+        return
+    # La sesión que confirmó no puede consultar dentro de este evento: sesión aparte sobre la misma BD
+    with Session(bind=db.get_bind()) as otra:
+        sincronizador.confirmados(otra, cambios)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_cambios(db: Session, transaccion) -> None:
+    if not transaccion.nested:
+        db.info.pop(_CLAVE_SESION, None)
+
+
+def _consulta_nueva_sesion() -> int:
+    db = SessionLocal()
+    try:
+        return sincronizador.consultar(db)
+    finally:
+        db.close()
+
+
+async def sincronizar_cambios(intervalo: float = CACHE_SYNC_INTERVAL_MS / 1000) -> None:
+    """Tarea de fondo por proceso: cada intervalo aplica los avisos de cambio de los demás workers y nodos."""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, _consulta_nueva_sesion)
+        except Exception as e:
+            logger.warning("No se pudieron consultar los cambios de caché: %s", e)
+        await asyncio.sleep(intervalo)
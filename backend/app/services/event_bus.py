@@ -0,0 +1,95 @@
+"""
+Bus de eventos en proceso para notificaciones en vivo (dashboard HU-11 vía SSE).
+
+publish() es seguro desde cualquier hilo (las rutas síncronas corren en el threadpool):
+el mensaje se serializa una sola vez y se entrega a la cola asyncio de cada suscriptor
+con call_soon_threadsafe. Cada cola es acotada; si un cliente lento la llena, se descartan
+los mensajes nuevos y se le envía un "resync" para que recargue el estado completo.
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+from backend.app.core.config import SSE_QUEUE_SIZE, SSE_MAX_SUBSCRIBERS
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(tipo: str, data: dict) -> str:
+    """Formatea un mensaje Server-Sent Events (event + data en una línea JSON)."""
+    return f"event: {tipo}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+MENSAJE_RESYNC = format_sse("resync", {})
+
+
+class Suscriptor:
+    """Cola acotada de un cliente conectado. Solo se consume desde el event loop que la creó."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.descartados = 0
+        self._desfasado = False
+
+    def _ofrecer(self, mensaje: str) -> None:
+        try:
+            self.queue.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            self.descartados += 1
+            self._desfasado = True
+
+    async def get(self) -> str:
+        """Siguiente mensaje; si hubo descartes, primero un resync y se vacía lo pendiente."""
+        if self._desfasado:
+            self._desfasado = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return MENSAJE_RESYNC
+        return await self.queue.get()
+
+
+class EventBus:
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE, max_subscribers: int = SSE_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._suscriptores: set[Suscriptor] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Suscriptor | None:
+        """Registra un suscriptor en el loop actual. Retorna None si se alcanzó max_subscribers."""
+        sub = Suscriptor(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if len(self._suscriptores) >= self.max_subscribers:
+                return None
+            self._suscriptores.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Suscriptor) -> None:
+        with self._lock:
+            self._suscriptores.discard(sub)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._suscriptores)
+
+    def publish(self, tipo: str, data: dict) -> None:
+        """Publica a todos los suscriptores sin bloquear al publicador."""
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        if not suscriptores:
+            return
+        mensaje = format_sse(tipo, data)
+        for sub in suscriptores:
+            try:
+                sub.loop.call_soon_threadsafe(sub._ofrecer, mensaje)
+            except RuntimeError:
+                # Loop cerrado (apagado): el suscriptor se descarta
+                self.unsubscribe(sub)
+
+
+bus = EventBus()
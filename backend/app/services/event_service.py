@@ -1,9 +1,58 @@
 """
 Servicio de registro de eventos de acceso (entrada/salida). HU-06, HU-07.
+Publica cada evento en el bus en vivo (dashboard HU-11) y calcula las métricas del dashboard.
+Con EVENT_WRITE_BEHIND los eventos se confirman por lotes en segundo plano (services/event_writer.py);
+los intentos denegados siempre van por esa vía, con límite de tasa, para no demorar la respuesta.
 """
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from backend.app.db.models import RegistroAcceso
+from backend.app.core.config import (
+    DASHBOARD_STATS_INTERVAL_SECONDS,
+    DENIAL_BURST,
+    DENIAL_RATE_PER_SECOND,
+    EVENT_QUEUE_WAIT_MS,
+    EVENT_WRITE_BEHIND,
+)
+from backend.app.db.database import SessionLectura
+from backend.app.db.models import Persona, RegistroAcceso
+from backend.app.schemas.event import DashboardEstadisticas
+from backend.app.services.event_bus import bus
+from backend.app.services.event_writer import get_event_writer
+
+# Contador de eventos publicados; el difusor de métricas solo recalcula si cambió
+_cambios = 0
+
+
+class LimitadorTasa:
+    """Token bucket: `tasa` eventos por segundo sostenidos con ráfagas de hasta `rafaga`."""
+
+    def __init__(self, tasa: float, rafaga: int):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self._tokens = float(rafaga)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+        self.descartados = 0
+
+    def permitir(self) -> bool:
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.rafaga, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.descartados += 1
+            return False
+
+
+limitador_denegaciones = LimitadorTasa(DENIAL_RATE_PER_SECOND, DENIAL_BURST)
 
 
 def register_entrada(
@@ -23,9 +72,7 @@ def register_entrada(
         resultado="permitido",
         similarity_score=similarity_score,
     )
-    db.add(reg)
-    db.commit()
-    db.refresh(reg)
+    _guardar(db, reg)
     return reg
 
 
@@ -46,7 +93,136 @@ def register_salida(
         resultado="permitido",
         similarity_score=similarity_score,
     )
-    db.add(reg)
-    db.commit()
-    db.refresh(reg)
+    _guardar(db, reg)
     return reg
+
+
+def _guardar(db: Session, reg: RegistroAcceso) -> None:
+    """
+    Persiste el evento: encolado en el escritor diferido si está activo y tiene lugar (reg queda sin
+    id_registro), o commit síncrono. En ambos casos se publica en el bus en vivo.
+    """
+    writer = get_event_writer() if EVENT_WRITE_BEHIND else None
+    if writer is not None:
+        reg.fecha_hora = reg.fecha_hora or datetime.utcnow()
+    # Cola llena (la BD no da abasto): commit en la petición, que así espera a la BD (backpressure)
+    if writer is None or not writer.enqueue(reg, espera=EVENT_QUEUE_WAIT_MS / 1000):
+        db.add(reg)
+        db.commit()
+        db.refresh(reg)
+    publicar_evento(db, reg)
+
+
+def publicar_evento(db: Session, reg: RegistroAcceso) -> None:
+    """Publica un evento registrado en el bus en vivo. Sin suscriptores no hace nada (ni consulta persona)."""
+    global _cambios
+    _cambios += 1
+    if not bus.has_subscribers():
+        return
+    # db.get resuelve desde el identity map si la persona ya se cargó al identificarla
+    persona = reg.persona or (db.get(Persona, reg.id_persona) if reg.id_persona else None)
+    bus.publish("evento", {
+        "id_registro": reg.id_registro,
+        "id_persona": reg.id_persona,
+        "nombre_completo": persona.nombre_completo if persona else None,
+        "tipo_movimiento": reg.tipo_movimiento,
+        "fecha_hora": reg.fecha_hora,
+        "resultado": reg.resultado,
+        "motivo_denegacion": reg.motivo_denegacion,
+        "similarity_score": reg.similarity_score,
+        "metodo_identificacion": reg.metodo_identificacion,
+    })
+
+
+def register_denegacion(
+    db: Session,
+    tipo_movimiento: str,
+    motivo_denegacion: str,
+    similarity_score: float | None = None,
+    id_persona: int | None = None,
+    metodo_identificacion: str = "reconocimiento_facial",
+) -> None:
+    """
+    Registra un intento denegado (resultado=denegado). id_persona es None si no se identificó a nadie.
+    Se encola en el escritor en segundo plano sin fsync ni commit en la petición; por encima de
+    DENIAL_RATE_PER_SECOND (ráfaga DENIAL_BURST) se publica en vivo pero no se persiste.
+    Sin escritor iniciado (scripts) se guarda de forma síncrona.
+    """
+    reg = RegistroAcceso(
+        id_persona=id_persona,
+        tipo_movimiento=tipo_movimiento,
+        metodo_identificacion=metodo_identificacion,
+        fecha_hora=datetime.utcnow(),
+        resultado="denegado",
+        motivo_denegacion=motivo_denegacion,
+        similarity_score=similarity_score,
+    )
+    if limitador_denegaciones.permitir():
+        writer = get_event_writer()
+        if writer is not None:
+            # Con la cola llena se descarta, como el exceso de tasa
+            writer.enqueue(reg, durable=False)
+        else:
+            db.add(reg)
+            db.commit()
+    publicar_evento(db, reg)
+
+
+def calcular_estadisticas(db: Session) -> DashboardEstadisticas:
+    """Métricas del dashboard: personas dentro, accesos permitidos hoy, denegaciones hoy. HU-11."""
+    hoy_inicio = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    accesos_hoy = (
+        db.query(func.count(RegistroAcceso.id_registro))
+        .filter(RegistroAcceso.fecha_hora >= hoy_inicio, RegistroAcceso.resultado == "permitido")
+        .scalar()
+        or 0
+    )
+    denegaciones_hoy = (
+        db.query(func.count(RegistroAcceso.id_registro))
+        .filter(RegistroAcceso.fecha_hora >= hoy_inicio, RegistroAcceso.resultado == "denegado")
+        .scalar()
+        or 0
+    )
+    # Personas cuyo último evento permitido es un ingreso (están "dentro"); los denegados no cuentan
+    subq = (
+        db.query(RegistroAcceso.id_persona, func.max(RegistroAcceso.fecha_hora).label("max_fecha"))
+        .filter(RegistroAcceso.resultado == "permitido")
+        .group_by(RegistroAcceso.id_persona)
+        .subquery()
+    )
+    total_dentro = (
+        db.query(func.count(RegistroAcceso.id_registro))
+        .join(subq, (RegistroAcceso.id_persona == subq.c.id_persona) & (RegistroAcceso.fecha_hora == subq.c.max_fecha))
+        .filter(RegistroAcceso.tipo_movimiento == "ingreso", RegistroAcceso.resultado == "permitido")
+        .scalar()
+        or 0
+    )
+    return DashboardEstadisticas(total_dentro=total_dentro, accesos_hoy=accesos_hoy, denegaciones_hoy=denegaciones_hoy)
+
+
+def _estadisticas_nueva_sesion() -> DashboardEstadisticas:
+    db = SessionLectura()
+    try:
+        return calcular_estadisticas(db)
+    finally:
+        db.close()
+
+
+async def difundir_estadisticas(intervalo: float = DASHBOARD_STATS_INTERVAL_SECONDS) -> None:
+    """
+    Tarea de fondo única por proceso: como máximo una vez por intervalo, si hubo eventos nuevos
+    y hay dashboards conectados, recalcula las métricas y las publica. La carga en BD no depende
+    del número de pantallas abiertas.
+    """
+    loop = asyncio.get_running_loop()
+    visto = _cambios
+    while True:
+        await asyncio.sleep(intervalo)
+        if _cambios == visto or not bus.has_subscribers():
+            continue
+        visto = _cambios
+        try:
+            stats = await loop.run_in_executor(None, _estadisticas_nueva_sesion)
+        except Exception:
+            continue
+        bus.publish("estadisticas", stats.model_dump())
@@ -0,0 +1,397 @@
+"""
+Escritura diferida (write-behind) de eventos de registro_acceso.
+
+enqueue() agrega el evento a un diario local (append-only, una línea JSON por evento, con fsync
+opcional) y lo encola en memoria; un hilo de fondo inserta los eventos por lotes (cada
+EVENT_BATCH_MS o EVENT_BATCH_SIZE eventos) en un solo commit. En la misma transacción se guarda
+el último número de secuencia confirmado del diario (diario_eventos_checkpoint), de modo que al
+arrancar se reinsertan exactamente los eventos del diario que no alcanzaron la BD.
+
+Cada proceso (worker de uvicorn) escribe su propio diario y lo mantiene bloqueado; al arrancar,
+un proceso recupera los diarios que no están bloqueados (su dueño terminó).
+
+Un lote que falla por un error transitorio (BD bloqueada o caída) se reintenta; con cualquier otro error
+(p. ej. clave foránea a una persona borrada) se confirma evento por evento y los que la BD rechaza se
+apartan en <diario>.rechazados para revisión del operador, sin detener los lotes siguientes. Como mucho
+EVENT_QUEUE_MAX eventos esperan confirmación: con la cola llena enqueue() no los acepta y el llamador
+los guarda de forma síncrona.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.app.core.config import (
+    EVENT_BATCH_MS,
+    EVENT_BATCH_SIZE,
+    EVENT_JOURNAL_DIR,
+    EVENT_JOURNAL_FSYNC,
+    EVENT_QUEUE_MAX,
+)
+from backend.app.db.models import CheckpointDiarioEventos, RegistroAcceso
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_EVENTO = (
+    "id_persona",
+    "tipo_movimiento",
+    "metodo_identificacion",
+    "fecha_hora",
+    "resultado",
+    "motivo_denegacion",
+    "similarity_score",
+    "observaciones",
+)
+SUFIJO_DIARIO = ".journal"
+SUFIJO_RECHAZADOS = ".rechazados"
+# Espera entre reintentos si el commit del lote falla (p. ej. BD bloqueada)
+REINTENTO_SEGUNDOS = 0.5
+
+
+def _bloquear(f) -> bool:
+    """Bloqueo exclusivo no bloqueante del archivo. False si otro proceso lo tiene."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _evento_a_dict(reg: RegistroAcceso) -> dict:
+    datos = {c: getattr(reg, c) for c in COLUMNAS_EVENTO}
+    datos["fecha_hora"] = datos["fecha_hora"].isoformat()
+    return datos
+
+
+def _dict_a_evento(datos: dict) -> RegistroAcceso:
+    valores = {c: datos.get(c) for c in COLUMNAS_EVENTO}
+    valores["fecha_hora"] = datetime.fromisoformat(valores["fecha_hora"])
+    return RegistroAcceso(**valores)
+
+
+def _leer_diario(path: Path) -> list[tuple[int, dict]]:
+    """Lee (seq, evento) del diario. Una última línea truncada (caída a mitad de escritura) se ignora."""
+    entradas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                break
+            entradas.append((registro["seq"], registro["evento"]))
+    return entradas
+
+
+def _transitorio(e: Exception) -> bool:
+    """Errores que se resuelven reintentando: BD bloqueada o no disponible, conexión perdida."""
+    return isinstance(e, OperationalError) or (isinstance(e, DBAPIError) and e.connection_invalidated)
+
+
+def _apartar(path: Path, seq: int, evento: dict, error: Exception) -> None:
+    """Agrega un evento rechazado por la BD al archivo de rechazados (una línea JSON, con fsync)."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"seq": seq, "evento": evento, "error": str(error)}, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _sin_confirmar(db: Session, diario: str, entradas: list[tuple[int, dict]]) -> list[tuple[int, dict]]:
+    """Entradas posteriores al checkpoint del diario (un reintento no duplica lo ya confirmado)."""
+    cp = db.get(CheckpointDiarioEventos, diario)
+    confirmado = cp.ultimo_seq if cp else 0
+    return [(seq, ev) for seq, ev in entradas if seq > confirmado]
+
+
+def _confirmar_uno_a_uno(session_factory: sessionmaker, diario: str, entradas: list[tuple[int, dict]], rechazados: Path) -> int:
+    """
+    Confirma cada evento en su propia transacción (con el checkpoint) y aparta en `rechazados` los que
+    la BD no acepta. Un error transitorio se propaga para reintentar. Retorna los eventos apartados.
+    """
+    apartados = 0
+    for seq, ev in entradas:
+        db = session_factory()
+        try:
+            if not _sin_confirmar(db, diario, [(seq, ev)]):
+                continue
+            try:
+                _guardar_checkpoint(db, diario, seq)
+                db.add(_dict_a_evento(ev))
+                db.commit()
+                continue
+            except Exception as e:
+                db.rollback()
+                if _transitorio(e):
+                    raise
+                logger.error("Evento %d del diario %s rechazado por la BD (%s); apartado en %s", seq, diario, e, rechazados.name)
+                _apartar(rechazados, seq, ev, e)
+                apartados += 1
+            _guardar_checkpoint(db, diario, seq)
+            db.commit()
+        finally:
+            db.close()
+    return apartados
+
+
+def _guardar_checkpoint(db: Session, diario: str, seq: int) -> None:
+    cp = db.get(CheckpointDiarioEventos, diario)
+    if cp is None:
+        db.add(CheckpointDiarioEventos(diario=diario, ultimo_seq=seq))
+    else:
+        cp.ultimo_seq = seq
+
+
+def recuperar_diarios(session_factory: sessionmaker, directorio: Path) -> int:
+    """
+    Reinserta los eventos de diarios huérfanos (sin proceso dueño) posteriores a su checkpoint.
+    Borra cada diario recuperado y su checkpoint. Retorna el número de eventos reinsertados.
+    """
+    total = 0
+    for path in sorted(directorio.glob("*" + SUFIJO_DIARIO)):
+        with open(path, "a+", encoding="utf-8") as f:
+            if not _bloquear(f):
+                continue  # diario de un proceso vivo
+            nombre = path.name
+            db = session_factory()
+            try:
+                pendientes = _sin_confirmar(db, nombre, _leer_diario(path))
+                try:
+                    db.add_all(_dict_a_evento(ev) for _, ev in pendientes)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    if _transitorio(e):
+                        raise
+                    rechazados = path.with_suffix(SUFIJO_RECHAZADOS)
+                    logger.exception("Diario %s: la BD rechaza el lote; se recupera evento por evento", nombre)
+                    total -= _confirmar_uno_a_uno(session_factory, nombre, pendientes, rechazados)
+                total += len(pendientes)
+                cp = db.get(CheckpointDiarioEventos, nombre)
+                if cp is not None:
+                    db.delete(cp)
+                    db.commit()
+            finally:
+                db.close()
+        path.unlink(missing_ok=True)
+    return total
+
+
+class EventWriter:
+    """Cola en memoria + diario local + hilo que confirma lotes en la BD."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        directorio: str | Path = EVENT_JOURNAL_DIR,
+        batch_size: int = EVENT_BATCH_SIZE,
+        batch_ms: float = EVENT_BATCH_MS,
+        fsync: bool = EVENT_JOURNAL_FSYNC,
+        max_pendientes: int = EVENT_QUEUE_MAX,
+    ):
+        self.session_factory = session_factory
+        self.directorio = Path(directorio)
+        self.batch_size = batch_size
+        self.batch_segundos = batch_ms / 1000.0
+        self.fsync = fsync
+        self._cola: queue.Queue = queue.Queue()
+        # Cupo de eventos sin confirmar: acotan la cola y la memoria si la BD no da abasto
+        self._cupo = threading.BoundedSemaphore(max_pendientes)
+        self._lock = threading.Lock()
+        # fsync fuera de _lock: un fsync cubre todas las líneas escritas antes de empezar (group commit)
+        self._lock_fsync = threading.Lock()
+        self._sincronizado = 0
+        self._seq = 0
+        self._confirmado = 0
+        self._diario = None
+        self._nombre_diario = ""
+        self._hilo: threading.Thread | None = None
+        self._detener = threading.Event()
+        self.lotes_confirmados = 0
+        self.eventos_confirmados = 0
+        self.eventos_rechazados = 0
+        self.cola_llena = 0
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def start(self) -> None:
+        """Recupera diarios huérfanos, abre el diario propio y arranca el hilo de escritura."""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        recuperados = recuperar_diarios(self.session_factory, self.directorio)
+        if recuperados:
+            logger.warning("Diario de eventos: %d eventos recuperados tras caída", recuperados)
+        self._nombre_diario = f"eventos-{os.getpid()}-{uuid.uuid4().hex[:8]}{SUFIJO_DIARIO}"
+        # Se crea con otro sufijo y se renombra ya bloqueado: otro proceso que arranca no lo toma por huérfano
+        temporal = self.directorio / (self._nombre_diario + ".tmp")
+        self._diario = open(temporal, "a+", encoding="utf-8")
+        _bloquear(self._diario)
+        temporal.rename(self.directorio / self._nombre_diario)
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._hilo.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Confirma lo pendiente, detiene el hilo y borra el diario si todo quedó en la BD."""
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join(timeout)
+        self._hilo = None
+        with self._lock:
+            limpio = self._confirmado == self._seq
+            self._diario.close()
+            if limpio:
+                (self.directorio / self._nombre_diario).unlink(missing_ok=True)
+                db = self.session_factory()
+                try:
+                    cp = db.get(CheckpointDiarioEventos, self._nombre_diario)
+                    if cp is not None:
+                        db.delete(cp)
+                        db.commit()
+                finally:
+                    db.close()
+
+    @property
+    def rechazados(self) -> Path:
+        return self.directorio / (Path(self._nombre_diario).stem + SUFIJO_RECHAZADOS)
+
+    def enqueue(self, reg: RegistroAcceso, durable: bool = True, espera: float = 0.0) -> bool:
+        """
+        Registra el evento en el diario y lo encola para el próximo lote.
+        durable=False omite el fsync (p. ej. intentos denegados): sobrevive a una caída del proceso, no del SO.
+        Si ya hay max_pendientes eventos sin confirmar espera hasta `espera` segundos un lugar; si no
+        lo hay retorna False sin escribir nada (el llamador decide: commit síncrono o descartar).
+        """
+        libre = self._cupo.acquire(timeout=espera) if espera > 0 else self._cupo.acquire(blocking=False)
+        if not libre:
+            self.cola_llena += 1
+            return False
+        datos = _evento_a_dict(reg)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._diario.write(json.dumps({"seq": seq, "evento": datos}, separators=(",", ":")) + "\n")
+            self._diario.flush()
+            self._cola.put((seq, datos))
+        if self.fsync and durable:
+            self._sincronizar(seq)
+        return True
+
+    def _sincronizar(self, seq: int) -> None:
+        """fsync del diario hasta seq. Quien espera el lock suele encontrar su línea ya cubierta por el fsync anterior."""
+        with self._lock_fsync:
+            if self._sincronizado >= seq:
+                return
+            with self._lock:
+                hasta = self._seq
+            os.fsync(self._diario.fileno())
+            self._sincronizado = hasta
+
+    def _tomar_lote(self) -> list[tuple[int, dict]]:
+        try:
+            primero = self._cola.get(timeout=0.2)
+        except queue.Empty:
+            return []
+        lote = [primero]
+        limite = time.monotonic() + self.batch_segundos
+        while len(lote) < self.batch_size:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _confirmar(self, lote: list[tuple[int, dict]]) -> None:
+        db = self.session_factory()
+        try:
+            pendientes = _sin_confirmar(db, self._nombre_diario, lote)
+            if not pendientes:
+                return
+            _guardar_checkpoint(db, self._nombre_diario, lote[-1][0])
+            db.add_all(_dict_a_evento(ev) for _, ev in pendientes)
+            db.commit()
+        finally:
+            db.close()
+
+    def _compactar(self, seq: int) -> None:
+        """Si todo lo escrito en el diario ya está confirmado, lo trunca para que no crezca."""
+        with self._lock:
+            self._confirmado = seq
+            if self._seq == seq and self._diario.tell() > 0:
+                self._diario.truncate(0)
+                self._diario.seek(0)
+
+    def _run(self) -> None:
+        while not (self._detener.is_set() and self._cola.empty()):
+            lote = self._tomar_lote()
+            if not lote:
+                continue
+            apartados = 0
+            while True:
+                try:
+                    try:
+                        self._confirmar(lote)
+                    except Exception as e:
+                        if _transitorio(e):
+                            raise
+                        logger.exception("La BD rechaza el lote de %d eventos; se confirma evento por evento", len(lote))
+                        apartados = _confirmar_uno_a_uno(self.session_factory, self._nombre_diario, lote, self.rechazados)
+                    break
+                except Exception:
+                    # BD no disponible (o el archivo de rechazados no se pudo escribir): nada se pierde, sigue en el diario
+                    logger.exception("Error confirmando lote de %d eventos; reintentando", len(lote))
+                    if self._detener.is_set():
+                        return  # quedan en el diario; se recuperan al arrancar
+                    time.sleep(REINTENTO_SEGUNDOS)
+            self.lotes_confirmados += 1
+            self.eventos_confirmados += len(lote) - apartados
+            self.eventos_rechazados += apartados
+            self._compactar(lote[-1][0])
+            for _ in lote:
+                self._cupo.release()
+
+
+_writer: EventWriter | None = None
+
+
+def get_event_writer() -> EventWriter | None:
+    """Escritor en segundo plano del proceso, o None si no está iniciado."""
+    if _writer is not None and _writer.activo:
+        return _writer
+    return None
+
+
+def start_event_writer(session_factory: sessionmaker) -> EventWriter:
+    global _writer
+    if _writer is None:
+        _writer = EventWriter(session_factory)
+        _writer.start()
+    return _writer
+
+
+def stop_event_writer() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
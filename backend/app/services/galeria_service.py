@@ -0,0 +1,130 @@
+"""
+Galería facial en memoria del proceso, particionada por zona de acceso (HU-05).
+Se construye desde reconocimiento_facial + persona_zona en la primera validación. Los avisos de
+cambio (services/cambios_service.py, de este worker o de otros) actualizan solo la fila de la persona
+(registro, cambio de estado, zonas asignadas); un cambio de zona la reconstruye completa (invalidar()).
+"""
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import FACE_DISTANCE_THRESHOLD, ZONE_FALLBACK_GLOBAL
+from backend.app.db.models import Persona, ReconocimientoFacial, Zona, persona_zona
+from backend.app.ml.gallery import EMBEDDING_DTYPE, FragmentoGaleria, Galeria
+from backend.app.services.cambios_service import TIPO_PERSONA, TIPO_ZONA, sincronizador
+
+
+def _plantillas_activas(db: Session):
+    # Una plantilla por persona: la primera de cada id_persona (mayor calidad_embedding; sin calidad, la más reciente)
+    return (
+        db.query(ReconocimientoFacial.id_persona, ReconocimientoFacial.embedding)
+        .join(Persona, ReconocimientoFacial.id_persona == Persona.id_persona)
+        .filter(ReconocimientoFacial.estado == "activo", Persona.estado == "activo")
+        .order_by(
+            ReconocimientoFacial.id_persona,
+            ReconocimientoFacial.calidad_embedding.is_(None),
+            ReconocimientoFacial.calidad_embedding.desc(),
+            ReconocimientoFacial.id_reconocimiento.desc(),
+        )
+    )
+
+
+def _leer_galeria(db: Session) -> Galeria:
+    rows = []
+    for id_persona, embedding in _plantillas_activas(db):
+        if not rows or rows[-1][0] != id_persona:
+            rows.append((id_persona, embedding))
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    matriz = np.frombuffer(b"".join(r[1] for r in rows), dtype=EMBEDDING_DTYPE)
+    miembros: dict[int, list[int]] = {
+        z[0]: [] for z in db.query(Zona.id_zona).filter(Zona.estado == "activo")
+    }
+    for id_persona, id_zona in db.query(persona_zona.c.id_persona, persona_zona.c.id_zona):
+        if id_zona in miembros:
+            miembros[id_zona].append(id_persona)
+    return Galeria.construir(ids, matriz, miembros)
+
+
+def _leer_persona(db: Session, id_persona: int) -> tuple[np.ndarray | None, list[int]]:
+    """(embedding de la plantilla vigente o None si está inactiva o sin plantilla, zonas asignadas)."""
+    fila = _plantillas_activas(db).filter(ReconocimientoFacial.id_persona == id_persona).first()
+    zonas = [z for (z,) in db.query(persona_zona.c.id_zona).filter(persona_zona.c.id_persona == id_persona)]
+    return (np.frombuffer(fila[1], dtype=EMBEDDING_DTYPE) if fila else None), zonas
+
+
+class CacheGaleria:
+    """
+    Galería vigente + número de generación. invalidar() incrementa la generación; obtener()
+    reconstruye si la galería cargada es de una generación anterior. Las lecturas no toman el lock.
+    """
+
+    def __init__(self):
+        # (generación, galería) se reemplaza de una vez para que las lecturas vean un par consistente
+        self._cargada: tuple[int, Galeria] | None = None
+        self.generacion = 0
+        self._lock = threading.Lock()
+        # Lock aparte: invalidar no espera a una recarga en curso
+        self._lock_generacion = threading.Lock()
+        # Funciones llamadas en cada invalidar() (p. ej. reenviar al servicio de inferencia)
+        self._suscriptores: list = []
+
+    def suscribir(self, funcion) -> None:
+        self._suscriptores.append(funcion)
+
+    def invalidar(self, notificar: bool = True) -> None:
+        with self._lock_generacion:
+            self.generacion += 1
+        if notificar:
+            for funcion in self._suscriptores:
+                funcion()
+
+    def aplicar_persona(self, db: Session, id_persona: int, notificar: bool = True) -> None:
+        """
+        Relee la plantilla y las zonas de la persona y actualiza solo su fila en la galería cargada.
+        Si no hay galería vigente no hace nada: la próxima obtener() la lee completa.
+        """
+        with self._lock:
+            cargada = self._cargada
+            if cargada is not None and cargada[0] == self.generacion:
+                embedding, zonas = _leer_persona(db, id_persona)
+                # Con la generación leída antes: un invalidar() concurrente sigue forzando la recarga
+                self._cargada = (cargada[0], cargada[1].con_persona(id_persona, embedding, zonas))
+        if notificar:
+            for funcion in self._suscriptores:
+                funcion()
+
+    def obtener(self, db: Session) -> Galeria:
+        cargada = self._cargada
+        if cargada is not None and cargada[0] == self.generacion:
+            return cargada[1]
+        with self._lock:
+            cargada = self._cargada
+            if cargada is None or cargada[0] != self.generacion:
+                generacion = self.generacion
+                cargada = (generacion, _leer_galeria(db))
+                self._cargada = cargada
+            return cargada[1]
+
+
+cache_galeria = CacheGaleria()
+
+
+def _aplicar_cambio_persona(db: Session, id_persona: int | None, local: bool) -> None:
+    # Los avisos de otros workers no se reenvían al servicio de inferencia: él también los consulta
+    if id_persona is None:
+        cache_galeria.invalidar(notificar=local)
+    else:
+        cache_galeria.aplicar_persona(db, id_persona, notificar=local)
+
+
+sincronizador.manejar(TIPO_PERSONA, _aplicar_cambio_persona)
+sincronizador.manejar(TIPO_ZONA, lambda db, clave, local: cache_galeria.invalidar(notificar=local))
+
+
+def buscar_coincidencia(galeria: Galeria, fragmento: FragmentoGaleria, embedding: np.ndarray, id_zona: int | None):
+    """Mejor coincidencia en el fragmento de la zona; sin ella y con ZONE_FALLBACK_GLOBAL, en la galería global."""
+    match = fragmento.mejor_coincidencia(embedding, distance_threshold=FACE_DISTANCE_THRESHOLD)
+    if match is None and id_zona is not None and ZONE_FALLBACK_GLOBAL:
+        match = galeria.global_.mejor_coincidencia(embedding, distance_threshold=FACE_DISTANCE_THRESHOLD)
+    return match
@@ -0,0 +1,386 @@
+"""
+Inferencia facial fuera del proceso de la API: servicio local (socket Unix o TCP en localhost) que
+expone get_embedding_from_image y el matching contra la galería, y cliente usado por access_service.
+Protocolo binario en ml/protocolo.py: tramas con id de petición, así cada conexión del pool del cliente
+lleva varias peticiones en vuelo (pipelining) y el servidor las responde en el orden en que terminan.
+
+El servidor tiene su propia galería (cache_galeria de su proceso, leída de la misma BD). Las
+invalidaciones de la galería de la API se reenvían al servicio (INVALIDAR); si el servicio no estaba
+disponible, se reenvía al reconectar.
+El cliente agota el tiempo a INFERENCE_TIMEOUT_MS; tras un fallo el servicio se considera caído durante
+INFERENCE_RETRY_SECONDS y access_service calcula en el proceso (INFERENCE_FALLBACK_LOCAL).
+"""
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.config import (
+    INFERENCE_POOL_SIZE,
+    INFERENCE_RETRY_SECONDS,
+    INFERENCE_SERVICE_URL,
+    INFERENCE_TIMEOUT_MS,
+    INFERENCE_WORKERS,
+)
+from backend.app.ml import inference
+from backend.app.ml.protocolo import (
+    ERROR,
+    OK,
+    OP_EMBEDDING,
+    OP_IDENTIFICAR,
+    OP_INVALIDAR,
+    OP_SALUD,
+    SIN_ROSTRO,
+    ZONA_NO_ENCONTRADA,
+    TramaInvalida,
+    cable_a_embedding,
+    cuerpo_identificar,
+    embedding_a_cable,
+    empaquetar,
+    leer_identificar,
+    leer_respuesta_identificar,
+    leer_trama,
+    leer_trama_async,
+    respuesta_identificar,
+)
+from backend.app.services.cambios_service import sincronizador
+from backend.app.services.galeria_service import buscar_coincidencia, cache_galeria
+
+logger = logging.getLogger(__name__)
+
+# Peticiones en proceso por conexión en el servidor; al llegar al límite deja de leer del socket
+MAX_EN_VUELO = 64
+
+
+def parsear_url(url: str) -> tuple[str, str | tuple[str, int]]:
+    """("unix", ruta) o ("tcp", (host, puerto)). Lanza ValueError("url_inferencia_invalida")."""
+    partes = urlsplit(url)
+    if partes.scheme == "unix" and partes.path:
+        return "unix", partes.path
+    if partes.scheme == "tcp" and partes.hostname and partes.port:
+        return "tcp", (partes.hostname, partes.port)
+    raise ValueError("url_inferencia_invalida")
+
+
+class ErrorInferencia(Exception):
+    """Servicio de inferencia no disponible: conexión rechazada o perdida, tiempo agotado o error del servidor."""
+
+
+class ServidorInferencia:
+    """
+    Atiende conexiones del protocolo binario. El modelo corre en un pool de INFERENCE_WORKERS hilos;
+    el bucle de eventos solo lee y escribe tramas.
+    """
+
+    def __init__(self, session_factory: sessionmaker, workers: int = INFERENCE_WORKERS, embedder=None):
+        self.session_factory = session_factory
+        # Sin embedder, inference.get_embedding_from_image (resuelto en cada llamada)
+        self.embedder = embedder
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="inferencia")
+        self.atendidas = 0
+        self.errores = 0
+        self.conexiones = 0
+
+    def salud(self) -> dict:
+        return {
+            "modelo": inference.MODEL_NAME,
+            "generacion_galeria": cache_galeria.generacion,
+            # Último aviso de cambio aplicado: igual al de la API cuando el servicio está al día
+            "generacion": sincronizador.generacion,
+            "atendidas": self.atendidas,
+            "errores": self.errores,
+            "conexiones": self.conexiones,
+        }
+
+    def _embedding(self, image_bytes: bytes) -> np.ndarray | None:
+        return (self.embedder or inference.get_embedding_from_image)(image_bytes)
+
+    def procesar(self, operacion: int, cuerpo: bytes) -> tuple[int, bytes]:
+        """(estado, cuerpo de respuesta) de una petición. Se ejecuta en el pool de hilos."""
+        if operacion == OP_SALUD:
+            return OK, json.dumps(self.salud()).encode()
+        if operacion == OP_INVALIDAR:
+            # Sin notificar: no se reenvía (el servicio puede compartir INFERENCE_SERVICE_URL con la API)
+            cache_galeria.invalidar(notificar=False)
+            return OK, b""
+        if operacion == OP_EMBEDDING:
+            embedding = self._embedding(cuerpo)
+            return (SIN_ROSTRO, b"") if embedding is None else (OK, embedding_a_cable(embedding))
+        if operacion == OP_IDENTIFICAR:
+            id_zona, imagen = leer_identificar(cuerpo)
+            db = self.session_factory()
+            try:
+                galeria = cache_galeria.obtener(db)
+            finally:
+                db.close()
+            fragmento = galeria.fragmento(id_zona)
+            if fragmento is None:
+                return ZONA_NO_ENCONTRADA, b""
+            embedding = self._embedding(imagen)
+            if embedding is None:
+                return SIN_ROSTRO, b""
+            return OK, respuesta_identificar(embedding, buscar_coincidencia(galeria, fragmento, embedding, id_zona))
+        return ERROR, f"operacion_desconocida: {operacion}".encode()
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Una conexión: lee tramas sin esperar las respuestas y escribe cada respuesta al terminar."""
+        loop = asyncio.get_running_loop()
+        escritura = asyncio.Lock()
+        en_vuelo = asyncio.Semaphore(MAX_EN_VUELO)
+        tareas: set[asyncio.Task] = set()
+        self.conexiones += 1
+
+        async def responder(id_peticion: int, operacion: int, cuerpo: bytes) -> None:
+            try:
+                estado, respuesta = await loop.run_in_executor(self._executor, self.procesar, operacion, cuerpo)
+            except Exception as e:
+                logger.exception("Error atendiendo operación %d del servicio de inferencia", operacion)
+                self.errores += 1
+                estado, respuesta = ERROR, str(e).encode()
+            self.atendidas += 1
+            try:
+                async with escritura:
+                    writer.write(empaquetar(id_peticion, estado, respuesta))
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                en_vuelo.release()
+
+        try:
+            while True:
+                await en_vuelo.acquire()
+                trama = await leer_trama_async(reader)
+                if trama is None:
+                    break
+                tarea = asyncio.create_task(responder(*trama))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+        except (TramaInvalida, ConnectionError) as e:
+            logger.warning("Conexión del servicio de inferencia cerrada: %s", e)
+        finally:
+            if tareas:
+                await asyncio.gather(*tareas, return_exceptions=True)
+            self.conexiones -= 1
+            writer.close()
+
+    async def servir(self, url: str) -> None:
+        """Escucha en url (unix:///ruta.sock o tcp://host:puerto) hasta que se cancele."""
+        tipo, destino = parsear_url(url)
+        if tipo == "unix":
+            Path(destino).unlink(missing_ok=True)
+            servidor = await asyncio.start_unix_server(self.atender, path=destino)
+        else:
+            servidor = await asyncio.start_server(self.atender, host=destino[0], port=destino[1])
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def _conectar(url: str, timeout: float) -> socket.socket:
+    tipo, destino = parsear_url(url)
+    if tipo == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(destino)
+        except OSError:
+            sock.close()
+            raise
+    else:
+        sock = socket.create_connection(destino, timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # El hilo lector bloquea en recv; los tiempos de espera se aplican por petición
+    sock.settimeout(None)
+    return sock
+
+
+class _Conexion:
+    """Una conexión del pool: envía peticiones numeradas y un hilo lector resuelve sus Future por id."""
+
+    def __init__(self, url: str, timeout: float):
+        self.sock = _conectar(url, timeout)
+        self._pendientes: dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.abierta = True
+        threading.Thread(target=self._leer, name="inferencia-cliente", daemon=True).start()
+
+    @property
+    def en_vuelo(self) -> int:
+        return len(self._pendientes)
+
+    def enviar(self, operacion: int, cuerpo: bytes = b"") -> tuple[int, Future]:
+        futuro: Future = Future()
+        with self._lock:
+            if not self.abierta:
+                raise ErrorInferencia("conexion_cerrada")
+            id_peticion = next(self._ids) & 0xFFFFFFFF
+            self._pendientes[id_peticion] = futuro
+            try:
+                self.sock.sendall(empaquetar(id_peticion, operacion, cuerpo))
+            except OSError as e:
+                del self._pendientes[id_peticion]
+                raise ErrorInferencia(str(e)) from e
+        return id_peticion, futuro
+
+    def olvidar(self, id_peticion: int) -> None:
+        """Descarta una petición cuyo tiempo se agotó (su respuesta, si llega, se ignora)."""
+        with self._lock:
+            self._pendientes.pop(id_peticion, None)
+
+    def _leer(self) -> None:
+        try:
+            while True:
+                id_peticion, estado, cuerpo = leer_trama(self.sock)
+                with self._lock:
+                    futuro = self._pendientes.pop(id_peticion, None)
+                if futuro is not None:
+                    futuro.set_result((estado, cuerpo))
+        except (OSError, TramaInvalida) as e:
+            self.cerrar(str(e))
+
+    def cerrar(self, motivo: str = "conexion_cerrada") -> None:
+        with self._lock:
+            self.abierta = False
+            pendientes, self._pendientes = self._pendientes, {}
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        for futuro in pendientes.values():
+            futuro.set_exception(ErrorInferencia(motivo))
+
+
+class ClienteInferencia:
+    """
+    Cliente del servicio de inferencia con un pool de INFERENCE_POOL_SIZE conexiones (creadas al primer uso
+    y reabiertas si se pierden). Cada llamada va por la conexión con menos peticiones en vuelo.
+    Tras un fallo (conexión, tiempo agotado) disponible es False durante INFERENCE_RETRY_SECONDS.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        tamano_pool: int = INFERENCE_POOL_SIZE,
+        timeout_ms: float = INFERENCE_TIMEOUT_MS,
+        reintento_s: float = INFERENCE_RETRY_SECONDS,
+    ):
+        parsear_url(url)
+        self.url = url
+        self.timeout = timeout_ms / 1000.0
+        self.reintento = reintento_s
+        self._conexiones: list[_Conexion | None] = [None] * max(tamano_pool, 1)
+        self._lock = threading.Lock()
+        self._caido_hasta = 0.0
+        self._invalidar_al_conectar = False
+        self.llamadas = 0
+        self.fallos = 0
+
+    @property
+    def disponible(self) -> bool:
+        return time.monotonic() >= self._caido_hasta
+
+    def estadisticas(self) -> dict:
+        return {
+            "llamadas": self.llamadas,
+            "fallos": self.fallos,
+            "disponible": int(self.disponible),
+            "conexiones": sum(1 for c in self._conexiones if c is not None and c.abierta),
+        }
+
+    def _conexion(self) -> _Conexion:
+        with self._lock:
+            libre = None
+            for i, conexion in enumerate(self._conexiones):
+                if conexion is None or not conexion.abierta:
+                    libre = i if libre is None else libre
+                elif conexion.en_vuelo == 0:
+                    return conexion
+            if libre is None:
+                return min(self._conexiones, key=lambda c: c.en_vuelo)
+            conexion = _Conexion(self.url, self.timeout)
+            self._conexiones[libre] = conexion
+            if self._invalidar_al_conectar:
+                # Una invalidación de la galería no llegó mientras el servicio estaba caído
+                conexion.enviar(OP_INVALIDAR)
+                self._invalidar_al_conectar = False
+            return conexion
+
+    def _marcar_caido(self) -> None:
+        self.fallos += 1
+        self._caido_hasta = time.monotonic() + self.reintento
+
+    def _llamar(self, operacion: int, cuerpo: bytes = b"", timeout: float | None = None) -> tuple[int, bytes]:
+        self.llamadas += 1
+        try:
+            conexion = self._conexion()
+            id_peticion, futuro = conexion.enviar(operacion, cuerpo)
+            try:
+                estado, respuesta = futuro.result(timeout or self.timeout)
+            except FuturesTimeout:
+                conexion.olvidar(id_peticion)
+                raise ErrorInferencia("tiempo_agotado")
+        except ErrorInferencia:
+            self._marcar_caido()
+            raise
+        except OSError as e:
+            self._marcar_caido()
+            raise ErrorInferencia(str(e)) from e
+        self._caido_hasta = 0.0
+        if estado == ERROR:
+            raise ErrorInferencia(respuesta.decode("utf-8", errors="replace"))
+        return estado, respuesta
+
+    def embedding(self, image_bytes: bytes) -> np.ndarray | None:
+        """Embedding del rostro de la imagen, o None si no hay exactamente un rostro."""
+        estado, cuerpo = self._llamar(OP_EMBEDDING, image_bytes)
+        return None if estado == SIN_ROSTRO else cable_a_embedding(cuerpo)
+
+    def identificar(self, image_bytes: bytes, id_zona: int | None = None):
+        """
+        (embedding, (id_persona, similitud) o None) buscando en la galería del servicio como
+        access_service. Sin rostro: (None, None). Lanza ValueError("zona_no_encontrada").
+        """
+        estado, cuerpo = self._llamar(OP_IDENTIFICAR, cuerpo_identificar(id_zona, image_bytes))
+        if estado == ZONA_NO_ENCONTRADA:
+            raise ValueError("zona_no_encontrada")
+        if estado == SIN_ROSTRO:
+            return None, None
+        return leer_respuesta_identificar(cuerpo)
+
+    def salud(self, timeout: float | None = None) -> dict:
+        """Estado del servicio (modelo, generación de galería, peticiones atendidas). Lanza ErrorInferencia."""
+        _, cuerpo = self._llamar(OP_SALUD, timeout=timeout)
+        return json.loads(cuerpo)
+
+    def invalidar(self) -> None:
+        """Reenvía la invalidación de la galería sin esperar respuesta; si falla, se reenvía al reconectar."""
+        if not self.disponible:
+            self._invalidar_al_conectar = True
+            return
+        try:
+            self._conexion().enviar(OP_INVALIDAR)
+        except (ErrorInferencia, OSError):
+            self._invalidar_al_conectar = True
+
+    def cerrar(self) -> None:
+        with self._lock:
+            for conexion in self._conexiones:
+                if conexion is not None:
+                    conexion.cerrar()
+            self._conexiones = [None] * len(self._conexiones)
+
+
+cliente_inferencia: ClienteInferencia | None = ClienteInferencia(INFERENCE_SERVICE_URL) if INFERENCE_SERVICE_URL else None
+if cliente_inferencia is not None:
+    cache_galeria.suscribir(cliente_inferencia.invalidar)
@@ -1,10 +1,29 @@
 """
 Servicio de registro de personas (empleados y visitantes). HU-01, HU-03.
+Al registrar se busca el rostro en la galería para detectar la misma cara con otro documento.
+Búsqueda paginada del listado (HU-02) sobre el índice FTS5 persona_fts.
 """
+import base64
+import json
+import logging
+import re
+
+from sqlalchemy import and_, or_, text
 from sqlalchemy.orm import Session
 
 from backend.app.db.models import Persona, ReconocimientoFacial, TipoPersona
-from backend.app.ml.inference import get_embedding_from_image, embedding_to_bytes, MODEL_NAME
+from backend.app.core.config import (
+    DUPLICATE_FACE_MODE,
+    DUPLICATE_SIMILARITY_THRESHOLD,
+    MIN_EMBEDDING_QUALITY,
+)
+from backend.app.core.metrics import etapa
+from backend.app.ml.inference import detectar_rostro, embedding_to_bytes, MODEL_NAME
+from backend.app.ml.quality import evaluar_calidad
+from backend.app.services.cambios_service import TIPO_PERSONA, registrar_cambio
+from backend.app.services.galeria_service import cache_galeria
+
+logger = logging.getLogger(__name__)
 
 
 def get_tipo_persona_id(db: Session, nombre_tipo: str) -> int | None:
@@ -17,6 +36,47 @@ def documento_existe(db: Session, documento: str) -> bool:
     return db.query(Persona).filter(Persona.documento == documento).first() is not None
 
 
+def _embedding_y_calidad(image_bytes: bytes):
+    """
+    Detecta el rostro, evalúa la calidad de la foto y retorna (embedding, calidad 0-1).
+    Lanza ValueError si no hay rostro o si la calidad es menor que MIN_EMBEDDING_QUALITY.
+    """
+    rostro = detectar_rostro(image_bytes)
+    if rostro is None:
+        raise ValueError("rostro_no_detectado")
+    with etapa("calidad"):
+        calidad = evaluar_calidad(rostro.imagen, rostro.area, rostro.confianza)
+    if calidad.total < MIN_EMBEDDING_QUALITY:
+        raise ValueError("calidad_insuficiente")
+    return rostro.embedding, calidad.total
+
+
+def _buscar_duplicado(db: Session, embedding) -> tuple[int, float] | None:
+    """
+    Vecino más cercano del embedding en la galería global (personas activas).
+    Retorna (id_persona, similitud) si supera DUPLICATE_SIMILARITY_THRESHOLD; con
+    DUPLICATE_FACE_MODE=reject lanza ValueError("rostro_duplicado").
+    """
+    if DUPLICATE_FACE_MODE == "off":
+        return None
+    distancia_max = 1.0 / DUPLICATE_SIMILARITY_THRESHOLD - 1.0
+    with etapa("duplicado"):
+        match = cache_galeria.obtener(db).global_.mejor_coincidencia(embedding, distance_threshold=distancia_max)
+    if match is None:
+        return None
+    if DUPLICATE_FACE_MODE == "reject":
+        raise ValueError("rostro_duplicado")
+    return match[0], round(match[1], 4)
+
+
+def _avisar_duplicado(persona: Persona, duplicado: tuple[int, float] | None) -> None:
+    if duplicado:
+        logger.warning(
+            "Persona %s (documento %s) registrada con un rostro similar a la persona %s (similitud %.4f)",
+            persona.id_persona, persona.documento, duplicado[0], duplicado[1],
+        )
+
+
 def registrar_empleado(
     db: Session,
     nombre_completo: str,
@@ -25,11 +85,13 @@ def registrar_empleado(
     area: str | None = None,
     tipo_documento: str = "CC",
     image_bytes: bytes | None = None,
-) -> tuple[Persona, ReconocimientoFacial | None, float | None]:
+) -> tuple[Persona, ReconocimientoFacial | None, float | None, tuple[int, float] | None]:
     """
     Registra un empleado con foto. Genera embedding y persiste persona + reconocimiento_facial.
-    Retorna (persona, reconocimiento_facial, calidad_embedding o None).
-    Lanza ValueError si documento duplicado o si no se detecta un rostro en la foto.
+    Retorna (persona, reconocimiento_facial, calidad_embedding, duplicado), con duplicado = (id_persona,
+    similitud) de una persona activa con el mismo rostro o None.
+    Lanza ValueError si documento duplicado, si no se detecta un rostro, si la foto no alcanza
+    MIN_EMBEDDING_QUALITY o si el rostro ya está registrado (DUPLICATE_FACE_MODE=reject).
     """
     if documento_existe(db, documento):
         raise ValueError("documento_duplicado")
@@ -41,9 +103,8 @@ def registrar_empleado(
     if not image_bytes or len(image_bytes) == 0:
         raise ValueError("foto_requerida")
 
-    embedding = get_embedding_from_image(image_bytes)
-    if embedding is None:
-        raise ValueError("rostro_no_detectado")
+    embedding, calidad = _embedding_y_calidad(image_bytes)
+    duplicado = _buscar_duplicado(db, embedding)
 
     persona = Persona(
         id_tipo_persona=id_tipo,
@@ -58,8 +119,6 @@ def registrar_empleado(
     db.flush()  # para obtener persona.id_persona
 
     embedding_bytes = embedding_to_bytes(embedding)
-    # Calidad opcional: DeepFace no devuelve score directo, se puede dejar None
-    calidad = None
     reco = ReconocimientoFacial(
         id_persona=persona.id_persona,
         embedding=embedding_bytes,
@@ -68,10 +127,14 @@ def registrar_empleado(
         calidad_embedding=calidad,
     )
     db.add(reco)
-    db.commit()
+    # Galería de todos los workers (HU-05)
+    registrar_cambio(db, TIPO_PERSONA, persona.id_persona)
+    with etapa("registro_persona"):
+        db.commit()
     db.refresh(persona)
     db.refresh(reco)
-    return persona, reco, calidad
+    _avisar_duplicado(persona, duplicado)
+    return persona, reco, calidad, duplicado
 
 
 def registrar_visitante(
@@ -83,10 +146,10 @@ def registrar_visitante(
     tipo_documento: str = "CC",
     id_empleado_visitado: int | None = None,
     image_bytes: bytes | None = None,
-) -> tuple[Persona, ReconocimientoFacial | None, float | None]:
+) -> tuple[Persona, ReconocimientoFacial | None, float | None, tuple[int, float] | None]:
     """
     Registra un visitante con foto. Misma lógica que empleado: documento único, embedding Facenet.
-    Retorna (persona, reconocimiento_facial, calidad_embedding o None).
+    Retorna (persona, reconocimiento_facial, calidad_embedding, duplicado).
     """
     if documento_existe(db, documento):
         raise ValueError("documento_duplicado")
@@ -98,9 +161,8 @@ def registrar_visitante(
     if not image_bytes or len(image_bytes) == 0:
         raise ValueError("foto_requerida")
 
-    embedding = get_embedding_from_image(image_bytes)
-    if embedding is None:
-        raise ValueError("rostro_no_detectado")
+    embedding, calidad = _embedding_y_calidad(image_bytes)
+    duplicado = _buscar_duplicado(db, embedding)
 
     persona = Persona(
         id_tipo_persona=id_tipo,
@@ -121,10 +183,98 @@ def registrar_visitante(
         embedding=embedding_bytes,
         modelo_version=MODEL_NAME,
         estado="activo",
-        calidad_embedding=None,
+        calidad_embedding=calidad,
     )
     db.add(reco)
-    db.commit()
+    # Galería e índice de autorizaciones de todos los workers: desde ya se le exige autorización vigente (HU-04)
+    registrar_cambio(db, TIPO_PERSONA, persona.id_persona)
+    with etapa("registro_persona"):
+        db.commit()
     db.refresh(persona)
     db.refresh(reco)
-    return persona, reco, None
+    _avisar_duplicado(persona, duplicado)
+    return persona, reco, calidad, duplicado
+
+
+_fts_disponible: bool | None = None
+
+
+def _usar_fts(db: Session) -> bool:
+    """True si existe persona_fts (SQLite con FTS5; ver migrations/v0005_busqueda_personas)."""
+    global _fts_disponible
+    if _fts_disponible is None:
+        if db.get_bind().dialect.name != "sqlite":
+            # PostgreSQL: ILIKE sobre índices trigram (migrations/v0007_busqueda_personas_postgres)
+            _fts_disponible = False
+            return False
+        try:
+            _fts_disponible = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='persona_fts'")
+            ).first() is not None
+        except Exception:
+            _fts_disponible = False
+    return _fts_disponible
+
+
+def _consulta_fts(termino: str) -> str | None:
+    """'jose per' → '"jose"* "per"*' (todas las palabras, por prefijo). None si no hay palabras."""
+    palabras = re.findall(r"\w+", termino, flags=re.UNICODE)
+    if not palabras:
+        return None
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+def codificar_cursor(persona: Persona) -> str:
+    crudo = json.dumps([persona.nombre_completo, persona.id_persona]).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, int]:
+    """Lanza ValueError('cursor_invalido') si el cursor no es válido."""
+    try:
+        nombre, id_persona = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(nombre), int(id_persona)
+    except Exception:
+        raise ValueError("cursor_invalido")
+
+
+def buscar_personas(
+    db: Session,
+    tipo: str | None = None,
+    estado: str | None = None,
+    q: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+) -> tuple[list[Persona], str | None]:
+    """
+    Lista personas ordenadas por (nombre_completo, id_persona) con paginación por cursor (keyset).
+    q: palabras por prefijo sobre nombre y documento, sin distinguir acentos ni mayúsculas (FTS5);
+    sin FTS5 (o en PostgreSQL) se usa ILIKE. Retorna (personas, cursor siguiente o None si no hay más).
+    """
+    query = db.query(Persona).join(TipoPersona, Persona.id_tipo_persona == TipoPersona.id_tipo_persona)
+    if tipo in ("empleado_propio", "empleado"):
+        query = query.filter(TipoPersona.nombre_tipo == "empleado_propio")
+    elif tipo in ("visitante_temporal", "visitante"):
+        query = query.filter(TipoPersona.nombre_tipo == "visitante_temporal")
+    if estado == "inactivo":
+        query = query.filter(Persona.estado == "inactivo")
+    elif estado != "todos":
+        query = query.filter(Persona.estado == "activo")
+    if q and q.strip():
+        consulta = _consulta_fts(q) if _usar_fts(db) else None
+        if consulta:
+            query = query.filter(Persona.id_persona.in_(
+                text("SELECT rowid FROM persona_fts WHERE persona_fts MATCH :fts").bindparams(fts=consulta)
+            ))
+        else:
+            term = "%" + q.strip() + "%"
+            query = query.filter(or_(Persona.nombre_completo.ilike(term), Persona.documento.ilike(term)))
+    if cursor:
+        nombre, id_persona = decodificar_cursor(cursor)
+        query = query.filter(or_(
+            Persona.nombre_completo > nombre,
+            and_(Persona.nombre_completo == nombre, Persona.id_persona > id_persona),
+        ))
+    personas = query.order_by(Persona.nombre_completo, Persona.id_persona).limit(limit + 1).all()
+    siguiente = codificar_cursor(personas[limit - 1]) if len(personas) > limit else None
+    return personas[:limit], siguiente
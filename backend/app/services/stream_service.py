@@ -0,0 +1,251 @@
+"""
+Ingesta de video de cámaras de puerta (HU-05, HU-06, HU-07).
+Lee un flujo MJPEG (archivo, tubería o la salida de `ffmpeg -f mjpeg -` para RTSP), descarta los
+cuadros sin movimiento, detecta rostros solo cada cierto número de cuadros, los sigue entre cuadros
+por solapamiento (IoU) y valida cada rostro seguido una sola vez con validate_access, usando el
+recorte del rostro como imagen. Así el modelo de embeddings corre una vez por persona que pasa y no
+una vez por cuadro.
+
+Un cuadro que no se puede decodificar se cuenta y se omite. Si el servicio de inferencia no responde
+(ErrorInferencia) se registra y la pista se vuelve a intentar en la siguiente detección; cualquier
+otro error (BD, configuración) detiene el procesamiento.
+"""
+import io
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Iterator
+
+import numpy as np
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from backend.app.ml.inference import detectar_rostros, image_bytes_to_array
+from backend.app.ml.liveness import imagen_reducida
+from backend.app.services.access_service import ValidateAccessResult, validate_access
+from backend.app.services.event_service import register_salida
+from backend.app.services.inferencia_service import ErrorInferencia
+
+logger = logging.getLogger(__name__)
+
+INICIO_JPEG = b"\xff\xd8"
+FIN_JPEG = b"\xff\xd9"
+# Lado de la imagen reducida que usa la compuerta de movimiento y lado de sus celdas
+LADO_MOVIMIENTO = 64
+CELDA_MOVIMIENTO = 8
+
+
+def leer_mjpeg(fuente: BinaryIO, tamano_lectura: int = 65536) -> Iterator[bytes]:
+    """
+    Genera los JPEG de un flujo MJPEG: JPEG concatenados o multipart/x-mixed-replace
+    (las cabeceras entre cuadros se ignoran). Termina al agotarse la fuente.
+    """
+    buffer = b""
+    while True:
+        bloque = fuente.read(tamano_lectura)
+        if not bloque:
+            return
+        buffer += bloque
+        while True:
+            inicio = buffer.find(INICIO_JPEG)
+            if inicio < 0:
+                buffer = buffer[-1:]
+                break
+            fin = buffer.find(FIN_JPEG, inicio + 2)
+            if fin < 0:
+                buffer = buffer[inicio:]
+                break
+            yield buffer[inicio:fin + 2]
+            buffer = buffer[fin + 2:]
+
+
+def iou(a: tuple[int, int, int, int], b: tuple[int, int, int, int]) -> float:
+    """Intersección sobre unión de dos cajas (x, y, w, h)."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class Pista:
+    """Rostro seguido entre cuadros."""
+    id_pista: int
+    caja: tuple[int, int, int, int]
+    vista_en: int
+    apariciones: int = 1
+    intentos: int = 0
+    resultado: ValidateAccessResult | None = None
+
+    @property
+    def resuelta(self) -> bool:
+        return self.resultado is not None and self.resultado.allowed
+
+
+@dataclass
+class Rastreador:
+    """Asociación voraz detección → pista por IoU. Las pistas sin ver en `max_ausencia` cuadros se descartan."""
+    umbral_iou: float = 0.3
+    max_ausencia: int = 15
+    pistas: list[Pista] = field(default_factory=list)
+    _ids: Iterator[int] = field(default_factory=lambda: itertools.count(1))
+
+    def actualizar(self, cajas: list[tuple[int, int, int, int]], cuadro: int) -> list[Pista]:
+        """Asocia las cajas detectadas en `cuadro` y retorna las pistas vistas en él."""
+        libres = list(self.pistas)
+        vistas = []
+        pares = sorted(
+            ((iou(p.caja, c), i, p) for i, c in enumerate(cajas) for p in libres),
+            key=lambda t: t[0],
+            reverse=True,
+        )
+        asignadas: set[int] = set()
+        for valor, i, pista in pares:
+            if valor < self.umbral_iou:
+                break
+            if i in asignadas or pista not in libres:
+                continue
+            pista.caja, pista.vista_en = cajas[i], cuadro
+            pista.apariciones += 1
+            libres.remove(pista)
+            asignadas.add(i)
+            vistas.append(pista)
+        for i, caja in enumerate(cajas):
+            if i not in asignadas:
+                pista = Pista(id_pista=next(self._ids), caja=caja, vista_en=cuadro)
+                self.pistas.append(pista)
+                vistas.append(pista)
+        self.pistas = [p for p in self.pistas if cuadro - p.vista_en <= self.max_ausencia]
+        return vistas
+
+
+@dataclass
+class EstadisticasStream:
+    cuadros: int = 0
+    sin_movimiento: int = 0
+    detecciones: int = 0
+    validaciones: int = 0
+    permitidos: int = 0
+    corruptos: int = 0
+    errores_inferencia: int = 0
+    segundos: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.cuadros / self.segundos if self.segundos else 0.0
+
+
+class ProcesadorStream:
+    """
+    Procesa cuadros de una cámara: compuerta de movimiento → detección cada `deteccion_cada`
+    cuadros → seguimiento → una validación por pista (con hasta `max_intentos` si falla).
+    Una pista se valida cuando lleva `min_apariciones` detecciones (rostro estable frente a la cámara).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        id_zona: int | None = None,
+        salida: bool = False,
+        deteccion_cada: int = 3,
+        umbral_movimiento: float = 2.0,
+        min_apariciones: int = 2,
+        max_intentos: int = 1,
+        margen: float = 0.2,
+        al_validar: Callable[[Pista, ValidateAccessResult], None] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.id_zona = id_zona
+        self.salida = salida
+        self.deteccion_cada = max(deteccion_cada, 1)
+        self.umbral_movimiento = umbral_movimiento
+        self.min_apariciones = min_apariciones
+        self.max_intentos = max_intentos
+        self.margen = margen
+        self.al_validar = al_validar
+        self.rastreador = Rastreador()
+        self.estadisticas = EstadisticasStream()
+        self._anterior: np.ndarray | None = None
+        self._pendiente_deteccion = 0
+
+    def _hay_movimiento(self, jpeg: bytes) -> bool:
+        """
+        Compara con el cuadro anterior por celdas: hay movimiento si alguna celda cambió en promedio
+        más que umbral_movimiento (una persona que entra ocupa una parte pequeña del cuadro).
+        """
+        actual = imagen_reducida(jpeg, LADO_MOVIMIENTO)
+        anterior, self._anterior = self._anterior, actual
+        if anterior is None:
+            return True
+        n = LADO_MOVIMIENTO // CELDA_MOVIMIENTO
+        celdas = np.abs(actual - anterior).reshape(n, CELDA_MOVIMIENTO, n, CELDA_MOVIMIENTO).mean(axis=(1, 3))
+        return float(celdas.max()) >= self.umbral_movimiento
+
+    def _recorte_jpeg(self, imagen_bgr: np.ndarray, caja: tuple[int, int, int, int]) -> bytes:
+        """Recorte del rostro con margen, codificado en JPEG para validate_access."""
+        x, y, w, h = caja
+        mx, my = int(w * self.margen), int(h * self.margen)
+        alto, ancho = imagen_bgr.shape[:2]
+        recorte = imagen_bgr[max(y - my, 0):min(y + h + my, alto), max(x - mx, 0):min(x + w + mx, ancho), ::-1]
+        salida = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(recorte)).save(salida, "JPEG", quality=92)
+        return salida.getvalue()
+
+    def _validar(self, imagen_bgr: np.ndarray, pista: Pista) -> None:
+        db = self.session_factory()
+        try:
+            recorte = self._recorte_jpeg(imagen_bgr, pista.caja)
+            resultado = validate_access(db, recorte, register_entrada_event=not self.salida, id_zona=self.id_zona)
+            if resultado.allowed and self.salida:
+                register_salida(db, id_persona=resultado.person_id, similarity_score=resultado.similarity)
+        finally:
+            db.close()
+        # Solo cuenta el intento si hubo respuesta: con ErrorInferencia la pista se reintenta
+        pista.intentos += 1
+        pista.resultado = resultado
+        self.estadisticas.validaciones += 1
+        self.estadisticas.permitidos += int(resultado.allowed)
+        if self.al_validar:
+            self.al_validar(pista, resultado)
+
+    def procesar(self, numero: int, jpeg: bytes) -> None:
+        self.estadisticas.cuadros += 1
+        hay_pistas = bool(self.rastreador.pistas)
+        try:
+            movimiento = self._hay_movimiento(jpeg)
+        except OSError:  # JPEG corrupto o truncado (PIL.UnidentifiedImageError es un OSError)
+            self.estadisticas.corruptos += 1
+            return
+        if not movimiento and not hay_pistas:
+            self.estadisticas.sin_movimiento += 1
+            return
+        if self._pendiente_deteccion > 0:
+            self._pendiente_deteccion -= 1
+            return
+        self._pendiente_deteccion = self.deteccion_cada - 1
+        try:
+            imagen = image_bytes_to_array(jpeg)
+        except OSError:
+            self.estadisticas.corruptos += 1
+            return
+        cajas = [(r["x"], r["y"], r["w"], r["h"]) for r in detectar_rostros(imagen)]
+        self.estadisticas.detecciones += 1
+        for pista in self.rastreador.actualizar(cajas, numero):
+            if pista.resuelta or pista.intentos >= self.max_intentos or pista.apariciones < self.min_apariciones:
+                continue
+            self._validar(imagen, pista)
+
+    def procesar_flujo(self, fuente: BinaryIO) -> EstadisticasStream:
+        inicio = time.perf_counter()
+        for numero, jpeg in enumerate(leer_mjpeg(fuente)):
+            try:
+                self.procesar(numero, jpeg)
+            except ErrorInferencia as e:
+                self.estadisticas.errores_inferencia += 1
+                logger.warning("Cuadro %d sin validar: servicio de inferencia no disponible (%s)", numero, e)
+        self.estadisticas.segundos = time.perf_counter() - inicio
+        return self.estadisticas
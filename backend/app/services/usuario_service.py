@@ -4,7 +4,7 @@ Servicio de usuarios del sistema. HU-09.
 from sqlalchemy.orm import Session
 
 from backend.app.db.models import UsuarioSistema
-from backend.app.core.security import get_password_hash
+from backend.app.core.security import get_password_hash, verify_password, password_needs_rehash
 
 
 def crear_usuario(
@@ -34,3 +34,20 @@ def crear_usuario(
     db.commit()
     db.refresh(user)
     return user
+
+
+def autenticar(db: Session, nombre_usuario: str, password: str) -> UsuarioSistema | None:
+    """
+    Verifica credenciales (bcrypt). Retorna el usuario activo o None.
+    Si el hash usa un costo distinto a BCRYPT_ROUNDS se rehashea con la contraseña recién validada.
+    Trabajo costoso: se ejecuta en el pool de hashing del login (core.security.pool_hash_login).
+    """
+    user = db.query(UsuarioSistema).filter(UsuarioSistema.nombre_usuario == nombre_usuario).first()
+    if not user or user.estado != "activo":
+        return None
+    if not verify_password(password, user.hash_password):
+        return None
+    if password_needs_rehash(user.hash_password):
+        user.hash_password = get_password_hash(password)
+        db.commit()
+    return user
@@ -0,0 +1,97 @@
+"""
+Servicio de zonas de acceso. Cada zona define el fragmento de galería en que buscan sus puertas
+(POST /access/validate con id_zona). Todo cambio se publica como aviso de caché (services/cambios_service.py):
+crear o modificar una zona reconstruye la galería; asignar o quitar una persona actualiza solo su fila.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.app.db.models import Persona, Zona, persona_zona
+from backend.app.services.cambios_service import TIPO_PERSONA, TIPO_ZONA, registrar_cambio
+
+
+def listar_zonas(db: Session) -> list[tuple[Zona, int]]:
+    """Zonas ordenadas por nombre con su número de personas asignadas."""
+    conteo = (
+        db.query(persona_zona.c.id_zona, func.count().label("total"))
+        .group_by(persona_zona.c.id_zona)
+        .subquery()
+    )
+    rows = (
+        db.query(Zona, func.coalesce(conteo.c.total, 0))
+        .outerjoin(conteo, conteo.c.id_zona == Zona.id_zona)
+        .order_by(Zona.nombre)
+        .all()
+    )
+    return [(z, total) for z, total in rows]
+
+
+def crear_zona(db: Session, nombre: str, descripcion: str | None = None) -> Zona:
+    """Lanza ValueError si el nombre está vacío o ya existe."""
+    nombre = (nombre or "").strip()
+    if not nombre:
+        raise ValueError("nombre_requerido")
+    if db.query(Zona).filter(Zona.nombre == nombre).first():
+        raise ValueError("zona_duplicada")
+    zona = Zona(nombre=nombre, descripcion=(descripcion or "").strip() or None, estado="activo")
+    db.add(zona)
+    registrar_cambio(db, TIPO_ZONA)
+    db.commit()
+    db.refresh(zona)
+    return zona
+
+
+def actualizar_zona(
+    db: Session,
+    id_zona: int,
+    nombre: str | None = None,
+    descripcion: str | None = None,
+    estado: str | None = None,
+) -> Zona:
+    zona = _obtener_zona(db, id_zona)
+    if nombre is not None and nombre.strip() and nombre.strip() != zona.nombre:
+        if db.query(Zona).filter(Zona.nombre == nombre.strip()).first():
+            raise ValueError("zona_duplicada")
+        zona.nombre = nombre.strip()
+    if descripcion is not None:
+        zona.descripcion = descripcion.strip() or None
+    if estado is not None:
+        zona.estado = estado
+    registrar_cambio(db, TIPO_ZONA)
+    db.commit()
+    db.refresh(zona)
+    return zona
+
+
+def personas_de_zona(db: Session, id_zona: int) -> list[Persona]:
+    zona = _obtener_zona(db, id_zona)
+    return sorted(zona.personas, key=lambda p: (p.nombre_completo, p.id_persona))
+
+
+def asignar_persona(db: Session, id_zona: int, id_persona: int) -> None:
+    """Agrega la persona a la zona (idempotente)."""
+    zona = _obtener_zona(db, id_zona)
+    persona = db.query(Persona).filter(Persona.id_persona == id_persona).first()
+    if not persona:
+        raise ValueError("persona_no_encontrada")
+    if persona not in zona.personas:
+        zona.personas.append(persona)
+        registrar_cambio(db, TIPO_PERSONA, id_persona)
+        db.commit()
+
+
+def quitar_persona(db: Session, id_zona: int, id_persona: int) -> None:
+    zona = _obtener_zona(db, id_zona)
+    persona = next((p for p in zona.personas if p.id_persona == id_persona), None)
+    if persona is None:
+        raise ValueError("persona_no_asignada")
+    zona.personas.remove(persona)
+    registrar_cambio(db, TIPO_PERSONA, id_persona)
+    db.commit()
+
+
+def _obtener_zona(db: Session, id_zona: int) -> Zona:
+    zona = db.query(Zona).filter(Zona.id_zona == id_zona).first()
+    if not zona:
+        raise ValueError("zona_no_encontrada")
+    return zona
@@ -0,0 +1 @@
+# Benchmarks de rendimiento (no se ejecutan con pytest): python -m backend.tests.benchmarks.bench_identificacion
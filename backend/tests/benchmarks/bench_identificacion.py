@@ -0,0 +1,214 @@
+"""
+Benchmark de la ruta de identificación (HU-05) con galerías sintéticas de embeddings 128-d.
+
+Mide latencia p50/p95/p99 (ms) y rendimiento (operaciones/s) de:
+  matching_vectorizado   FragmentoGaleria.mejor_coincidencia (galería en memoria)
+  matching_lineal        inference.find_best_match (comparación uno a uno, referencia)
+  carga_galeria          lectura de la galería desde SQLite (galeria_service)
+  validate_e2e           POST /api/v1/access/validate con TestClient (embedder simulado)
+  embedding_real         get_embedding_from_image con DeepFace (solo si está instalado)
+
+Ejecutar desde la raíz:
+  python -m backend.tests.benchmarks.bench_identificacion --salida benchmarks/base.json
+  python -m backend.tests.benchmarks.bench_identificacion --comparar benchmarks/base.json [--tolerancia 0.25]
+Con --comparar el proceso termina con código 1 si algún p95 empeora más que la tolerancia.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+TAMANOS_DEFAULT = [1_000, 10_000, 100_000]
+# find_best_match recorre la galería en Python: con galerías grandes se limita el número de consultas
+MAX_CONSULTAS_LINEAL = 20
+# Diferencias de p95 por debajo de este margen se consideran ruido (mediciones de microsegundos)
+MARGEN_ABSOLUTO_MS = 0.1
+
+
+def medir(fn: Callable[[], object], repeticiones: int, calentamiento: int = 3) -> dict[str, float]:
+    """Ejecuta fn `repeticiones` veces (más calentamiento) y resume la latencia en ms."""
+    for _ in range(calentamiento):
+        fn()
+    tiempos = np.empty(repeticiones)
+    for k in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos[k] = time.perf_counter() - inicio
+    p50, p95, p99 = np.percentile(tiempos, [50, 95, 99]) * 1000.0
+    return {
+        "n": repeticiones,
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "ops_s": round(float(repeticiones / tiempos.sum()), 2),
+    }
+
+
+def _consultas(matriz: np.ndarray, cantidad: int, semilla: int = 1) -> list[np.ndarray]:
+    from backend.tests.benchmarks.simulado import RUIDO_CONSULTA
+
+    rng = np.random.default_rng(semilla)
+    filas = rng.integers(0, len(matriz), size=cantidad)
+    return [matriz[i] + rng.normal(scale=RUIDO_CONSULTA, size=matriz.shape[1]) for i in filas]
+
+
+def bench_matching(n: int, consultas: int) -> dict[str, dict]:
+    from backend.app.core.config import FACE_DISTANCE_THRESHOLD
+    from backend.app.ml.gallery import FragmentoGaleria
+    from backend.app.ml.inference import find_best_match
+    from backend.tests.benchmarks.simulado import galeria_sintetica
+
+    ids, matriz = galeria_sintetica(n)
+    fragmento = FragmentoGaleria(ids, matriz)
+    qs = _consultas(matriz, consultas)
+    it = iter(qs * 2)
+    resultados = {
+        f"matching_vectorizado_{n}": medir(lambda: fragmento.mejor_coincidencia(next(it), FACE_DISTANCE_THRESHOLD), consultas),
+    }
+    candidatos = list(zip(ids.tolist(), matriz))
+    lineal = min(consultas, MAX_CONSULTAS_LINEAL)
+    it_lineal = iter(qs * 2)
+    resultados[f"matching_lineal_{n}"] = medir(
+        lambda: find_best_match(next(it_lineal), candidatos, FACE_DISTANCE_THRESHOLD), lineal, calentamiento=1
+    )
+    return resultados
+
+
+def bench_bd(n: int, consultas: int, client) -> dict[str, dict]:
+    """Siembra la base con n personas y mide la carga de la galería y la validación de punta a punta."""
+    from backend.app.db.database import SessionLocal, engine
+    from backend.app.services.galeria_service import _leer_galeria, cache_galeria
+    from backend.tests.benchmarks.simulado import EmbedderSimulado, galeria_sintetica, imagen_sintetica, instalar_embedder, sembrar_sqlite
+
+    ids, matriz = galeria_sintetica(n)
+    sembrar_sqlite(engine, ids, matriz)
+    cache_galeria.invalidar()
+
+    db = SessionLocal()
+    try:
+        resultados = {f"carga_galeria_{n}": medir(lambda: _leer_galeria(db), 5, calentamiento=1)}
+    finally:
+        db.close()
+
+    embedder = EmbedderSimulado()
+    rng = np.random.default_rng(2)
+    imagenes = []
+    for k, fila in enumerate(rng.integers(0, n, size=consultas)):
+        imagen = imagen_sintetica(k)
+        embedder.asociar(imagen, matriz[fila])
+        imagenes.append(imagen)
+    instalar_embedder(embedder)
+    it = iter(imagenes * 2)
+
+    def validar():
+        r = client.post("/api/v1/access/validate", files={"file": ("rostro.png", next(it), "image/png")})
+        assert r.status_code == 200 and r.json()["allowed"], r.text
+
+    resultados[f"validate_e2e_{n}"] = medir(validar, consultas)
+    return resultados
+
+
+def bench_embedding_real(repeticiones: int) -> dict[str, dict]:
+    from backend.app.ml.inference import get_embedding_from_image
+    from backend.tests.benchmarks.simulado import imagen_sintetica
+
+    imagen = imagen_sintetica(0, lado=160)
+    return {"embedding_real": medir(lambda: get_embedding_from_image(imagen), repeticiones, calentamiento=1)}
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> bool:
+    """Imprime p95 actual vs base por métrica. True si ninguna empeora más que la tolerancia."""
+    ok = True
+    print(f"\n{'métrica':<32} {'base p95':>10} {'actual p95':>11} {'cambio':>8}")
+    for clave, medida in actual["resultados"].items():
+        previa = base.get("resultados", {}).get(clave)
+        if previa is None:
+            print(f"{clave:<32} {'-':>10} {medida['p95_ms']:>11.3f}")
+            continue
+        cambio = medida["p95_ms"] / previa["p95_ms"] - 1.0 if previa["p95_ms"] else 0.0
+        regresion = cambio > tolerancia and medida["p95_ms"] - previa["p95_ms"] > MARGEN_ABSOLUTO_MS
+        ok &= not regresion
+        marca = "  REGRESIÓN" if regresion else ""
+        print(f"{clave:<32} {previa['p95_ms']:>10.3f} {medida['p95_ms']:>11.3f} {cambio:>+8.1%}{marca}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de identificación facial (HU-05).")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS_DEFAULT, help="Tamaños de galería")
+    parser.add_argument("--consultas", type=int, default=200, help="Consultas por medición")
+    parser.add_argument("--sin-e2e", action="store_true", help="Omitir carga desde SQLite y /access/validate")
+    parser.add_argument("--salida", type=Path, help="Guardar resultados en JSON (línea base)")
+    parser.add_argument("--comparar", type=Path, help="JSON de línea base con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento de p95 admitido (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # La configuración se lee al importar: base temporal y diario propio antes de importar la app
+    directorio = Path(tempfile.mkdtemp(prefix="bench-sca-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{directorio / 'bench.db'}"
+    os.environ["EVENT_JOURNAL_DIR"] = str(directorio / "journal")
+    os.environ["ML_PRELOAD"] = "false"
+
+    from backend.tests.benchmarks.simulado import deepface_real_disponible, instalar_deepface_simulado
+
+    real = deepface_real_disponible()
+    instalar_deepface_simulado()
+
+    resultados: dict[str, dict] = {}
+    for n in args.tamanos:
+        print(f"Galería {n}: matching...", flush=True)
+        resultados.update(bench_matching(n, args.consultas))
+
+    if not args.sin_e2e:
+        from fastapi.testclient import TestClient
+        from backend.app.db.database import engine
+        from backend.app.db.migrations import migrar
+
+        migrar(engine, progreso=lambda mensaje: None)
+        from backend.app.main import app
+
+        with TestClient(app) as client:
+            for n in args.tamanos:
+                print(f"Galería {n}: SQLite y /access/validate...", flush=True)
+                resultados.update(bench_bd(n, args.consultas, client))
+
+    if real:
+        print("Embedding con DeepFace...", flush=True)
+        resultados.update(bench_embedding_real(20))
+
+    informe = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "maquina": platform.machine(),
+            "procesador": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "deepface_real": real,
+        },
+        "resultados": resultados,
+    }
+    print(f"\n{'métrica':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for clave, m in resultados.items():
+        print(f"{clave:<32} {m['p50_ms']:>9.3f} {m['p95_ms']:>9.3f} {m['p99_ms']:>9.3f} {m['ops_s']:>10.1f}")
+
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(informe, indent=2), encoding="utf-8")
+        print(f"\nResultados guardados en {args.salida}")
+    if args.comparar:
+        base = json.loads(args.comparar.read_text(encoding="utf-8"))
+        if not comparar(informe, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
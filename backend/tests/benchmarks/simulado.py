@@ -0,0 +1,134 @@
+"""
+Piezas compartidas por benchmarks y pruebas de carga: embedder determinista en lugar de DeepFace,
+imágenes sintéticas y una base SQLite sembrada con una galería de embeddings aleatorios.
+Nada de esto se usa en la aplicación.
+"""
+import hashlib
+import io
+import sys
+import types
+
+import numpy as np
+from PIL import Image
+
+DIMENSION = 128
+# Ruido de las consultas de personas registradas: distancia ~0.05·√128 ≈ 0.57 (similitud ~0.64)
+RUIDO_CONSULTA = 0.05
+
+
+def instalar_deepface_simulado() -> None:
+    """
+    Si DeepFace no está instalado, registra un módulo mínimo: las llamadas directas al modelo fallan con
+    un error explícito (las mediciones usan EmbedderSimulado).
+    """
+    try:
+        import deepface  # noqa: F401
+    except ImportError:
+        modulo = types.ModuleType("deepface")
+
+        class DeepFace:
+            @staticmethod
+            def represent(*args, **kwargs):
+                raise RuntimeError("DeepFace no está instalado; use EmbedderSimulado")
+
+            extract_faces = represent
+
+        modulo.DeepFace = DeepFace
+        sys.modules["deepface"] = modulo
+
+
+def deepface_real_disponible() -> bool:
+    modulo = sys.modules.get("deepface")
+    if modulo is not None:
+        return getattr(modulo, "__file__", None) is not None
+    try:
+        import deepface  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def galeria_sintetica(n: int, semilla: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """(ids 1..n, matriz (n, 128)) de embeddings N(0, 1)."""
+    rng = np.random.default_rng(semilla)
+    return np.arange(1, n + 1, dtype=np.int64), rng.normal(size=(n, DIMENSION))
+
+
+def imagen_sintetica(semilla: int, lado: int = 96) -> bytes:
+    """PNG de ruido simétrico (pasa el prefiltro de vivacidad y tiene calidad suficiente)."""
+    mitad = np.random.default_rng(semilla).random((lado, lado // 2, 3)) * 200 + 28
+    arr = np.concatenate([mitad, mitad[:, ::-1]], axis=1).astype(np.uint8)
+    salida = io.BytesIO()
+    Image.fromarray(arr).save(salida, "PNG")
+    return salida.getvalue()
+
+
+class EmbedderSimulado:
+    """
+    Reemplazo determinista de get_embedding_from_image. Las imágenes asociadas a una persona devuelven
+    su embedding más ruido fijo (coincidencia); las demás, un embedding aleatorio derivado de sus bytes.
+    """
+
+    def __init__(self, ruido: float = RUIDO_CONSULTA):
+        self.ruido = ruido
+        self._conocidas: dict[bytes, np.ndarray] = {}
+
+    @staticmethod
+    def _clave(image_bytes: bytes) -> bytes:
+        return hashlib.sha1(image_bytes).digest()
+
+    def asociar(self, image_bytes: bytes, embedding: np.ndarray) -> None:
+        self._conocidas[self._clave(image_bytes)] = np.asarray(embedding, dtype=np.float64)
+
+    def __call__(self, image_bytes: bytes) -> np.ndarray:
+        clave = self._clave(image_bytes)
+        rng = np.random.default_rng(int.from_bytes(clave[:8], "little"))
+        base = self._conocidas.get(clave)
+        if base is None:
+            return rng.normal(size=DIMENSION)
+        return base + rng.normal(scale=self.ruido, size=DIMENSION)
+
+
+def instalar_embedder(embedder: EmbedderSimulado) -> None:
+    """Usa el embedder simulado en la validación de acceso (HU-05)."""
+    from backend.app.services import access_service
+    access_service.get_embedding_from_image = embedder
+
+
+def sembrar_sqlite(engine, ids: np.ndarray, matriz: np.ndarray) -> None:
+    """
+    Deja la base con el esquema migrado, los tipos de persona y una persona activa con su
+    plantilla por cada embedding (borra personas, plantillas y eventos anteriores).
+    """
+    from backend.app.db.migrations import migrar
+    from backend.app.db.models import Persona, ReconocimientoFacial, RegistroAcceso, TipoPersona
+
+    migrar(engine, progreso=lambda mensaje: None)
+    with engine.begin() as conn:
+        for tabla in (RegistroAcceso, ReconocimientoFacial, Persona, TipoPersona):
+            conn.execute(tabla.__table__.delete())
+        conn.execute(TipoPersona.__table__.insert(), [
+            {"id_tipo_persona": 1, "nombre_tipo": "empleado_propio", "descripcion": "Empleado", "estado": "activo"},
+            {"id_tipo_persona": 2, "nombre_tipo": "visitante_temporal", "descripcion": "Visitante", "estado": "activo"},
+        ])
+        conn.execute(Persona.__table__.insert(), [
+            {
+                "id_persona": int(i),
+                "id_tipo_persona": 1,
+                "nombre_completo": f"Persona {i}",
+                "documento": f"DOC{i}",
+                "tipo_documento": "CC",
+                "estado": "activo",
+            }
+            for i in ids
+        ])
+        conn.execute(ReconocimientoFacial.__table__.insert(), [
+            {
+                "id_persona": int(i),
+                "embedding": fila.astype(np.float64).tobytes(),
+                "modelo_version": "Facenet",
+                "estado": "activo",
+                "calidad_embedding": 0.9,
+            }
+            for i, fila in zip(ids, matriz)
+        ])
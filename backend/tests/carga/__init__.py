@@ -0,0 +1 @@
+# Pruebas de carga (no se ejecutan con pytest): python -m backend.tests.carga.carga_turno
@@ -0,0 +1,342 @@
+"""
+Prueba de carga del cambio de turno: muchas validaciones de acceso a la vez que el dashboard
+consulta métricas y alguien descarga un reporte.
+
+Levanta la API con uvicorn en este proceso sobre una base SQLite temporal sembrada con `--personas`
+personas (embeddings aleatorios) y el modelo facial reemplazado por un embedder determinista.
+Cada cliente (`--concurrencia`) envía peticiones sin pausa durante `--duracion` segundos, eligiendo
+la ruta según la mezcla:
+  validate       POST /api/v1/access/validate (fracción --desconocidos con rostros no registrados)
+  register-exit  POST /api/v1/access/register-exit
+  estadisticas   GET  /api/v1/events/estadisticas
+  dentro         GET  /api/v1/personas/dentro
+  reportes       GET  /api/v1/reportes/accesos (CSV del día)
+
+Informa por ruta: histograma de latencias, p50/p95/p99 y códigos de respuesta. Para contar las
+esperas por bloqueo de SQLite, las conexiones se abren con timeout 0 y el reintento de SQLite
+(busy_timeout) se emula aquí: cada sentencia o commit que encuentra la base bloqueada cuenta una
+espera y se reintenta hasta `--busy-timeout` segundos; si se agota, la petición falla como en producción.
+
+Ejecutar desde la raíz:
+  python -m backend.tests.carga.carga_turno --personas 2000 --concurrencia 32 --duracion 30
+  python -m backend.tests.carga.carga_turno --mezcla validate=70,register-exit=10,estadisticas=12,dentro=6,reportes=2 --write-behind --salida carga.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+MEZCLA_DEFAULT = "validate=60,register-exit=15,estadisticas=15,dentro=8,reportes=2"
+# Bordes superiores (ms) del histograma de latencias
+BORDES_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf")]
+IMAGENES_CONOCIDAS = 300
+IMAGENES_DESCONOCIDAS = 50
+
+
+class EsperasBloqueo:
+    """Esperas por base bloqueada: cuántas operaciones esperaron, cuánto y cuántas agotaron el plazo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duraciones: list[float] = []
+        self.agotadas = 0
+        self.plazo = 5.0
+
+    def registrar(self, segundos: float, agotada: bool) -> None:
+        with self._lock:
+            self.duraciones.append(segundos)
+            self.agotadas += int(agotada)
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.duraciones.clear()
+            self.agotadas = 0
+
+    def resumen(self) -> dict:
+        with self._lock:
+            d = np.array(self.duraciones)
+            agotadas = self.agotadas
+        return {
+            "esperas": int(len(d)),
+            "agotadas": agotadas,
+            "segundos_total": round(float(d.sum()), 4) if len(d) else 0.0,
+            "p95_ms": round(float(np.percentile(d, 95) * 1000), 3) if len(d) else 0.0,
+            "max_ms": round(float(d.max() * 1000), 3) if len(d) else 0.0,
+        }
+
+
+esperas = EsperasBloqueo()
+
+
+def _reintentar(operacion, *args):
+    """Ejecuta la operación reintentando mientras SQLite responda 'database is locked'."""
+    inicio = None
+    pausa = 0.001
+    while True:
+        try:
+            resultado = operacion(*args)
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            ahora = time.perf_counter()
+            inicio = inicio or ahora
+            if ahora - inicio >= esperas.plazo:
+                esperas.registrar(ahora - inicio, agotada=True)
+                raise
+            time.sleep(pausa)
+            pausa = min(pausa * 2, 0.05)
+            continue
+        if inicio is not None:
+            esperas.registrar(time.perf_counter() - inicio, agotada=False)
+        return resultado
+
+
+class CursorMedido(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return _reintentar(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return _reintentar(super().executemany, sql, list(seq_of_parameters))
+
+
+class ConexionMedida(sqlite3.Connection):
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def commit(self):
+        return _reintentar(super().commit)
+
+
+def _mezcla(texto: str) -> dict[str, float]:
+    pesos = {}
+    for parte in texto.split(","):
+        ruta, _, peso = parte.partition("=")
+        if ruta.strip() not in RUTAS:
+            raise SystemExit(f"Ruta desconocida en --mezcla: {ruta!r} (use {', '.join(RUTAS)})")
+        pesos[ruta.strip()] = float(peso or 1)
+    return pesos
+
+
+def _validate(cliente, imagenes):
+    return cliente.post("/api/v1/access/validate", files={"file": ("rostro.png", imagenes.validacion(), "image/png")})
+
+
+def _register_exit(cliente, imagenes):
+    return cliente.post("/api/v1/access/register-exit", files={"file": ("rostro.png", imagenes.conocida(), "image/png")})
+
+
+def _estadisticas(cliente, imagenes):
+    return cliente.get("/api/v1/events/estadisticas")
+
+
+def _dentro(cliente, imagenes):
+    return cliente.get("/api/v1/personas/dentro")
+
+
+def _reportes(cliente, imagenes):
+    hoy = date.today().isoformat()
+    return cliente.get("/api/v1/reportes/accesos", params={"fecha_desde": hoy, "fecha_hasta": hoy, "formato": "csv"})
+
+
+RUTAS = {
+    "validate": _validate,
+    "register-exit": _register_exit,
+    "estadisticas": _estadisticas,
+    "dentro": _dentro,
+    "reportes": _reportes,
+}
+
+
+class Imagenes:
+    """Imágenes sintéticas asociadas al embedder simulado: conocidas (personas sembradas) y desconocidas."""
+
+    def __init__(self, matriz: np.ndarray, desconocidos: float, semilla: int):
+        from backend.tests.benchmarks.simulado import EmbedderSimulado, imagen_sintetica, instalar_embedder
+
+        rng = np.random.default_rng(semilla)
+        self.embedder = EmbedderSimulado()
+        self.conocidas = []
+        for k, fila in enumerate(rng.integers(0, len(matriz), size=IMAGENES_CONOCIDAS)):
+            imagen = imagen_sintetica(k)
+            self.embedder.asociar(imagen, matriz[fila])
+            self.conocidas.append(imagen)
+        self.desconocidas = [imagen_sintetica(IMAGENES_CONOCIDAS + k) for k in range(IMAGENES_DESCONOCIDAS)]
+        self.desconocidos = desconocidos
+        instalar_embedder(self.embedder)
+
+    def conocida(self) -> bytes:
+        return random.choice(self.conocidas)
+
+    def validacion(self) -> bytes:
+        return random.choice(self.desconocidas) if random.random() < self.desconocidos else self.conocida()
+
+
+def _cliente(base_url: str, rutas: list[str], pesos: list[float], imagenes: Imagenes, fin: float, muestras: list):
+    import httpx
+
+    locales = []
+    with httpx.Client(base_url=base_url, timeout=60.0) as cliente:
+        while time.perf_counter() < fin:
+            ruta = random.choices(rutas, pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                estado = RUTAS[ruta](cliente, imagenes).status_code
+            except httpx.HTTPError:
+                estado = 0
+            locales.append((ruta, estado, time.perf_counter() - inicio))
+    muestras.extend(locales)
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _resumen_ruta(latencias: np.ndarray, estados: list[int], segundos: float) -> dict:
+    ms = latencias * 1000.0
+    histograma = np.histogram(ms, bins=[0.0] + BORDES_MS)[0]
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    codigos: dict[str, int] = {}
+    for estado in estados:
+        codigos[str(estado)] = codigos.get(str(estado), 0) + 1
+    return {
+        "peticiones": len(ms),
+        "rps": round(len(ms) / segundos, 2),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "codigos": codigos,
+        "histograma": {f"<={b:g}ms" if b != float("inf") else f">{BORDES_MS[-2]:g}ms": int(c) for b, c in zip(BORDES_MS, histograma)},
+    }
+
+
+def _imprimir(informe: dict) -> None:
+    print(f"\n{'ruta':<14} {'peticiones':>10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  códigos")
+    for ruta, r in informe["rutas"].items():
+        codigos = " ".join(f"{c}:{n}" for c, n in sorted(r["codigos"].items()))
+        print(f"{ruta:<14} {r['peticiones']:>10} {r['rps']:>8.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}  {codigos}")
+    for ruta, r in informe["rutas"].items():
+        print(f"\n{ruta}")
+        maximo = max(r["histograma"].values()) or 1
+        for tramo, n in r["histograma"].items():
+            if n:
+                print(f"  {tramo:>10} {n:>7} {'#' * max(1, round(40 * n / maximo))}")
+    b = informe["sqlite_bloqueos"]
+    print(
+        f"\nSQLite: {b['esperas']} esperas por bloqueo ({b['segundos_total']:.3f} s en total, p95 {b['p95_ms']:.1f} ms, "
+        f"máx {b['max_ms']:.1f} ms), {b['agotadas']} agotaron el plazo"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del cambio de turno (SQLite + embedder simulado).")
+    parser.add_argument("--personas", type=int, default=2000, help="Personas sembradas en la galería")
+    parser.add_argument("--concurrencia", type=int, default=32, help="Clientes simultáneos")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--mezcla", default=MEZCLA_DEFAULT, help="Pesos por ruta: ruta=peso,... (%s)" % ", ".join(RUTAS))
+    parser.add_argument("--desconocidos", type=float, default=0.1, help="Fracción de validaciones con rostros no registrados")
+    parser.add_argument("--write-behind", action="store_true", help="Activar EVENT_WRITE_BEHIND (eventos por lotes)")
+    parser.add_argument("--busy-timeout", type=float, default=5.0, help="Plazo de espera por bloqueo (s), como el timeout de sqlite3")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", type=Path, help="Guardar el informe en JSON")
+    args = parser.parse_args()
+    pesos_mezcla = _mezcla(args.mezcla)
+    random.seed(args.semilla)
+    esperas.plazo = args.busy_timeout
+
+    # La configuración se lee al importar: base temporal y diario propio antes de importar la app
+    directorio = Path(tempfile.mkdtemp(prefix="carga-sca-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{directorio / 'carga.db'}"
+    os.environ["EVENT_JOURNAL_DIR"] = str(directorio / "journal")
+    os.environ["ML_PRELOAD"] = "false"
+    os.environ["EVENT_WRITE_BEHIND"] = "true" if args.write_behind else "false"
+
+    from backend.tests.benchmarks.simulado import galeria_sintetica, instalar_deepface_simulado, sembrar_sqlite
+
+    instalar_deepface_simulado()
+
+    import uvicorn
+
+    from backend.app.db import database
+
+    # Escritor y lector (reportes, dashboard) como en la app, con las conexiones medidas
+    medidas = {"timeout": 0, "factory": ConexionMedida}
+    engine = database.crear_engine(database.DATABASE_URL, connect_args=medidas)
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    database.engine_lectura = database.crear_engine(database.DATABASE_URL, solo_lectura=True, connect_args=medidas)
+    database.SessionLectura.configure(bind=database.engine_lectura)
+
+    print(f"Sembrando {args.personas} personas en {directorio}...", flush=True)
+    ids, matriz = galeria_sintetica(args.personas, args.semilla)
+    sembrar_sqlite(engine, ids, matriz)
+    imagenes = Imagenes(matriz, args.desconocidos, args.semilla)
+
+    from backend.app.main import app
+
+    puerto = _puerto_libre()
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    hilo_servidor = threading.Thread(target=servidor.run, name="uvicorn", daemon=True)
+    hilo_servidor.start()
+    while not servidor.started:
+        time.sleep(0.05)
+    esperas.reiniciar()  # solo cuentan las esperas durante la carga, no las del arranque
+
+    print(f"Carga: {args.concurrencia} clientes durante {args.duracion:g} s, mezcla {args.mezcla}", flush=True)
+    rutas, pesos = list(pesos_mezcla), list(pesos_mezcla.values())
+    muestras: list[tuple[str, int, float]] = []
+    inicio = time.perf_counter()
+    fin = inicio + args.duracion
+    clientes = [
+        threading.Thread(target=_cliente, args=(f"http://127.0.0.1:{puerto}", rutas, pesos, imagenes, fin, muestras))
+        for _ in range(args.concurrencia)
+    ]
+    for c in clientes:
+        c.start()
+    for c in clientes:
+        c.join()
+    segundos = time.perf_counter() - inicio
+    servidor.should_exit = True
+    hilo_servidor.join(15)
+
+    rutas_informe = {}
+    for ruta in rutas:
+        propias = [(estado, lat) for r, estado, lat in muestras if r == ruta]
+        if propias:
+            rutas_informe[ruta] = _resumen_ruta(np.array([lat for _, lat in propias]), [e for e, _ in propias], segundos)
+    informe = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "personas": args.personas,
+            "concurrencia": args.concurrencia,
+            "duracion_s": round(segundos, 2),
+            "mezcla": pesos_mezcla,
+            "desconocidos": args.desconocidos,
+            "write_behind": args.write_behind,
+            "cpus": os.cpu_count(),
+        },
+        "total": {"peticiones": len(muestras), "rps": round(len(muestras) / segundos, 2)},
+        "rutas": rutas_informe,
+        "sqlite_bloqueos": esperas.resumen(),
+    }
+    _imprimir(informe)
+    print(f"\nTotal: {len(muestras)} peticiones, {informe['total']['rps']:.1f} por segundo")
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(informe, indent=2), encoding="utf-8")
+        print(f"Informe guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
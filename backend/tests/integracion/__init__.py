@@ -0,0 +1 @@
+# Pruebas de integración contra PostgreSQL (pytest backend/tests/integracion; ver conftest.py)
@@ -0,0 +1,119 @@
+"""
+PostgreSQL efímero para las pruebas de integración.
+
+Servidor: TEST_POSTGRES_URL (p. ej. postgresql://postgres@127.0.0.1:5432/postgres, usuario con permiso
+CREATE DATABASE) o, si no está definida, un clúster temporal creado con initdb/pg_ctl (del PATH o de
+PG_BIN) en un puerto libre y borrado al terminar. Sin ninguno de los dos las pruebas se saltan.
+Cada sesión de pytest crea una base sca_test_<hex>, le aplica las migraciones y la elimina al final;
+cada prueba empieza con las tablas vacías.
+
+Ejecutar desde la raíz:
+  uv sync --extra postgres
+  uv run --with pytest pytest backend/tests/integracion
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.db.database import crear_engine
+from backend.app.db.migrations import migrar
+
+
+def _binario(nombre: str) -> str | None:
+    carpeta = os.getenv("PG_BIN")
+    if carpeta:
+        ruta = Path(carpeta) / nombre
+        return str(ruta) if ruta.exists() else None
+    return shutil.which(nombre)
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def servidor_postgres():
+    """URL de administración (base postgres) de un servidor donde se pueden crear bases."""
+    pytest.importorskip("psycopg", reason="requiere el extra postgres (uv sync --extra postgres)")
+    url = os.getenv("TEST_POSTGRES_URL")
+    if url:
+        yield url
+        return
+    initdb, pg_ctl = _binario("initdb"), _binario("pg_ctl")
+    if not initdb or not pg_ctl:
+        pytest.skip("sin TEST_POSTGRES_URL ni initdb/pg_ctl en el PATH (o PG_BIN)")
+    datos = tempfile.mkdtemp(prefix="sca_pg_")
+    puerto = _puerto_libre()
+    try:
+        # C.UTF-8: orden por bytes, pero ILIKE/lower() reconocen mayúsculas acentuadas (É, Ñ)
+        subprocess.run(
+            [initdb, "-D", datos, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--locale=C.UTF-8"],
+            check=True, capture_output=True, text=True,
+        )
+        subprocess.run(
+            [pg_ctl, "-D", datos, "-w", "-l", os.path.join(datos, "postgres.log"),
+             "-o", f"-p {puerto} -k {datos} -c listen_addresses=127.0.0.1 -c fsync=off", "start"],
+            check=True, capture_output=True, text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(datos, ignore_errors=True)
+        # p. ej. initdb no se ejecuta como root
+        pytest.skip(f"no se pudo iniciar PostgreSQL temporal: {(e.stderr or e.stdout).strip()}")
+    try:
+        yield f"postgresql://postgres@127.0.0.1:{puerto}/postgres"
+    finally:
+        subprocess.run([pg_ctl, "-D", datos, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(datos, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def url_prueba(servidor_postgres):
+    """Base sca_test_<hex> recién creada y migrada."""
+    nombre = f"sca_test_{uuid.uuid4().hex[:12]}"
+    admin = crear_engine(servidor_postgres)
+    with admin.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"CREATE DATABASE {nombre} ENCODING 'UTF8' TEMPLATE template0"))
+    url = make_url(servidor_postgres).set(database=nombre).render_as_string(hide_password=False)
+    engine = crear_engine(url, statement_timeout_ms=0)
+    migrar(engine, progreso=lambda _: None)
+    engine.dispose()
+    try:
+        yield url
+    finally:
+        with admin.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {nombre} WITH (FORCE)"))
+        admin.dispose()
+
+
+@pytest.fixture(scope="session")
+def engine(url_prueba):
+    engine = crear_engine(url_prueba)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """Sesión sobre la base de prueba; al terminar vacía todas las tablas salvo schema_version."""
+    sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+        with engine.begin() as conn:
+            tablas = conn.execute(text(
+                "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename <> 'schema_version'"
+            )).scalars().all()
+            if tablas:
+                conn.execute(text(f"TRUNCATE {', '.join(tablas)} RESTART IDENTITY CASCADE"))
@@ -0,0 +1,223 @@
+"""
+Integración con PostgreSQL: migraciones, engine (pool, pre-ping, statement_timeout) y las consultas
+que dependen del dialecto (búsqueda de personas, galería desde bytea, archivo de eventos), más
+inserciones concurrentes de eventos desde varios engines como si fueran nodos de API distintos, y
+los avisos de cambio de caché entre nodos (ids de secuencia confirmados fuera de orden).
+"""
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import func, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.db.database import crear_engine
+from backend.app.db.migrations import migrar, version_actual, version_objetivo
+from backend.app.db.models import (
+    Base,
+    Persona,
+    ReconocimientoFacial,
+    RegistroAcceso,
+    RegistroAccesoArchivo,
+    TipoPersona,
+    Zona,
+)
+from backend.app.services import persona_service
+from backend.app.services.archivo_service import archivar_eventos
+from backend.app.services.cambios_service import SincronizadorCambios, registrar_cambio
+from backend.app.services.galeria_service import _leer_galeria
+
+
+def _tipo(db) -> TipoPersona:
+    tipo = TipoPersona(nombre_tipo="empleado_propio", descripcion="Empleado propio de la empresa")
+    db.add(tipo)
+    db.flush()
+    return tipo
+
+
+def _persona(db, tipo: TipoPersona, nombre: str, documento: str) -> Persona:
+    persona = Persona(id_tipo_persona=tipo.id_tipo_persona, nombre_completo=nombre, documento=documento)
+    db.add(persona)
+    db.flush()
+    return persona
+
+
+def test_migraciones_al_dia_e_idempotentes(engine):
+    assert version_actual(engine) == version_objetivo()
+    assert migrar(engine, progreso=lambda _: None) == []
+    with engine.connect() as conn:
+        indices = set(conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'registro_acceso'")).scalars())
+        trgm = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+        persona = set(conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'persona'")).scalars())
+    assert {"ix_registro_acceso_fecha", "ix_registro_acceso_persona_fecha"} <= indices
+    if trgm:
+        assert {"ix_persona_nombre_trgm", "ix_persona_documento_trgm"} <= persona
+
+
+def test_migraciones_cubren_los_modelos(engine):
+    # Las migraciones tienen definiciones propias: cualquier cambio en models.py necesita su migración
+    inspector = inspect(engine)
+    for tabla in Base.metadata.sorted_tables:
+        columnas = {c["name"]: c for c in inspector.get_columns(tabla.name)}
+        assert set(columnas) == set(tabla.columns.keys()), tabla.name
+        for columna in tabla.columns:
+            assert columnas[columna.name]["nullable"] == columna.nullable, f"{tabla.name}.{columna.name}"
+        indices = {i["name"] for i in inspector.get_indexes(tabla.name)}
+        assert {i.name for i in tabla.indexes} <= indices, tabla.name
+
+
+def test_statement_timeout(url_prueba):
+    engine = crear_engine(url_prueba, statement_timeout_ms=200)
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("SHOW statement_timeout")).scalar() == "200ms"
+            with pytest.raises(DBAPIError, match="statement timeout"):
+                conn.execute(text("SELECT pg_sleep(2)"))
+    finally:
+        engine.dispose()
+
+
+def test_pre_ping_reemplaza_conexiones_cerradas(url_prueba, engine):
+    nodo = crear_engine(url_prueba)
+    try:
+        with nodo.connect() as conn:
+            pid = conn.execute(text("SELECT pg_backend_pid()")).scalar()
+        # El servidor cierra la conexión que quedó en el pool (reinicio, failover, idle timeout)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid}).scalar()
+        with nodo.connect() as conn:
+            assert conn.execute(text("SELECT pg_backend_pid()")).scalar() != pid
+    finally:
+        nodo.dispose()
+
+
+def test_buscar_personas_ilike_y_cursor(db, monkeypatch):
+    monkeypatch.setattr(persona_service, "_fts_disponible", None)
+    tipo = _tipo(db)
+    for i, nombre in enumerate(["Ana Pérez", "Luis PÉREZ Gómez", "Carlos Ruiz", "Beatriz Pérez", "Pérez Díaz"]):
+        _persona(db, tipo, nombre, f"10{i}")
+    db.commit()
+
+    todas, siguiente = persona_service.buscar_personas(db, q="pérez", limit=10)
+    assert [p.nombre_completo for p in todas] == ["Ana Pérez", "Beatriz Pérez", "Luis PÉREZ Gómez", "Pérez Díaz"]
+    assert siguiente is None
+    assert [p.documento for p in persona_service.buscar_personas(db, q="102")[0]] == ["102"]
+
+    paginas, cursor = [], None
+    while True:
+        pagina, cursor = persona_service.buscar_personas(db, q="pérez", limit=3, cursor=cursor)
+        paginas.append([p.nombre_completo for p in pagina])
+        if cursor is None:
+            break
+    assert paginas == [["Ana Pérez", "Beatriz Pérez", "Luis PÉREZ Gómez"], ["Pérez Díaz"]]
+
+
+def test_galeria_desde_bytea(db):
+    tipo = _tipo(db)
+    rng = np.random.default_rng(48)
+    embeddings = {}
+    zona = Zona(nombre="Sede norte")
+    db.add(zona)
+    for i in range(3):
+        persona = _persona(db, tipo, f"Persona {i}", f"20{i}")
+        embeddings[persona.id_persona] = rng.normal(size=128)
+        db.add(ReconocimientoFacial(id_persona=persona.id_persona, embedding=embeddings[persona.id_persona].tobytes()))
+        if i == 0:
+            zona.personas.append(persona)
+    db.commit()
+
+    galeria = _leer_galeria(db)
+    assert len(galeria.global_) == 3
+    assert len(galeria.fragmento(zona.id_zona)) == 1
+    for id_persona, embedding in embeddings.items():
+        assert galeria.global_.mejor_coincidencia(embedding, 0.5) == (id_persona, 1.0)
+
+
+def test_galeria_vacia(db):
+    assert len(_leer_galeria(db).global_) == 0
+
+
+def test_eventos_concurrentes_desde_varios_nodos(url_prueba, db):
+    tipo = _tipo(db)
+    id_persona = _persona(db, tipo, "Persona concurrente", "300").id_persona
+    db.commit()
+    nodos = [crear_engine(url_prueba) for _ in range(2)]
+    hilos_por_nodo, eventos_por_hilo = 4, 50
+    errores = []
+
+    def registrar(nodo):
+        sesion = sessionmaker(bind=nodo)()
+        try:
+            for i in range(eventos_por_hilo):
+                sesion.add(RegistroAcceso(
+                    id_persona=id_persona if i % 2 else None,
+                    tipo_movimiento="ingreso",
+                    resultado="permitido" if i % 2 else "denegado",
+                ))
+                sesion.commit()
+        except Exception as e:
+            errores.append(e)
+        finally:
+            sesion.close()
+
+    hilos = [threading.Thread(target=registrar, args=(n,)) for n in nodos for _ in range(hilos_por_nodo)]
+    try:
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+    finally:
+        for n in nodos:
+            n.dispose()
+
+    assert errores == []
+    total = len(nodos) * hilos_por_nodo * eventos_por_hilo
+    assert db.query(func.count(RegistroAcceso.id_registro)).scalar() == total
+    assert db.query(func.count(func.distinct(RegistroAcceso.id_registro))).scalar() == total
+
+
+def test_archivar_eventos(db):
+    tipo = _tipo(db)
+    persona = _persona(db, tipo, "Persona archivo", "400")
+    ahora = datetime(2026, 6, 15, 12, 0)
+    for dias in (200, 190, 100, 1):
+        db.add(RegistroAcceso(
+            id_persona=persona.id_persona,
+            tipo_movimiento="ingreso",
+            resultado="permitido",
+            fecha_hora=ahora - timedelta(days=dias),
+        ))
+    db.commit()
+
+    archivados = archivar_eventos(db, horizonte_dias=90, ahora=ahora)
+    # Corte: inicio del mes de (ahora - 90 días) = 2026-03-01
+    assert archivados == {"2025-11": 1, "2025-12": 1}
+    assert db.query(RegistroAcceso).count() == 2
+    assert db.query(RegistroAccesoArchivo).count() == 2
+
+
+def test_avisos_de_cache_entre_nodos_fuera_de_orden(url_prueba, db):
+    nodo = SincronizadorCambios()
+    vistos = []
+    nodo.manejar("prueba", lambda _db, clave, local: vistos.append((clave, local)))
+    nodo.iniciar(db)
+    otro = crear_engine(url_prueba)
+    lenta, rapida = sessionmaker(bind=otro)(), sessionmaker(bind=otro)()
+    try:
+        # La transacción lenta toma su id de la secuencia primero pero confirma después
+        registrar_cambio(lenta, "prueba", 1)
+        lenta.flush()
+        registrar_cambio(rapida, "prueba", 2)
+        rapida.commit()
+        assert nodo.consultar(db) == 1
+        assert vistos == [(2, False)]
+        lenta.commit()
+        assert nodo.consultar(db) == 1
+        assert vistos == [(2, False), (1, False)]
+        assert nodo.consultar(db) == 0
+    finally:
+        lenta.close()
+        rapida.close()
+        otro.dispose()
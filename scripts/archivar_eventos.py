@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Archiva eventos de registro_acceso más antiguos que el horizonte configurado
+(ARCHIVE_HORIZON_DAYS) en particiones mensuales comprimidas (registro_acceso_archivo).
+Se conserva el último evento de cada persona para HU-14.
+Ejecutar desde la raíz: uv run python scripts/archivar_eventos.py [--dias N] [--vacuum]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from sqlalchemy import text
+
+from backend.app.core.config import ARCHIVE_HORIZON_DAYS, DATABASE_URL
+from backend.app.db.database import SessionLocal, engine
+from backend.app.services.archivo_service import archivar_eventos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivar historial de registro_acceso por mes.")
+    parser.add_argument("--dias", type=int, default=ARCHIVE_HORIZON_DAYS, help="Horizonte en días (default: ARCHIVE_HORIZON_DAYS)")
+    parser.add_argument("--vacuum", action="store_true", help="Ejecutar VACUUM al terminar (SQLite; en PostgreSQL VACUUM ANALYZE de registro_acceso)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        resultado = archivar_eventos(db, horizonte_dias=args.dias)
+    finally:
+        db.close()
+    if not resultado:
+        print("No hay eventos para archivar.")
+    for periodo, total in resultado.items():
+        print(f"  {periodo}: {total} eventos archivados")
+
+    if args.vacuum and DATABASE_URL.startswith("sqlite"):
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+        print("VACUUM completado.")
+    elif args.vacuum and engine.dialect.name == "postgresql":
+        # PostgreSQL: VACUUM no corre dentro de una transacción; ANALYZE actualiza las estadísticas tras el borrado
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE) registro_acceso"))
+        print("VACUUM (ANALYZE) registro_acceso completado.")
+    print("Listo.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Busca en toda la galería rostros registrados en más de una persona (p. ej. la misma cara con dos
+documentos). Compara todas las plantillas activas por bloques y lista los pares con similitud
+>= DUPLICATE_SIMILARITY_THRESHOLD (o --similitud).
+Ejecutar desde la raíz: uv run python scripts/buscar_duplicados.py [--similitud 0.6] [--bloque 2048] [--csv pares.csv]
+"""
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+import numpy as np
+
+from backend.app.core.config import DUPLICATE_SIMILARITY_THRESHOLD
+from backend.app.db.database import SessionLocal
+from backend.app.db.models import Persona, ReconocimientoFacial
+from backend.app.ml.duplicates import pares_duplicados
+from backend.app.ml.gallery import EMBEDDING_DTYPE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buscar rostros duplicados en la galería.")
+    parser.add_argument("--similitud", type=float, default=DUPLICATE_SIMILARITY_THRESHOLD, help="Similitud mínima (default: DUPLICATE_SIMILARITY_THRESHOLD)")
+    parser.add_argument("--bloque", type=int, default=2048, help="Filas por bloque (memoria ~ bloque² x 8 bytes)")
+    parser.add_argument("--incluir-inactivas", action="store_true", help="Incluir personas inactivas")
+    parser.add_argument("--csv", type=Path, help="Escribir los pares en este CSV")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(ReconocimientoFacial.id_persona, ReconocimientoFacial.embedding)
+            .join(Persona, ReconocimientoFacial.id_persona == Persona.id_persona)
+            .filter(ReconocimientoFacial.estado == "activo")
+        )
+        if not args.incluir_inactivas:
+            query = query.filter(Persona.estado == "activo")
+        rows = query.all()
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        matriz = np.frombuffer(b"".join(r[1] for r in rows), dtype=EMBEDDING_DTYPE).reshape(len(rows), -1)
+        print(f"Plantillas: {len(rows)}")
+
+        distancia_max = 1.0 / args.similitud - 1.0
+        # Mejor par por pareja de personas (puede haber varias plantillas por persona)
+        mejores: dict[tuple[int, int], float] = {}
+        for a, b, d in pares_duplicados(ids, matriz, distancia_max, bloque=args.bloque):
+            clave = (min(a, b), max(a, b))
+            mejores[clave] = min(d, mejores.get(clave, d))
+        pares = sorted(((1.0 / (1.0 + d), a, b) for (a, b), d in mejores.items()), reverse=True)
+
+        nombres = {}
+        if pares:
+            involucradas = {p for _, a, b in pares for p in (a, b)}
+            nombres = {
+                p.id_persona: (p.nombre_completo, p.documento)
+                for p in db.query(Persona).filter(Persona.id_persona.in_(involucradas))
+            }
+    finally:
+        db.close()
+
+    if not pares:
+        print("No se encontraron rostros duplicados.")
+    for similitud, a, b in pares:
+        print(f"  {similitud:.4f}  {a} {nombres[a][0]} ({nombres[a][1]})  <->  {b} {nombres[b][0]} ({nombres[b][1]})")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["similitud", "id_persona_a", "nombre_a", "documento_a", "id_persona_b", "nombre_b", "documento_b"])
+            for similitud, a, b in pares:
+                writer.writerow([f"{similitud:.4f}", a, *nombres[a], b, *nombres[b]])
+        print(f"Pares escritos en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Calibra FACE_DISTANCE_THRESHOLD / SIMILARITY_THRESHOLD (HU-05) con datos medidos.
+Calcula las distancias de todos los pares genuinos e impostores y reporta FAR/FRR del umbral actual,
+el EER y el umbral recomendado para cada FAR objetivo. Opcionalmente escribe la curva ROC en CSV.
+
+Fuentes:
+  --imagenes DIR  carpetas etiquetadas: DIR/<persona>/*.jpg (requiere DeepFace; genera embeddings Facenet)
+  --galeria       plantillas guardadas en reconocimiento_facial (impostores: pares de personas distintas;
+                  genuinos: personas con varias plantillas + accesos permitidos de registro_acceso)
+
+Ejecutar desde la raíz: uv run python scripts/calibrar_umbrales.py --galeria --far 0.001 0.0001 [--csv roc.csv]
+"""
+import argparse
+import csv
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+import numpy as np
+
+from backend.app.core.config import FACE_DISTANCE_THRESHOLD, SIMILARITY_THRESHOLD
+from backend.app.ml.calibration import (
+    BINS_DEFAULT,
+    calibrar,
+    distancia_a_similitud,
+    similitud_a_distancia,
+)
+
+EXTENSIONES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def _desde_imagenes(directorio: Path) -> tuple[np.ndarray, np.ndarray]:
+    from backend.app.ml.inference import get_embedding_from_image
+
+    embeddings, etiquetas, fallidas = [], [], 0
+    for carpeta in sorted(p for p in directorio.iterdir() if p.is_dir()):
+        for imagen in sorted(carpeta.iterdir()):
+            if imagen.suffix.lower() not in EXTENSIONES:
+                continue
+            emb = get_embedding_from_image(imagen.read_bytes())
+            if emb is None:
+                fallidas += 1
+                continue
+            embeddings.append(emb)
+            etiquetas.append(carpeta.name)
+    if fallidas:
+        print(f"  {fallidas} imágenes sin un rostro detectable (omitidas)")
+    return np.array(embeddings), np.array(etiquetas)
+
+
+def _desde_galeria(dias_registro: int | None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    from backend.app.db.database import SessionLocal
+    from backend.app.db.models import ReconocimientoFacial, RegistroAcceso
+    from backend.app.ml.gallery import EMBEDDING_DTYPE
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ReconocimientoFacial.id_persona, ReconocimientoFacial.embedding)
+            .filter(ReconocimientoFacial.estado == "activo")
+            .all()
+        )
+        etiquetas = np.array([r[0] for r in rows], dtype=np.int64)
+        embeddings = np.frombuffer(b"".join(r[1] for r in rows), dtype=EMBEDDING_DTYPE).reshape(len(rows), -1)
+        genuinas = np.empty(0)
+        if dias_registro is not None:
+            query = db.query(RegistroAcceso.similarity_score).filter(
+                RegistroAcceso.resultado == "permitido",
+                RegistroAcceso.metodo_identificacion == "reconocimiento_facial",
+                RegistroAcceso.similarity_score.isnot(None),
+                RegistroAcceso.similarity_score > 0,
+            )
+            if dias_registro > 0:
+                query = query.filter(RegistroAcceso.fecha_hora >= datetime.utcnow() - timedelta(days=dias_registro))
+            scores = np.array([r[0] for r in query], dtype=np.float64)
+            genuinas = 1.0 / scores - 1.0
+    finally:
+        db.close()
+    return embeddings, etiquetas, genuinas
+
+
+def _pct(x: float) -> str:
+    return f"{x * 100:.4f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrar umbrales de reconocimiento facial (FAR/FRR/ROC).")
+    fuente = parser.add_mutually_exclusive_group(required=True)
+    fuente.add_argument("--imagenes", type=Path, help="Directorio con una carpeta de imágenes por persona")
+    fuente.add_argument("--galeria", action="store_true", help="Usar las plantillas guardadas y el registro de accesos")
+    parser.add_argument("--far", type=float, nargs="+", default=[0.01, 0.001, 0.0001], help="FAR objetivo (uno o varios)")
+    parser.add_argument("--dias-registro", type=int, default=30, help="Con --galeria: días de accesos permitidos a usar como genuinos (0 = todos)")
+    parser.add_argument("--sin-registro", action="store_true", help="Con --galeria: no usar registro_acceso")
+    parser.add_argument("--bins", type=int, default=BINS_DEFAULT, help="Resolución de la curva (umbrales evaluados)")
+    parser.add_argument("--csv", type=Path, help="Escribir la curva (umbral, similitud, FAR, FRR, TAR) en este CSV")
+    args = parser.parse_args()
+
+    genuinas_extra = None
+    if args.imagenes:
+        embeddings, etiquetas = _desde_imagenes(args.imagenes)
+    else:
+        embeddings, etiquetas, genuinas_extra = _desde_galeria(None if args.sin_registro else args.dias_registro)
+    if len(embeddings) < 2:
+        print("Se necesitan al menos 2 embeddings.")
+        sys.exit(1)
+
+    curvas = calibrar(embeddings, etiquetas, distancias_genuinas_extra=genuinas_extra, bins=args.bins)
+    print(f"Embeddings: {len(embeddings)}  personas: {len(np.unique(etiquetas))}")
+    print(f"Pares genuinos: {curvas.total_genuinos}  pares impostores: {curvas.total_impostores}")
+    if genuinas_extra is not None and len(genuinas_extra):
+        print(f"  incluye {len(genuinas_extra)} accesos permitidos del registro (solo aceptados: el FRR queda subestimado)")
+    if not curvas.total_genuinos:
+        print("  sin pares genuinos: el FRR no es medible (use --imagenes con varias fotos por persona)")
+
+    # SIMILARITY_THRESHOLD es otra forma de limitar la distancia; rige el más estricto de los dos
+    umbral_actual = min(FACE_DISTANCE_THRESHOLD, similitud_a_distancia(SIMILARITY_THRESHOLD))
+    far, frr = curvas.punto(umbral_actual)
+    print(f"\nActual: distancia <= {umbral_actual:.4f}  FAR {_pct(far)}  FRR {_pct(frr)}")
+    umbral_eer, tasa_eer = curvas.eer()
+    print(f"EER: {_pct(tasa_eer)} en distancia {umbral_eer:.4f}")
+
+    print("\nFAR objetivo   distancia   similitud   FAR real     FRR")
+    for objetivo in args.far:
+        rec = curvas.umbral_para_far(objetivo)
+        if rec is None:
+            print(f"{objetivo:<14g} sin umbral que lo cumpla")
+            continue
+        umbral, far, frr = rec
+        # Redondeo hacia abajo: la similitud mínima sugerida no debe ser más estricta que la distancia
+        similitud = float(np.floor(distancia_a_similitud(umbral) * 1e4) / 1e4)
+        print(f"{objetivo:<14g} {umbral:<11.4f} {similitud:<11.4f} {_pct(far):<12} {_pct(frr)}")
+        print(f"               → FACE_DISTANCE_THRESHOLD={umbral:.4f} SIMILARITY_THRESHOLD={similitud:.4f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["umbral_distancia", "similitud", "far", "frr", "tar"])
+            similitudes = distancia_a_similitud(curvas.umbrales)
+            for umbral, similitud, far, frr in zip(curvas.umbrales, similitudes, curvas.far, curvas.frr):
+                writer.writerow([f"{umbral:.6f}", f"{similitud:.6f}", f"{far:.8f}", f"{frr:.8f}", f"{1 - frr:.8f}"])
+        print(f"\nCurva escrita en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Inicializar base de datos SQLite: crear tablas y datos semilla (tipo_persona, usuario admin).
+Inicializar base de datos (SQLite o PostgreSQL según DATABASE_URL): crear tablas (migraciones, ver scripts/migrar.py) y datos semilla (tipo_persona, usuario admin).
 Ejecutar desde la raíz del proyecto: uv run python scripts/init_db.py
 """
 import sys
@@ -11,7 +11,7 @@ root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(root))
 
 from backend.app.db.database import init_db, SessionLocal
-from backend.app.db.models import Base, TipoPersona, UsuarioSistema
+from backend.app.db.models import TipoPersona, UsuarioSistema
 from backend.app.core.security import get_password_hash
 
 
@@ -46,9 +46,9 @@ def seed_admin(db):
 
 
 def main():
-    print("Inicializando base de datos SQLite...")
+    print("Inicializando base de datos...")
     init_db()
-    print("  Tablas creadas.")
+    print("  Esquema al día.")
     db = SessionLocal()
     try:
         seed_tipos_persona(db)
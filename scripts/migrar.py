@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Aplica las migraciones pendientes del esquema (backend/app/db/migrations) y registra cada versión en
+schema_version. Ejecutar una vez por despliegue, antes de arrancar los workers de la API; las
+reconstrucciones de tablas grandes copian por lotes e informan el avance.
+Ejecutar desde la raíz: uv run python scripts/migrar.py [--estado]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from backend.app.core.config import DATABASE_URL
+from backend.app.db.database import crear_engine
+from backend.app.db.migrations import migraciones, migrar, version_actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplicar migraciones del esquema de la BD.")
+    parser.add_argument("--estado", action="store_true", help="Solo mostrar la versión actual y las migraciones pendientes")
+    args = parser.parse_args()
+
+    # Sin statement_timeout: crear índices o copiar tablas grandes puede superar el límite de la API
+    engine = crear_engine(DATABASE_URL, statement_timeout_ms=0)
+    actual = version_actual(engine)
+    print(f"Versión del esquema: {actual}")
+    if args.estado:
+        for m in migraciones():
+            print(f"  {m.VERSION:04d} {'aplicada ' if m.VERSION <= actual else 'pendiente'}  {m.DESCRIPCION}")
+        return
+    aplicadas = migrar(engine, progreso=lambda mensaje: print(f"  {mensaje}", flush=True))
+    if aplicadas:
+        print(f"Aplicadas {len(aplicadas)} migraciones; versión {aplicadas[-1]}.")
+    else:
+        print("Sin migraciones pendientes.")
+
+
+if __name__ == "__main__":
+    main()
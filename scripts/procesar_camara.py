@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Procesa el video de una cámara de puerta: detecta y sigue rostros y valida cada persona una vez
+(registra ingreso, salida o intento denegado como POST /access/validate).
+La fuente es un flujo MJPEG: un archivo, o "-" para leer de la entrada estándar. Para una cámara RTSP:
+  ffmpeg -loglevel error -i rtsp://camara/stream -f mjpeg -q:v 5 - | uv run python scripts/procesar_camara.py - --zona 1
+Ejecutar desde la raíz: uv run python scripts/procesar_camara.py FUENTE [--zona ID] [--salida]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from backend.app.db.database import SessionLocal
+from backend.app.services.stream_service import ProcesadorStream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validar acceso desde un flujo MJPEG de cámara.")
+    parser.add_argument("fuente", help='Archivo MJPEG o "-" para la entrada estándar')
+    parser.add_argument("--zona", type=int, default=None, help="id_zona de la puerta")
+    parser.add_argument("--salida", action="store_true", help="Cámara de salida: registra salidas (HU-07)")
+    parser.add_argument("--deteccion-cada", type=int, default=3, help="Detectar rostros cada N cuadros con movimiento")
+    parser.add_argument("--umbral-movimiento", type=float, default=2.0, help="Diferencia media (0-255) entre cuadros para considerar movimiento")
+    parser.add_argument("--intentos", type=int, default=1, help="Validaciones máximas por rostro seguido si la primera falla")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def al_validar(pista, resultado):
+        estado = "PERMITIDO" if resultado.allowed else "denegado"
+        print(f"  pista {pista.id_pista}: {estado} persona={resultado.person_id} similitud={resultado.similarity} ({resultado.reason})", flush=True)
+
+    procesador = ProcesadorStream(
+        SessionLocal,
+        id_zona=args.zona,
+        salida=args.salida,
+        deteccion_cada=args.deteccion_cada,
+        umbral_movimiento=args.umbral_movimiento,
+        max_intentos=args.intentos,
+        al_validar=al_validar,
+    )
+    fuente = sys.stdin.buffer if args.fuente == "-" else open(args.fuente, "rb")
+    try:
+        stats = procesador.procesar_flujo(fuente)
+    except ValueError as e:
+        if str(e) != "zona_no_encontrada":
+            raise
+        print(f"Zona no encontrada: {args.zona}")
+        sys.exit(1)
+    finally:
+        if fuente is not sys.stdin.buffer:
+            fuente.close()
+    print(
+        f"Cuadros: {stats.cuadros} ({stats.fps:.1f} fps)  sin movimiento: {stats.sin_movimiento}  "
+        f"detecciones: {stats.detecciones}  validaciones: {stats.validaciones}  permitidos: {stats.permitidos}  "
+        f"corruptos: {stats.corruptos}  errores de inferencia: {stats.errores_inferencia}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Servicio local de inferencia facial: carga DeepFace una vez y atiende embeddings e identificación
+(embedding + matching contra la galería de la BD) por un socket Unix o TCP en localhost, con el
+protocolo binario de backend/app/ml/protocolo.py. La API lo usa con INFERENCE_SERVICE_URL.
+
+Ejecutar desde la raíz: uv run python scripts/servicio_inferencia.py [--url unix:///run/sca/inferencia.sock] [--workers 2]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from backend.app.core.config import CACHE_SYNC_INTERVAL_MS, INFERENCE_SERVICE_URL, INFERENCE_WORKERS
+from backend.app.db.database import SessionLocal
+from backend.app.ml.inference import precargar_modelo
+from backend.app.services.cambios_service import sincronizador, sincronizar_cambios
+from backend.app.services.inferencia_service import ServidorInferencia, parsear_url
+
+
+async def servir(servidor: ServidorInferencia, url: str) -> None:
+    # La galería del servicio sigue los avisos de cambio igual que la de cada worker de la API
+    tarea = asyncio.create_task(sincronizar_cambios()) if CACHE_SYNC_INTERVAL_MS > 0 else None
+    try:
+        await servidor.servir(url)
+    finally:
+        if tarea is not None:
+            tarea.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de inferencia facial (protocolo binario).")
+    parser.add_argument(
+        "--url",
+        default=INFERENCE_SERVICE_URL or "unix:///tmp/sca-inferencia.sock",
+        help="unix:///ruta.sock o tcp://127.0.0.1:PUERTO (por defecto INFERENCE_SERVICE_URL)",
+    )
+    parser.add_argument("--workers", type=int, default=INFERENCE_WORKERS, help="Hilos que ejecutan el modelo")
+    parser.add_argument("--sin-precarga", action="store_true", help="No cargar el modelo antes de escuchar")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    try:
+        parsear_url(args.url)
+    except ValueError:
+        print(f"URL inválida: {args.url} (use unix:///ruta.sock o tcp://127.0.0.1:PUERTO)")
+        sys.exit(1)
+    if not args.sin_precarga:
+        print("Cargando modelo facial...", flush=True)
+        precargar_modelo()
+    servidor = ServidorInferencia(SessionLocal, workers=args.workers)
+    db = SessionLocal()
+    try:
+        sincronizador.iniciar(db)
+    finally:
+        db.close()
+    print(f"Servicio de inferencia escuchando en {args.url} ({args.workers} hilos)", flush=True)
+    try:
+        asyncio.run(servir(servidor, args.url))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
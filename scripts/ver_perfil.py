@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Lista y resume los perfiles de peticiones lentas (PROFILING_ENABLED, ver backend/app/core/profiling.py).
+Sin argumentos lista los perfiles de PROFILING_DIR (más recientes primero). Con un archivo muestra sus
+datos y las funciones con más muestras (propias = la función estaba en la punta de la pila; acumuladas =
+aparecía en cualquier nivel). --colapsado escribe las pilas en formato colapsado para flamegraph.pl
+o speedscope.
+
+Ejecutar desde la raíz: uv run python scripts/ver_perfil.py [perfil.json.gz] [--top 25] [--colapsado pilas.txt]
+"""
+import argparse
+import gzip
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from backend.app.core.config import PROFILING_DIR
+
+
+def _leer(path: Path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _listar(directorio: Path, limite: int) -> None:
+    perfiles = sorted(directorio.glob("perfil-*.json.gz"), reverse=True)
+    if not perfiles:
+        print(f"No hay perfiles en {directorio}")
+        return
+    print(f"{'fecha':<24} {'ms':>9} {'muestras':>8}  ruta")
+    for path in perfiles[:limite]:
+        p = _leer(path)
+        forzado = " (cabecera)" if p.get("forzado") else ""
+        print(f"{p['fecha']:<24} {p['duracion_ms']:>9.1f} {p['muestras']:>8}  {p['metodo']} {p['ruta']} → {p['estado']}{forzado}")
+        print(f"{'':<24} {path.name}")
+
+
+def _resumir(path: Path, top: int) -> dict:
+    p = _leer(path)
+    print(f"{p['metodo']} {p['path']} (ruta {p['ruta']}) → {p['estado']}")
+    print(f"Duración {p['duracion_ms']:.1f} ms, {p['muestras']} muestras cada {p['intervalo_ms']:g} ms", end="")
+    print(" desde el inicio (cabecera)" if p.get("forzado") else f" desde los {p['presupuesto_ms']:g} ms")
+    propias: Counter = Counter()
+    acumuladas: Counter = Counter()
+    total = sum(p["pilas"].values()) or 1
+    for pila, n in p["pilas"].items():
+        marcos = pila.split(";")
+        propias[marcos[-1]] += n
+        for marco in set(marcos):
+            acumuladas[marco] += n
+    print(f"\n{'propias':>8} {'acum.':>8}  función")
+    for marco, n in propias.most_common(top):
+        print(f"{n / total:>8.1%} {acumuladas[marco] / total:>8.1%}  {marco}")
+    return p
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ver perfiles de peticiones lentas.")
+    parser.add_argument("perfil", type=Path, nargs="?", help="Archivo .json.gz (sin él, lista los perfiles)")
+    parser.add_argument("--directorio", type=Path, default=Path(PROFILING_DIR), help="Directorio de perfiles")
+    parser.add_argument("--top", type=int, default=25, help="Funciones a mostrar / perfiles a listar")
+    parser.add_argument("--colapsado", type=Path, help="Escribir las pilas en formato colapsado (flamegraph)")
+    args = parser.parse_args()
+
+    if args.perfil is None:
+        _listar(args.directorio, args.top)
+        return
+    perfil = _resumir(args.perfil, args.top)
+    if args.colapsado:
+        with open(args.colapsado, "w", encoding="utf-8") as f:
+            for pila, n in perfil["pilas"].items():
+                f.write(f"{pila} {n}\n")
+        print(f"\nPilas escritas en {args.colapsado}")
+
+
+if __name__ == "__main__":
+    main()